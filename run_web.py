@@ -11,10 +11,10 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root / 'src'))
 sys.path.insert(0, str(project_root / 'src' / 'web'))
 
-# 导入并运行 Flask 应用
-from web.app import app, config, logger
-
 if __name__ == '__main__':
+    # 在入口保护内导入：spawn 方式的子进程会重新执行本文件（作为 __mp_main__），不能在那里初始化 Web 应用
+    from web.app import app, config, logger, start
+
     host = config.get('app.host', '127.0.0.1')
     port = config.get('app.port', 5000)
     debug = config.get('app.debug', False)
@@ -26,5 +26,6 @@ if __name__ == '__main__':
     logger.info("按 Ctrl+C 停止服务器")
     logger.info("=" * 50)
 
+    start()
     # 禁用自动重载，避免中断长时间运行的任务
     app.run(host=host, port=port, debug=debug, use_reloader=False)
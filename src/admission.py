@@ -0,0 +1,273 @@
+"""
+下载/上传准入控制模块
+开始写入大文件前按预计大小（Content-Length 或上传大小）预留磁盘空间，
+剩余空间不足时排队等待而不是写到一半失败；同时限制进程内所有音频下载的总带宽
+"""
+
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from loguru import logger
+
+
+class InsufficientSpaceError(Exception):
+    """磁盘空间不足（等待超时或文件大于可用容量）"""
+    pass
+
+
+# 默认准入参数（未在配置中指定时使用）
+DEFAULT_SETTINGS = {
+    "min_free_mb": 1024,       # 预留后磁盘至少保留的剩余空间（MB）
+    "max_download_mbps": 0,    # 所有音频下载的总带宽上限（MB/s），0 表示不限制
+    "wait_timeout": 3600,      # 空间不足时最长等待时间（秒），超时后任务失败（不自动重试）
+    "poll_interval": 5,        # 等待空间时重新检查磁盘的间隔（秒，其他进程释放空间时无通知）
+}
+
+
+class Reservation:
+    """一次磁盘空间预留（写入多少字节就从预留中扣除多少，文件写完时预留归零）"""
+
+    def __init__(self, controller: "AdmissionController", device: int, size: int, label: str = ""):
+        self.controller = controller
+        self.device = device
+        self.size = max(0, int(size or 0))
+        self.label = label
+        self.written = 0
+
+    @property
+    def remaining(self) -> int:
+        """尚未落盘的预留字节数"""
+        return max(0, self.size - self.written)
+
+    def consume(self, nbytes: int):
+        """
+        记录已写入的字节（写入前受总带宽限制）
+
+        Args:
+            nbytes: 本次写入的字节数
+        """
+        self.controller.throttle(nbytes)
+        with self.controller._condition:
+            self.written += nbytes
+
+    def reset(self, written: int = 0):
+        """
+        重新设置已落盘的字节数
+
+        单连接下载重试时文件被截断（从 0 开始），断点续传时已完成的部分不再占用预留。
+
+        Args:
+            written: 已落盘的字节数
+        """
+        with self.controller._condition:
+            self.written = written
+
+    def release(self):
+        """释放预留（重复调用无副作用）"""
+        self.controller._release(self)
+
+
+class AdmissionController:
+    """磁盘空间预留 + 总带宽限制（线程安全，进程内共享）"""
+
+    def __init__(self, min_free_mb: float = 1024, max_download_mbps: float = 0,
+                 wait_timeout: Optional[float] = 3600, poll_interval: float = 5):
+        """
+        初始化准入控制器
+
+        Args:
+            min_free_mb: 预留后磁盘至少保留的剩余空间（MB）
+            max_download_mbps: 总下载带宽上限（MB/s），0 表示不限制
+            wait_timeout: 空间不足时默认最长等待时间（秒），None 表示一直等待
+            poll_interval: 等待时重新检查磁盘的间隔（秒）
+        """
+        self.min_free_bytes = int(float(min_free_mb or 0) * 1024 * 1024)
+        self.bandwidth = float(max_download_mbps or 0) * 1024 * 1024
+        self.wait_timeout = wait_timeout
+        self.poll_interval = max(0.1, float(poll_interval or 5))
+
+        self._condition = threading.Condition()
+        self._reservations: Dict[int, list] = {}
+        self._bandwidth_lock = threading.Lock()
+        self._available_at = time.monotonic()
+
+    def available_bytes(self, path: str) -> int:
+        """
+        path 所在磁盘扣除已有预留和保底空间后还能分配的字节数
+
+        Args:
+            path: 目标文件或目录
+
+        Returns:
+            可分配字节数（可能为负）
+        """
+        directory = _existing_dir(path)
+        device = os.stat(directory).st_dev
+        with self._condition:
+            return self._available(directory, device)
+
+    def reserve(self, path: str, size: int, timeout: Optional[float] = None, label: str = "") -> Reservation:
+        """
+        为即将写入 path 的文件预留空间，空间不足时阻塞等待
+
+        Args:
+            path: 目标文件路径
+            size: 预计大小（字节，0 表示未知，只检查保底空间）
+            timeout: 最长等待时间（秒），为空时使用 wait_timeout，0 表示不等待
+            label: 日志中显示的名称
+
+        Returns:
+            预留对象（写入时调用 consume，结束后调用 release）
+
+        Raises:
+            InsufficientSpaceError: 文件大于磁盘容量，或等待超时
+        """
+        size = max(0, int(size or 0))
+        timeout = self.wait_timeout if timeout is None else timeout
+        directory = _existing_dir(path)
+        device = os.stat(directory).st_dev
+
+        total = shutil.disk_usage(directory).total
+        if size + self.min_free_bytes > total:
+            raise InsufficientSpaceError(
+                f"文件过大: 需要 {_mb(size)}MB + 保留 {_mb(self.min_free_bytes)}MB，磁盘容量 {_mb(total)}MB"
+            )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting_logged = False
+        with self._condition:
+            while True:
+                available = self._available(directory, device)
+                if available >= size:
+                    reservation = Reservation(self, device, size, label)
+                    self._reservations.setdefault(device, []).append(reservation)
+                    if waiting_logged:
+                        logger.info(f"磁盘空间已满足，开始写入: {label or path}")
+                    return reservation
+
+                wait = self.poll_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise InsufficientSpaceError(
+                            f"磁盘空间不足: 需要 {_mb(size)}MB，可用 {_mb(max(0, available))}MB"
+                            f"（保留 {_mb(self.min_free_bytes)}MB）"
+                        )
+                if not waiting_logged:
+                    logger.warning(f"磁盘空间不足，排队等待: {label or path} 需要 {_mb(size)}MB，"
+                                   f"可用 {_mb(max(0, available))}MB")
+                    waiting_logged = True
+                self._condition.wait(wait)
+
+    @contextmanager
+    def admit(self, path: str, size: int, timeout: Optional[float] = None, label: str = ""):
+        """
+        预留空间并在退出时释放（参数同 reserve）
+
+        Yields:
+            预留对象
+        """
+        reservation = self.reserve(path, size, timeout=timeout, label=label)
+        try:
+            yield reservation
+        finally:
+            reservation.release()
+
+    def throttle(self, nbytes: int):
+        """
+        按总带宽上限限制写入速度（所有下载线程共享，最多允许 1 秒的突发）
+
+        Args:
+            nbytes: 即将写入的字节数
+        """
+        if self.bandwidth <= 0 or nbytes <= 0:
+            return
+        with self._bandwidth_lock:
+            now = time.monotonic()
+            start = max(now, self._available_at)
+            self._available_at = start + nbytes / self.bandwidth
+            delay = self._available_at - now - 1.0
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取当前预留情况
+
+        Returns:
+            {reservations: [{label, size, written}], reserved_bytes, min_free_bytes, bandwidth}
+        """
+        with self._condition:
+            reservations = [r for items in self._reservations.values() for r in items]
+            return {
+                "reservations": [
+                    {"label": r.label, "size": r.size, "written": r.written} for r in reservations
+                ],
+                "reserved_bytes": sum(r.remaining for r in reservations),
+                "min_free_bytes": self.min_free_bytes,
+                "bandwidth": self.bandwidth,
+            }
+
+    def _available(self, directory: str, device: int) -> int:
+        """计算可分配字节数（调用方持有 _condition）"""
+        reserved = sum(r.remaining for r in self._reservations.get(device, []))
+        return shutil.disk_usage(directory).free - reserved - self.min_free_bytes
+
+    def _release(self, reservation: Reservation):
+        """移除预留并唤醒等待者"""
+        with self._condition:
+            items = self._reservations.get(reservation.device, [])
+            if reservation in items:
+                items.remove(reservation)
+                self._condition.notify_all()
+
+
+def _existing_dir(path: str) -> str:
+    """path 本身或最近一个已存在的上级目录（用于查询所在磁盘）"""
+    current = os.path.abspath(path)
+    while not os.path.isdir(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return current
+
+
+def _mb(size: int) -> int:
+    """字节数转换为 MB（日志用）"""
+    return int(size / (1024 * 1024))
+
+
+_settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def configure(settings: Optional[Dict[str, Any]]):
+    """
+    加载准入配置（config.yaml 的 admission 部分），已创建的控制器按新配置重建
+
+    Args:
+        settings: {min_free_mb, max_download_mbps, wait_timeout, poll_interval}
+    """
+    global _settings, _controller
+    with _controller_lock:
+        _settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        _controller = None
+
+
+def get_controller() -> AdmissionController:
+    """
+    获取进程内共享的准入控制器
+
+    Returns:
+        控制器对象
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(**{key: _settings[key] for key in DEFAULT_SETTINGS})
+        return _controller
@@ -7,6 +7,8 @@ import os
 from typing import List, Dict, Any
 from loguru import logger
 
+from rate_limiter import call_with_limit
+
 
 class AIChatError(Exception):
     """AI 对话异常"""
@@ -143,14 +145,14 @@ class QwenChat(AIChat):
                 "content": user_message
             })
 
-            # 调用 API
-            response = Generation.call(
+            # 调用 API（经过共享限流器）
+            response = call_with_limit('qwen', self.api_key, lambda: Generation.call(
                 model=self.model,
                 messages=self.conversation_history,
                 result_format='message',
                 max_tokens=self.max_tokens,
                 temperature=self.temperature
-            )
+            ))
 
             if response.status_code == 200:
                 assistant_message = response.output.choices[0].message.content
@@ -193,7 +195,8 @@ class DeepseekChat(AIChat):
 
             client = OpenAI(
                 api_key=self.api_key,
-                base_url=self.base_url
+                base_url=self.base_url,
+                max_retries=0  # 429 由共享限流器处理
             )
 
             # 添加用户消息到历史
@@ -202,13 +205,13 @@ class DeepseekChat(AIChat):
                 "content": user_message
             })
 
-            # 调用 API
-            response = client.chat.completions.create(
+            # 调用 API（经过共享限流器）
+            response = call_with_limit('deepseek', self.api_key, lambda: client.chat.completions.create(
                 model=self.model,
                 messages=self.conversation_history,
                 max_tokens=self.max_tokens,
                 temperature=self.temperature
-            )
+            ))
 
             assistant_message = response.choices[0].message.content
 
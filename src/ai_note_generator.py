@@ -7,6 +7,8 @@ import time
 from typing import List, Dict, Any
 from loguru import logger
 
+from rate_limiter import call_with_limit, is_rate_limited
+
 try:
     from openai import OpenAI
     OPENAI_AVAILABLE = True
@@ -23,12 +25,13 @@ class AINotGenerator:
         初始化 AI 笔记生成器
 
         Args:
-            config: 配置字典，包含 api_key, model, base_url 等
+            config: 配置字典，包含 provider, api_key, model, base_url 等
         """
         if not OPENAI_AVAILABLE:
             raise ImportError("需要安装 openai 库: pip install openai")
 
         self.config = config
+        self.provider = config.get('provider', 'deepseek')
         self.api_key = config.get('api_key')
         self.model = config.get('model', 'deepseek-chat')
         self.base_url = config.get('base_url', 'https://api.deepseek.com')
@@ -39,10 +42,11 @@ class AINotGenerator:
         if not self.api_key:
             raise ValueError("未配置 API Key")
 
-        # 初始化客户端
+        # 初始化客户端（429 由共享限流器处理，关闭 SDK 自带的重试）
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            max_retries=0
         )
 
         logger.info(f"AI 笔记生成器初始化完成 (模型: {self.model})")
@@ -145,15 +149,19 @@ class AINotGenerator:
             try:
                 logger.info(f"调用 {self.model} API (尝试 {attempt + 1}/{max_retries})")
 
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "你是一位专业的播客内容分析师，擅长提炼核心观点和深度分析。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature,
-                    timeout=self.timeout
+                response = call_with_limit(
+                    self.provider,
+                    self.api_key,
+                    lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": "你是一位专业的播客内容分析师，擅长提炼核心观点和深度分析。"},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                        timeout=self.timeout
+                    )
                 )
 
                 note = response.choices[0].message.content
@@ -164,9 +172,11 @@ class AINotGenerator:
             except Exception as e:
                 logger.warning(f"API 调用失败 (尝试 {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # 指数退避
-                    logger.info(f"等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    # 限流已由共享限流器降速等待，其他错误指数退避
+                    wait_time = 0 if is_rate_limited(e) else 2 ** attempt
+                    if wait_time:
+                        logger.info(f"等待 {wait_time} 秒后重试...")
+                        time.sleep(wait_time)
                 else:
                     logger.error("API 调用失败，已达最大重试次数")
                     raise
@@ -192,6 +202,7 @@ def create_ai_generator(provider: str, config: Dict[str, Any]) -> AINotGenerator
     """
     if provider == 'deepseek':
         return AINotGenerator({
+            'provider': 'deepseek',
             'api_key': config.get('deepseek_api_key'),
             'model': config.get('deepseek_model', 'deepseek-chat'),
             'base_url': 'https://api.deepseek.com',
@@ -204,6 +215,7 @@ def create_ai_generator(provider: str, config: Dict[str, Any]) -> AINotGenerator
         raise ValueError("Claude 暂不支持，因为其 API 不兼容 OpenAI SDK。请使用 qwen、deepseek 或 openai。")
     elif provider == 'openai':
         return AINotGenerator({
+            'provider': 'openai',
             'api_key': config.get('openai_api_key'),
             'model': config.get('openai_model', 'gpt-3.5-turbo'),
             'base_url': 'https://api.openai.com/v1',
@@ -214,6 +226,7 @@ def create_ai_generator(provider: str, config: Dict[str, Any]) -> AINotGenerator
     elif provider == 'doubao':
         # 豆包（字节跳动）使用 OpenAI 兼容接口
         return AINotGenerator({
+            'provider': 'doubao',
             'api_key': config.get('doubao_api_key'),
             'model': config.get('doubao_model', 'doubao-pro-32k'),
             'base_url': 'https://ark.cn-beijing.volces.com/api/v3',
@@ -224,6 +237,7 @@ def create_ai_generator(provider: str, config: Dict[str, Any]) -> AINotGenerator
     elif provider == 'qwen':
         # 通义千问使用 OpenAI 兼容接口
         return AINotGenerator({
+            'provider': 'qwen',
             'api_key': config.get('qwen_api_key'),
             'model': config.get('qwen_model', 'qwen-plus'),
             'base_url': 'https://dashscope.aliyuncs.com/compatible-mode/v1',
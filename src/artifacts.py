@@ -0,0 +1,192 @@
+"""
+产物依赖图模块
+记录每个产物（转录 JSON、Markdown、PDF、笔记等）的输入哈希，
+重新生成时只重建输入发生变化或文件缺失的产物（类似 Make）
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+def content_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件内容的 SHA-256
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactGraph:
+    """单个播客的产物依赖图"""
+
+    def __init__(self, db, podcast_id: str):
+        """
+        初始化依赖图
+
+        Args:
+            db: 数据库对象
+            podcast_id: 播客 ID
+        """
+        self.db = db
+        self.podcast_id = podcast_id
+        self.records = db.get_artifacts(podcast_id)
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self._output_hashes: Dict[str, str] = {}
+
+    def add_source(self, name: str, path: str = None, digest: str = None):
+        """
+        添加源节点（不由依赖图生成，如音频、原始 ASR 结果）
+
+        Args:
+            name: 节点名称
+            path: 文件路径（未提供 digest 时读取文件计算哈希）
+            digest: 已知的内容哈希（避免重新读取大文件）
+        """
+        self.nodes[name] = {"source": True, "path": path, "digest": digest, "inputs": []}
+
+    def add(self, name: str, target: str, build: Callable[[str], Any],
+            inputs: List[str] = None, params: Dict[str, Any] = None, lazy: bool = False):
+        """
+        添加派生节点
+
+        Args:
+            name: 节点名称
+            target: 产物文件路径
+            build: 生成函数，参数为产物路径
+            inputs: 依赖的节点名称（必须已添加）
+            params: 影响产物内容的参数（模板版本、段落间隔等）
+            lazy: 惰性节点，build() 默认不生成，需显式指定
+        """
+        for input_name in inputs or []:
+            if input_name not in self.nodes:
+                raise ValueError(f"依赖节点未定义: {input_name}")
+
+        self.nodes[name] = {
+            "source": False,
+            "path": str(target),
+            "build": build,
+            "inputs": list(inputs or []),
+            "params": params or {},
+            "lazy": lazy,
+        }
+
+    def output_hash(self, name: str) -> Optional[str]:
+        """获取节点当前产物的内容哈希（文件不存在时为 None）"""
+        if name in self._output_hashes:
+            return self._output_hashes[name]
+
+        node = self.nodes[name]
+        digest = node.get("digest")
+        if not digest and node["path"] and Path(node["path"]).exists():
+            digest = content_hash(node["path"])
+
+        self._output_hashes[name] = digest
+        return digest
+
+    def input_hash(self, name: str) -> str:
+        """计算节点输入的哈希（依赖产物哈希 + 参数）"""
+        node = self.nodes[name]
+        payload = {
+            "params": node.get("params", {}),
+            "inputs": {input_name: self.output_hash(input_name) for input_name in node["inputs"]},
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()
+
+    def is_stale(self, name: str) -> bool:
+        """
+        判断派生节点是否需要重建
+
+        产物文件缺失、没有构建记录或输入哈希变化时为过期
+        """
+        node = self.nodes[name]
+        if node["source"]:
+            return False
+        if not Path(node["path"]).exists():
+            return True
+
+        record = self.records.get(name)
+        if not record or record.get("path") != node["path"]:
+            return True
+        return record.get("input_hash") != self.input_hash(name)
+
+    def build(self, names: List[str] = None, force: bool = False) -> List[str]:
+        """
+        按依赖顺序生成过期的产物
+
+        Args:
+            names: 要生成的节点（默认所有非惰性节点），其依赖会一并检查
+            force: 忽略哈希强制重建
+
+        Returns:
+            实际重建的节点名称列表
+        """
+        wanted = self._with_dependencies(names) if names else {
+            name for name, node in self.nodes.items() if not node.get("lazy")
+        }
+
+        rebuilt = []
+        for name, node in self.nodes.items():
+            if name not in wanted or node["source"]:
+                continue
+
+            if force or self.is_stale(name):
+                logger.info(f"[{self.podcast_id}] 生成产物: {name}")
+                Path(node["path"]).parent.mkdir(parents=True, exist_ok=True)
+                node["build"](node["path"])
+                self._output_hashes.pop(name, None)
+                rebuilt.append(name)
+            else:
+                logger.debug(f"[{self.podcast_id}] 产物已是最新，跳过: {name}")
+
+            # 记录本次输入哈希与产物哈希（产物被外部修改时也会更新，
+            # 例如重命名说话人修改了 JSON，下游 Markdown 会因此过期）
+            self._record(name)
+
+        return rebuilt
+
+    def _with_dependencies(self, names: List[str]) -> set:
+        """展开节点及其所有依赖"""
+        result = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in result:
+                continue
+            if name not in self.nodes:
+                raise ValueError(f"未定义的产物: {name}")
+            result.add(name)
+            stack.extend(self.nodes[name]["inputs"])
+        return result
+
+    def _record(self, name: str):
+        """保存节点的构建记录"""
+        node = self.nodes[name]
+        input_hash = self.input_hash(name)
+        output_hash = self.output_hash(name)
+        record = self.records.get(name) or {}
+
+        if (record.get("path") == node["path"] and record.get("input_hash") == input_hash
+                and record.get("output_hash") == output_hash):
+            return
+
+        self.db.save_artifact(self.podcast_id, name, node["path"], input_hash, output_hash)
+        self.records[name] = {
+            "path": node["path"],
+            "input_hash": input_hash,
+            "output_hash": output_hash,
+        }
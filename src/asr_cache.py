@@ -0,0 +1,170 @@
+"""
+ASR 结果缓存模块
+识别出的句子按“音频内容 SHA-256 + 模型 + 识别参数”缓存为压缩文件，
+相同音频用相同参数再次转录（重试、重复提交、不同播客同一期节目）时直接复用，不再调用 API；
+缓存总大小超过上限时按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from loguru import logger
+
+from audio_cache import link_or_copy
+
+
+# 进程内的命中/未命中计数（所有缓存对象共享）
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1):
+    """累加计数"""
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def cache_key(audio_sha256: str, model: str, options: Dict[str, Any] = None) -> str:
+    """
+    计算缓存键
+
+    Args:
+        audio_sha256: 音频内容的 SHA-256
+        model: ASR 模型
+        options: 影响识别结果的参数（语言、说话人分离、分段方式等）
+
+    Returns:
+        十六进制摘要
+    """
+    payload = json.dumps({"audio": audio_sha256, "model": model, "options": options or {}},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ASRCache:
+    """按音频内容和识别参数寻址的 ASR 结果缓存"""
+
+    def __init__(self, db, cache_dir: str, max_mb: float = 2048):
+        """
+        初始化 ASR 结果缓存
+
+        Args:
+            db: 数据库对象
+            cache_dir: 缓存目录（文件为 {键前两位}/{键}.json.gz）
+            max_mb: 缓存总大小上限（MB），0 表示不限制
+        """
+        self.db = db
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(float(max_mb or 0) * 1024 * 1024)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        查找缓存的句子文件
+
+        Args:
+            key: 缓存键（见 cache_key）
+
+        Returns:
+            缓存文件路径（gzip 压缩的 JSON，格式见 transcriber_qwen.write_sentences），未命中时返回 None
+        """
+        entry = self.db.get_asr_cache_entry(key)
+        if not entry:
+            _count("misses")
+            return None
+
+        path = Path(entry["path"])
+        if not path.exists() or path.stat().st_size != entry["size"]:
+            logger.warning(f"ASR 缓存文件缺失或不完整，已移除: {path}")
+            self._remove(entry)
+            _count("misses")
+            return None
+
+        self.db.touch_asr_cache_entry(key)
+        _count("hits")
+        return str(path)
+
+    def put(self, key: str, audio_sha256: str, model: str, sentences_path: str) -> str:
+        """
+        缓存句子文件（硬链接或复制），超过总大小上限时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            audio_sha256: 音频内容的 SHA-256（用于按音频失效）
+            model: ASR 模型
+            sentences_path: 句子文件路径
+
+        Returns:
+            缓存文件路径
+        """
+        path = self.cache_dir / key[:2] / f"{key}.json.gz"
+        link_or_copy(sentences_path, str(path))
+
+        size = path.stat().st_size
+        self.db.save_asr_cache_entry(key, audio_sha256, model, str(path), size)
+        _count("stores")
+        self._evict(keep=key)
+        return str(path)
+
+    def invalidate_audio(self, audio_sha256: str) -> int:
+        """
+        删除某个音频内容的全部缓存结果（强制重新识别时使用）
+
+        Args:
+            audio_sha256: 音频内容的 SHA-256
+
+        Returns:
+            删除的条目数
+        """
+        if not audio_sha256:
+            return 0
+        entries = self.db.list_asr_cache_entries(audio_sha256)
+        for entry in entries:
+            self._remove(entry)
+        if entries:
+            logger.info(f"已清除 {len(entries)} 条 ASR 缓存: {audio_sha256[:12]}")
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            {entries, bytes, max_bytes, hits, misses, stores, evictions, hit_rate}（计数为本进程启动以来）
+        """
+        with _counters_lock:
+            counters = dict(_counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **self.db.get_asr_cache_totals(),
+            "max_bytes": self.max_bytes,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def _evict(self, keep: str = None):
+        """按最近使用时间淘汰条目，直到总大小不超过上限（keep 为刚写入的条目，不淘汰）"""
+        if self.max_bytes <= 0:
+            return
+        total = self.db.get_asr_cache_totals()["bytes"]
+        if total <= self.max_bytes:
+            return
+        for entry in self.db.list_asr_cache_entries():
+            if total <= self.max_bytes:
+                break
+            if entry["cache_key"] == keep:
+                continue
+            self._remove(entry)
+            total -= entry["size"]
+            _count("evictions")
+            logger.debug(f"ASR 缓存淘汰: {entry['cache_key'][:12]}（{entry['size']} 字节）")
+
+    def _remove(self, entry: Dict[str, Any]):
+        """删除缓存记录和文件"""
+        self.db.delete_asr_cache_entry(entry["cache_key"])
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,219 @@
+"""
+ASR 任务轮询模块
+一个后台线程集中轮询所有未完成的转录任务（同一任务只查询一次），
+查询间隔随音频时长自适应并逐步退避，任务结束时通过 Future 通知调用方，
+等待转录的播客不再各自占用一个线程
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from rate_limiter import ProviderLimiter, is_rate_limited, retry_after_seconds
+
+
+class ASRPollError(Exception):
+    """任务状态查询失败"""
+    pass
+
+
+class ASRTaskGoneError(ASRPollError):
+    """任务不存在或已过期（查询被拒绝，重新查询不会成功）"""
+    pass
+
+
+# 仍在处理中的任务状态
+ACTIVE_STATUSES = ("PENDING", "RUNNING")
+
+
+class _TrackedTask:
+    """一个被轮询的任务（同一任务的多个等待者共享）"""
+
+    def __init__(self, task_id: str, interval: float, max_interval: float):
+        self.task_id = task_id
+        self.interval = interval
+        self.max_interval = max_interval
+        self.waiters: List[tuple] = []   # [(future, on_status)]
+        self.errors = 0
+
+
+class ASRPoller:
+    """集中式 ASR 任务轮询器（单个后台线程，线程安全）"""
+
+    def __init__(self, fetch: Callable[[str], Any], min_interval: float = 5.0, max_interval: float = 60.0,
+                 duration_ratio: float = 0.05, backoff: float = 1.5, max_errors: int = 5,
+                 limiter: Optional[ProviderLimiter] = None):
+        """
+        初始化轮询器
+
+        Args:
+            fetch: 查询函数 (task_id) -> 响应（含 status_code, message, output）
+            min_interval: 最短查询间隔（秒）
+            max_interval: 最长查询间隔（秒）
+            duration_ratio: 首次查询延迟占音频时长的比例（转录耗时大致与时长成正比）
+            backoff: 每次查询后间隔的增长倍数
+            max_errors: 连续查询异常多少次后判定任务失败（限流不计入）
+            limiter: 查询共用的限流器，收到限流响应时通知其降速
+        """
+        self.fetch = fetch
+        self.min_interval = float(min_interval or 5.0)
+        self.max_interval = max(self.min_interval, float(max_interval or 60.0))
+        self.duration_ratio = float(duration_ratio or 0)
+        self.backoff = max(1.0, float(backoff or 1.0))
+        self.max_errors = max(1, int(max_errors or 1))
+        self.limiter = limiter
+
+        self._tasks: Dict[str, _TrackedTask] = {}
+        self._schedule: List[tuple] = []   # 堆: (下次查询时间, 序号, task_id)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def track(self, task_id: str, audio_duration: float = None, on_status=None) -> Future:
+        """
+        登记一个待轮询的任务
+
+        同一任务（例如批量提交的任务）被多次登记时共用一次查询，每个等待者各自得到 Future。
+
+        Args:
+            task_id: 任务 ID
+            audio_duration: 音频时长（秒），用于估计首次查询时间，未知时按最短间隔查询
+            on_status: 每次查询后的回调 (task_status)，在轮询线程中执行，不应阻塞
+
+        Returns:
+            任务结束（状态不再是 PENDING/RUNNING）时以任务输出完成的 Future；
+            查询失败时以 ASRPollError 结束
+        """
+        future = Future()
+        with self._condition:
+            task = self._tasks.get(task_id)
+            if task is None:
+                # 首次查询时间与音频时长成正比，之后逐步退避
+                first_delay = min(self.max_interval,
+                                  max(self.min_interval, (audio_duration or 0) * self.duration_ratio))
+                task = _TrackedTask(task_id, first_delay, self.max_interval)
+                self._tasks[task_id] = task
+                self._push(task_id, time.monotonic() + first_delay)
+                self._condition.notify()
+            task.waiters.append((future, on_status))
+            self._ensure_thread()
+        return future
+
+    def pending(self) -> int:
+        """正在轮询的任务数"""
+        with self._condition:
+            return len(self._tasks)
+
+    def _ensure_thread(self):
+        """按需启动后台线程（调用方持有 _condition）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="asr-poller", daemon=True)
+            self._thread.start()
+
+    def _push(self, task_id: str, due: float):
+        """安排下次查询（调用方持有 _condition）"""
+        heapq.heappush(self._schedule, (due, next(self._counter), task_id))
+
+    def _loop(self):
+        """后台线程主循环：取出到期的任务逐个查询"""
+        while True:
+            with self._condition:
+                while True:
+                    if not self._schedule:
+                        self._condition.wait()
+                        continue
+                    due, _, task_id = self._schedule[0]
+                    delay = due - time.monotonic()
+                    if delay <= 0:
+                        heapq.heappop(self._schedule)
+                        break
+                    self._condition.wait(delay)
+                task = self._tasks.get(task_id)
+            if task is not None:
+                self._poll(task)
+
+    def _poll(self, task: _TrackedTask):
+        """
+        查询一个任务并通知等待者
+
+        限流响应（429 / Throttling）通知限流器降速并退避后重新查询，不计入错误次数（远端任务仍在运行）；
+        其他 4xx 响应视为任务不存在，其余错误按 max_errors 重试。
+        """
+        try:
+            response = self.fetch(task.task_id)
+            if is_rate_limited(response):
+                self._throttled(task, retry_after_seconds(response))
+                return
+            if _is_rejected(response.status_code):
+                self._finish(task, error=ASRTaskGoneError(f"转录失败: {response.status_code} - {response.message}"))
+                return
+            if response.status_code != HTTPStatus.OK:
+                raise ASRPollError(f"{response.status_code} - {response.message}")
+            if not response.output:
+                raise ASRPollError("API 返回结果为空")
+        except Exception as e:
+            if is_rate_limited(e):
+                self._throttled(task, retry_after_seconds(e))
+                return
+            task.errors += 1
+            if task.errors >= self.max_errors:
+                self._finish(task, error=ASRPollError(f"查询转录任务失败: {e}"))
+                return
+            logger.warning(f"查询转录任务失败（{task.errors}/{self.max_errors}），稍后重试: {task.task_id}: {e}")
+            with self._condition:
+                self._push(task.task_id, time.monotonic() + task.interval)
+            return
+
+        task.errors = 0
+        status = response.output.get("task_status")
+        with self._condition:
+            waiters = list(task.waiters)
+        for _, on_status in waiters:
+            if on_status:
+                try:
+                    on_status(status)
+                except Exception as e:
+                    logger.error(f"转录状态回调执行失败: {e}")
+
+        if status in ACTIVE_STATUSES:
+            task.interval = min(task.max_interval, task.interval * self.backoff)
+            with self._condition:
+                self._push(task.task_id, time.monotonic() + task.interval)
+            return
+
+        self._finish(task, output=response.output)
+
+    def _throttled(self, task: _TrackedTask, retry_after: float = None):
+        """查询被限流：通知共享限流器降速，退避查询间隔后重新安排该任务"""
+        if self.limiter is not None:
+            self.limiter.report_throttled(retry_after)
+        task.interval = min(task.max_interval, task.interval * self.backoff)
+        delay = max(task.interval, retry_after or 0)
+        logger.warning(f"查询转录任务被限流，{delay:.0f}s 后重新查询: {task.task_id}")
+        with self._condition:
+            self._push(task.task_id, time.monotonic() + delay)
+
+    def _finish(self, task: _TrackedTask, output: Dict[str, Any] = None, error: Exception = None):
+        """结束任务：移出轮询表并完成所有等待者的 Future"""
+        with self._condition:
+            self._tasks.pop(task.task_id, None)
+            waiters = list(task.waiters)
+        for future, _ in waiters:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(output)
+
+
+def _is_rejected(status_code) -> bool:
+    """查询是否被拒绝（4xx，限流 429 除外）"""
+    try:
+        code = int(status_code)
+    except (TypeError, ValueError):
+        return False
+    return 400 <= code < 500 and code != HTTPStatus.TOO_MANY_REQUESTS
@@ -0,0 +1,154 @@
+"""
+音频内容缓存模块
+下载过的音频按 SHA-256 保存在缓存目录，并在数据库中记录“音频链接 + ETag + 大小”到内容的映射，
+重复提交同一期节目时直接复用缓存文件，不再下载；缓存总大小超过上限时按最近使用时间淘汰，
+最后一个使用某音频的播客被删除时一并删除其缓存
+"""
+
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+
+
+class AudioCache:
+    """按内容寻址的音频缓存"""
+
+    def __init__(self, db, cache_dir: str, max_mb: float = 4096):
+        """
+        初始化音频缓存
+
+        Args:
+            db: 数据库对象
+            cache_dir: 缓存目录（文件名为 {sha256}.{扩展名}）
+            max_mb: 缓存总大小上限（MB），0 表示不限制
+        """
+        self.db = db
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(float(max_mb or 0) * 1024 * 1024)
+
+    def lookup(self, audio_url: str, etag: str = "", size: int = 0) -> Optional[dict]:
+        """
+        查找音频链接对应的缓存
+
+        服务器返回的 ETag 和大小必须与缓存记录一致（远端文件被替换时不会误用旧缓存）。
+
+        Args:
+            audio_url: 音频下载链接
+            etag: 服务器返回的 ETag
+            size: 服务器返回的文件大小（0 表示未知）
+
+        Returns:
+            缓存记录 {audio_url, etag, size, sha256, path}，未命中时返回 None
+        """
+        entry = self.db.get_audio_cache(audio_url)
+        if not entry:
+            return None
+
+        if not size or entry["size"] != size or (entry["etag"] or "") != (etag or ""):
+            logger.info(f"远端音频已变化或无法校验，缓存失效: {audio_url}")
+            return None
+
+        path = Path(entry["path"])
+        if not path.exists() or path.stat().st_size != entry["size"]:
+            logger.warning(f"音频缓存文件缺失或不完整: {path}")
+            return None
+
+        self.db.touch_audio_cache(entry["sha256"])
+        return entry
+
+    def store(self, audio_url: str, etag: str, file_path: str, sha256: str, size: int = None) -> str:
+        """
+        将下载好的音频加入缓存并记录映射
+
+        Args:
+            audio_url: 音频下载链接
+            etag: 服务器返回的 ETag
+            file_path: 已下载的音频文件
+            sha256: 音频内容的 SHA-256
+            size: 文件大小（为空时读取文件属性）
+
+        Returns:
+            缓存文件路径
+        """
+        cached_path = self.cache_dir / f"{sha256}{Path(file_path).suffix}"
+        if not cached_path.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            link_or_copy(file_path, str(cached_path))
+
+        if size is None:
+            size = cached_path.stat().st_size
+        self.db.save_audio_cache(audio_url, etag or "", size, sha256, str(cached_path))
+        self._evict(keep=sha256)
+        return str(cached_path)
+
+    def release(self, sha256: str) -> bool:
+        """
+        没有播客再使用某个音频内容时删除其缓存（在删除播客记录之后调用）
+
+        Args:
+            sha256: 被删除播客的音频内容 SHA-256
+
+        Returns:
+            是否删除了缓存
+        """
+        if not sha256 or self.db.count_podcasts_by_audio_sha256(sha256) > 0:
+            return False
+        removed = False
+        for entry in self.db.list_audio_cache_files():
+            if entry["sha256"] == sha256:
+                self._remove(entry)
+                removed = True
+        if removed:
+            logger.info(f"已删除不再使用的音频缓存: {sha256[:12]}")
+        return removed
+
+    def _evict(self, keep: str = None):
+        """按最近使用时间淘汰缓存文件，直到总大小不超过上限（keep 为刚写入的内容，不淘汰）"""
+        if self.max_bytes <= 0:
+            return
+        entries = self.db.list_audio_cache_files()
+        total = sum(entry["size"] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["sha256"] == keep:
+                continue
+            self._remove(entry)
+            total -= entry["size"]
+            logger.debug(f"音频缓存淘汰: {entry['sha256'][:12]}（{entry['size']} 字节）")
+
+    def _remove(self, entry: dict):
+        """删除某个内容的缓存记录和文件（播客自己的音频是独立的目录项，不受影响）"""
+        self.db.delete_audio_cache(entry["sha256"])
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
+
+
+def link_or_copy(source: str, target: str):
+    """
+    创建硬链接（同一文件系统内不占额外空间），失败时复制文件
+
+    播客自己的音频文件与缓存文件是两个目录项，播客重命名、移动或删除音频不影响缓存。
+
+    Args:
+        source: 源文件
+        target: 目标路径
+    """
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    # 每次使用不同的临时文件名，并发写入同一目标时不会互相删除或覆盖临时文件
+    tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        # 目标已是同一文件的硬链接时 rename 不做任何操作，临时文件会留下
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,282 @@
+"""
+长音频分段模块
+用 ffmpeg 检测静音，把长音频在静音处切成互相重叠的分段以便并行转录，
+再把各分段的句子按时间偏移合并：重叠部分去重，并根据重叠区内的句子对齐各分段的说话人编号
+"""
+
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+class ChunkingError(Exception):
+    """分段异常（ffmpeg 不可用或执行失败）"""
+    pass
+
+
+SILENCE_START_PATTERN = re.compile(r"silence_start:\s*(-?[\d.]+)")
+SILENCE_END_PATTERN = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def ffmpeg_available() -> bool:
+    """是否安装了 ffmpeg"""
+    return shutil.which("ffmpeg") is not None
+
+
+def detect_silences(audio_path: str, noise_db: float = -35, min_silence: float = 0.4) -> List[Tuple[float, float]]:
+    """
+    检测音频中的静音区间（ffmpeg silencedetect，只解码不写文件）
+
+    Args:
+        audio_path: 音频/视频文件路径
+        noise_db: 静音阈值（dB）
+        min_silence: 最短静音时长（秒）
+
+    Returns:
+        静音区间列表 [(开始秒, 结束秒)]
+
+    Raises:
+        ChunkingError: ffmpeg 不可用或执行失败
+    """
+    if not ffmpeg_available():
+        raise ChunkingError("未安装 ffmpeg，无法检测静音")
+
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", str(audio_path), "-vn",
+         "-af", f"silencedetect=n={noise_db}dB:d={min_silence}", "-f", "null", "-"],
+        capture_output=True, text=True, errors="replace"
+    )
+    if result.returncode != 0:
+        raise ChunkingError(f"静音检测失败: {result.stderr.strip()[-500:]}")
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = SILENCE_START_PATTERN.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END_PATTERN.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+
+    logger.info(f"静音检测完成: {len(silences)} 处静音")
+    return silences
+
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], chunk_seconds: float = 900,
+                overlap_seconds: float = 5, search_seconds: float = 60) -> List[Dict[str, float]]:
+    """
+    规划分段：在每个目标切点附近最长的静音中点处切分，各分段向两侧扩展重叠区
+
+    Args:
+        duration: 音频总时长（秒）
+        silences: 静音区间列表
+        chunk_seconds: 目标分段时长（秒）
+        overlap_seconds: 相邻分段的重叠时长（每侧，秒）
+        search_seconds: 在目标切点前后多大范围内寻找静音（秒）
+
+    Returns:
+        分段列表 [{start, end, core_start, core_end}]：start/end 为实际截取范围，
+        core_start/core_end 为该分段负责的区间（合并时只保留中点落在其中的句子）
+    """
+    cuts = []
+    position = 0.0
+    # 剩余部分不足 1.25 个分段时不再切分，避免最后出现很短的分段
+    while duration - position > chunk_seconds * 1.25:
+        target = position + chunk_seconds
+        candidates = [
+            (end - start, (start + end) / 2) for start, end in silences
+            if target - search_seconds <= (start + end) / 2 <= target + search_seconds
+        ]
+        cut = max(candidates, key=lambda c: (c[0], -abs(c[1] - target)))[1] if candidates else target
+        cuts.append(cut)
+        position = cut
+
+    boundaries = [0.0] + cuts + [duration]
+    return [
+        {
+            "start": max(0.0, boundaries[i] - overlap_seconds),
+            "end": min(duration, boundaries[i + 1] + overlap_seconds),
+            "core_start": boundaries[i],
+            "core_end": boundaries[i + 1],
+        }
+        for i in range(len(boundaries) - 1)
+    ]
+
+
+def chunk_path(output_dir: str, index: int) -> str:
+    """第 index 个分段的文件路径"""
+    return str(Path(output_dir) / f"chunk_{index:03d}.flac")
+
+
+def extract_chunks(audio_path: str, chunks: List[Dict[str, float]], output_dir: str,
+                   max_workers: int = 4, indexes: List[int] = None) -> List[str]:
+    """
+    按规划截取分段（单声道 FLAC，样本级精确，时间偏移与规划一致）
+
+    分段先写入临时文件再改名，文件存在即表示截取完整。
+
+    Args:
+        audio_path: 源音频/视频文件
+        chunks: plan_chunks 的结果
+        output_dir: 分段文件目录
+        max_workers: 同时运行的 ffmpeg 进程数
+        indexes: 只截取这些分段（断点恢复时已提交的分段不再截取），为空时截取全部
+
+    Returns:
+        全部分段的文件路径列表（与 chunks 顺序一致）
+
+    Raises:
+        ChunkingError: ffmpeg 不可用或执行失败
+    """
+    if not ffmpeg_available():
+        raise ChunkingError("未安装 ffmpeg，无法截取分段")
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    def extract(index: int):
+        chunk = chunks[index]
+        output_path = chunk_path(output_dir, index)
+        tmp_path = f"{output_path[:-len('.flac')]}.tmp.flac"
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostats", "-y", "-ss", f"{chunk['start']:.3f}",
+             "-i", str(audio_path), "-t", f"{chunk['end'] - chunk['start']:.3f}",
+             "-vn", "-ac", "1", "-c:a", "flac", tmp_path],
+            capture_output=True, text=True, errors="replace"
+        )
+        if result.returncode != 0:
+            raise ChunkingError(f"截取分段 {index} 失败: {result.stderr.strip()[-500:]}")
+        Path(tmp_path).replace(output_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        list(executor.map(extract, range(len(chunks)) if indexes is None else indexes))
+    return [chunk_path(output_dir, index) for index in range(len(chunks))]
+
+
+def sentences_from_raw(raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """从原始转录数据中取出句子列表（兼容 transcripts[*].sentences 和 sentences 两种格式）"""
+    sentences = []
+    for data in raw_results:
+        if "transcripts" in data:
+            for transcript in data["transcripts"]:
+                sentences.extend(transcript.get("sentences") or [])
+        else:
+            sentences.extend(data.get("sentences") or [])
+    return sentences
+
+
+def _shift(sentence: Dict[str, Any], offset_ms: int) -> Dict[str, Any]:
+    """句子（及其中的词）的时间加上偏移"""
+    shifted = dict(sentence)
+    shifted["begin_time"] = sentence.get("begin_time", 0) + offset_ms
+    shifted["end_time"] = sentence.get("end_time", 0) + offset_ms
+    if isinstance(sentence.get("words"), list):
+        shifted["words"] = [
+            dict(word, begin_time=word.get("begin_time", 0) + offset_ms, end_time=word.get("end_time", 0) + offset_ms)
+            for word in sentence["words"]
+        ]
+    return shifted
+
+
+def _match_speakers(previous: List[Dict[str, Any]], current: List[Dict[str, Any]],
+                    window: Tuple[int, int]) -> Dict[Any, Any]:
+    """
+    根据重叠区内同时出现的句子对齐说话人：当前分段的说话人映射为与其重叠时长最长的上一分段说话人；
+    两边各剩一个未对齐的说话人时按排除法对应（常见的双人对话只需在重叠区对齐一人）
+
+    Args:
+        previous: 上一分段的句子（说话人已是全局编号）
+        current: 当前分段的句子（说话人为分段内编号）
+        window: 重叠区 (开始毫秒, 结束毫秒)
+
+    Returns:
+        {分段内编号: 全局编号}（一一对应）
+    """
+    def in_window(sentence):
+        return sentence.get("speaker_id") is not None and \
+            sentence["begin_time"] < window[1] and sentence["end_time"] > window[0]
+
+    votes: Dict[tuple, int] = {}
+    for b in filter(in_window, current):
+        for a in filter(in_window, previous):
+            shared = min(a["end_time"], b["end_time"], window[1]) - max(a["begin_time"], b["begin_time"], window[0])
+            if shared > 0:
+                key = (b["speaker_id"], a["speaker_id"])
+                votes[key] = votes.get(key, 0) + shared
+
+    mapping: Dict[Any, Any] = {}
+    used = set()
+    for (local, global_id), _ in sorted(votes.items(), key=lambda item: -item[1]):
+        if local not in mapping and global_id not in used:
+            mapping[local] = global_id
+            used.add(global_id)
+
+    unmatched_local = {s["speaker_id"] for s in current if s.get("speaker_id") is not None} - set(mapping)
+    unmatched_global = {s["speaker_id"] for s in previous if s.get("speaker_id") is not None} - used
+    if len(unmatched_local) == 1 and len(unmatched_global) == 1:
+        mapping[unmatched_local.pop()] = unmatched_global.pop()
+    return mapping
+
+
+def merge_chunk_sentences(chunks: List[Dict[str, float]],
+                          chunk_sentences: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    合并各分段的句子
+
+    - 时间加上分段起点偏移
+    - 只保留中点落在分段负责区间内的句子，与上一条保留句子大部分重叠的视为重复丢弃
+    - 说话人编号按重叠区对齐后统一为全局编号（无法对齐的说话人分配新编号）
+
+    Args:
+        chunks: plan_chunks 的结果
+        chunk_sentences: 各分段的句子列表（时间为分段内毫秒）
+
+    Returns:
+        合并后的句子列表（时间为整段音频内的毫秒）
+    """
+    merged: List[Dict[str, Any]] = []
+    previous: Optional[List[Dict[str, Any]]] = None
+    previous_end_ms = 0
+    next_speaker = 0
+
+    for index, (chunk, sentences) in enumerate(zip(chunks, chunk_sentences)):
+        start_ms = int(round(chunk["start"] * 1000))
+        shifted = [_shift(sentence, start_ms) for sentence in sentences]
+
+        mapping = _match_speakers(previous, shifted, (start_ms, previous_end_ms)) if previous else {}
+        for sentence in shifted:
+            local = sentence.get("speaker_id")
+            if local is None:
+                continue
+            if local not in mapping:
+                mapping[local] = next_speaker
+                next_speaker += 1
+            sentence["speaker_id"] = mapping[local]
+        if mapping:
+            next_speaker = max(next_speaker, max(mapping.values()) + 1)
+
+        core_start = chunk["core_start"] * 1000
+        core_end = chunk["core_end"] * 1000
+        is_last = index == len(chunks) - 1
+        for sentence in shifted:
+            middle = (sentence["begin_time"] + sentence["end_time"]) / 2
+            if middle < core_start or (middle >= core_end and not is_last):
+                continue
+            if merged:
+                last = merged[-1]
+                shared = min(last["end_time"], sentence["end_time"]) - max(last["begin_time"], sentence["begin_time"])
+                shortest = min(last["end_time"] - last["begin_time"], sentence["end_time"] - sentence["begin_time"])
+                if shortest > 0 and shared > shortest / 2:
+                    continue
+            merged.append(sentence)
+
+        previous = shifted
+        previous_end_ms = int(round(chunk["end"] * 1000))
+
+    return merged
@@ -3,17 +3,22 @@
 负责从小宇宙播客平台解析和下载音频文件
 """
 
-import re
 import os
+import json
+import hashlib
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple
-import requests
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 from loguru import logger
-import librosa
-import numpy as np
+
+import http_client
+import admission
+from audio_cache import link_or_copy
+from episode_resolver import EpisodeResolver, EpisodeResolveError
+from audio_probe import probe_audio, AudioProbeError, StreamProbe
 
 
 class AudioFetchError(Exception):
@@ -26,6 +31,53 @@ class AudioQualityError(Exception):
     pass
 
 
+class StreamTee:
+    """
+    下载数据流分发：一次遍历同时写入文件、计算 SHA-256、识别容器格式并收集文件头
+
+    下载完成后无需再读取文件即可得到哈希和时长等信息（音频目录在网络存储上时尤其重要）。
+    """
+
+    def __init__(self, file=None):
+        """
+        初始化分发器
+
+        Args:
+            file: 写入的目标文件（为空时只计算哈希和收集文件头）
+        """
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.probe = StreamProbe()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        """按文件顺序写入一段数据"""
+        if self.file is not None:
+            self.file.write(chunk)
+        self.digest.update(chunk)
+        self.probe.feed(chunk)
+        self.size += len(chunk)
+
+    def result(self) -> dict:
+        """
+        获取数据流信息
+
+        Returns:
+            {file_size, sha256, format（容器格式，无法识别时为 None）, audio（probe_audio 结果，解析失败时为 None）}
+        """
+        try:
+            audio = self.probe.result()
+        except AudioProbeError as e:
+            logger.debug(f"下载数据流中的音频头解析失败: {e}")
+            audio = None
+        return {
+            "file_size": self.size,
+            "sha256": self.digest.hexdigest(),
+            "format": self.probe.format,
+            "audio": audio,
+        }
+
+
 class AudioFetcher:
     """音频获取器"""
 
@@ -44,6 +96,24 @@ class AudioFetcher:
         self.timeout = self.config.get("timeout", 30)
         self.max_retries = self.config.get("max_retries", 3)
         self.chunk_size = self.config.get("chunk_size", 8192)
+        # 分段下载：最多同时下载的分段数，以及每段的最小字节数
+        self.segment_workers = max(1, int(self.config.get("segment_workers") or 4))
+        self.min_segment_size = int(self.config.get("min_segment_mb") or 4) * 1024 * 1024
+        # 复用连接（默认使用进程内共享的连接池会话）
+        self.session = self.config.get("session") or http_client.get_session()
+        # 磁盘空间预留和总带宽限制（默认使用进程内共享的准入控制器）
+        self.admission = self.config.get("admission") or admission.get_controller()
+        # 音频质量要求（时长下限、采样率下限）
+        self.min_duration = self.config.get("min_duration") or 1.0
+        self.min_sample_rate = self.config.get("min_sample_rate") or 8000
+        # 音频内容缓存（AudioCache，为空时不使用缓存）
+        self.cache = self.config.get("audio_cache")
+        # 节目页面解析器（可传入带数据库缓存的解析器）
+        self.resolver = self.config.get("resolver") or EpisodeResolver(
+            session=self.session,
+            timeout=self.timeout,
+            user_agent=self.user_agent
+        )
 
     def extract_audio_url(self, page_url: str) -> str:
         """
@@ -58,137 +128,351 @@ class AudioFetcher:
         Raises:
             AudioFetchError: 提取失败
         """
-        logger.info(f"开始解析页面: {page_url}")
+        return self.resolve_episode(page_url)["audio_url"]
 
-        headers = {"User-Agent": self.user_agent}
+    def resolve_episode(self, page_url: str) -> dict:
+        """
+        解析节目页面，获取音频链接、标题和时长
 
+        Args:
+            page_url: 播客页面 URL
+
+        Returns:
+            {page_url, audio_url, title, duration}
+
+        Raises:
+            AudioFetchError: 解析失败
+        """
         try:
-            response = requests.get(page_url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            html_content = response.text
-        except Exception as e:
-            raise AudioFetchError(f"页面请求失败: {e}")
-
-        # 策略1: 正则匹配 .m4a 链接
-        pattern = r'https?://[^"\'\s]+\.m4a[^"\'\s]*'
-        matches = re.findall(pattern, html_content)
-        if matches:
-            audio_url = matches[0]
-            logger.info(f"策略1成功: 找到音频链接 {audio_url}")
-            return audio_url
-
-        # 策略2: BeautifulSoup 解析 audio 标签
-        soup = BeautifulSoup(html_content, 'html.parser')
-        audio_tags = soup.find_all(['audio', 'source'])
-        for tag in audio_tags:
-            src = tag.get('src')
-            if src and '.m4a' in src:
-                logger.info(f"策略2成功: 找到音频链接 {src}")
-                return src
-
-        # 策略3: 查找 JSON 数据中的音频链接
-        json_pattern = r'"enclosureUrl"\s*:\s*"([^"]+)"'
-        json_matches = re.findall(json_pattern, html_content)
-        if json_matches:
-            audio_url = json_matches[0]
-            logger.info(f"策略3成功: 找到音频链接 {audio_url}")
-            return audio_url
-
-        # 策略4: 查找其他可能的音频格式
-        other_patterns = [
-            r'https?://[^"\'\s]+\.mp3[^"\'\s]*',
-            r'https?://[^"\'\s]+\.wav[^"\'\s]*',
-        ]
-        for pattern in other_patterns:
-            matches = re.findall(pattern, html_content)
-            if matches:
-                audio_url = matches[0]
-                logger.info(f"策略4成功: 找到音频链接 {audio_url}")
-                return audio_url
-
-        raise AudioFetchError("未能从页面中提取到音频链接")
-
-    def download_audio(self, audio_url: str, save_path: str) -> Tuple[str, int]:
+            return self.resolver.resolve(page_url)
+        except EpisodeResolveError as e:
+            raise AudioFetchError(str(e))
+
+    def download_audio(self, audio_url: str, save_path: str, on_progress=None,
+                       probe: Tuple[int, str, bool] = None) -> Tuple[str, dict]:
         """
-        下载音频文件
+        下载音频文件（数据流经 StreamTee 一次遍历完成写入、哈希和文件头解析）
+
+        服务器支持 Range 请求时分段并行下载到 .part 文件，并持久化分段进度，
+        重试或中断后从已完成的字节继续；否则回退为单连接流式下载。
+        下载前按 Content-Length 预留磁盘空间（空间不足时排队等待），写入受总带宽限制。
 
         Args:
             audio_url: 音频下载链接
             save_path: 保存路径
+            on_progress: 进度回调 (已下载字节数, 总字节数)
+            probe: 已获取的 _probe 结果（为空时在下载前请求）
 
         Returns:
-            (文件路径, 文件大小)
+            (文件路径, 数据流信息)，数据流信息见 StreamTee.result
 
         Raises:
             AudioFetchError: 下载失败
+            InsufficientSpaceError: 等待磁盘空间超时
         """
-        # 检查文件是否已存在
+        # 检查文件是否已存在（读取一遍计算哈希和文件头）
         if Path(save_path).exists():
-            file_size = Path(save_path).stat().st_size
-            logger.info(f"音频文件已存在，跳过下载: {save_path}, 大小: {file_size} bytes")
-            return save_path, file_size
+            tee = StreamTee()
+            with open(save_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    tee.write(chunk)
+            logger.info(f"音频文件已存在，跳过下载: {save_path}, 大小: {tee.size} bytes")
+            return save_path, tee.result()
 
         logger.info(f"开始下载音频: {audio_url}")
 
         # 确保保存目录存在
         Path(save_path).parent.mkdir(parents=True, exist_ok=True)
 
+        # 按预计大小预留磁盘空间（大小未知时只检查保底空间）
+        probe = probe or self._probe(audio_url)
+        with self.admission.admit(save_path, probe[0], label=Path(save_path).name) as reservation:
+            for attempt in range(self.max_retries):
+                try:
+                    total_size, etag, ranges = probe or self._probe(audio_url)
+                    probe = None  # 重试时重新检查（远端文件可能已变化）
+                    if ranges and total_size:
+                        stream_info = self._download_segmented(audio_url, save_path, total_size, etag,
+                                                               on_progress, reservation=reservation)
+                    else:
+                        stream_info = self._download_stream(audio_url, save_path, on_progress,
+                                                            reservation=reservation)
+
+                    logger.info(f"下载完成: {save_path}, 大小: {stream_info['file_size']} bytes")
+
+                    # 验证下载（使用数据流信息，不再读取文件）
+                    self._validate_download(save_path, stream_info["file_size"], stream_info["format"])
+
+                    return save_path, stream_info
+
+                except Exception as e:
+                    logger.warning(f"下载失败（尝试 {attempt + 1}/{self.max_retries}）: {e}")
+                    if attempt < self.max_retries - 1:
+                        time.sleep(2 ** attempt)  # 指数退避（分段下载会从已完成的字节继续）
+                    else:
+                        raise AudioFetchError(f"下载失败（已重试 {self.max_retries} 次）: {e}")
+
+    def _probe(self, audio_url: str) -> Tuple[int, str, bool]:
+        """
+        获取远端音频的大小、ETag，并检查服务器是否支持 Range 请求
+
+        Args:
+            audio_url: 音频下载链接
+
+        Returns:
+            (文件总大小, ETag, 是否支持 Range)，请求失败或大小未知时总大小为 0
+        """
         headers = {"User-Agent": self.user_agent}
+        try:
+            response = self.session.head(audio_url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            response.raise_for_status()
+        except Exception as e:
+            logger.debug(f"HEAD 请求失败，使用单连接下载: {e}")
+            return 0, "", False
 
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(
-                    audio_url,
-                    headers=headers,
-                    stream=True,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+        return (
+            int(response.headers.get("content-length") or 0),
+            response.headers.get("etag", ""),
+            response.headers.get("accept-ranges", "").lower() == "bytes",
+        )
+
+    def _download_stream(self, audio_url: str, save_path: str, on_progress=None,
+                         reservation: admission.Reservation = None) -> str:
+        """
+        单连接流式下载（服务器不支持 Range 时使用，每次从头下载）
 
-                total_size = int(response.headers.get('content-length', 0))
+        Args:
+            audio_url: 音频下载链接
+            save_path: 保存路径
+            on_progress: 进度回调 (已下载字节数, 总字节数)
+            reservation: 磁盘空间预留（写入时扣减并限制带宽）
 
-                # 流式下载
-                with open(save_path, 'wb') as f, tqdm(
-                    total=total_size,
-                    unit='B',
-                    unit_scale=True,
-                    desc='下载音频'
-                ) as pbar:
-                    for chunk in response.iter_content(chunk_size=self.chunk_size):
-                        if chunk:
-                            f.write(chunk)
-                            pbar.update(len(chunk))
+        Returns:
+            数据流信息（见 StreamTee.result）
+        """
+        headers = {"User-Agent": self.user_agent}
+        part_path = f"{save_path}.part"
+
+        response = self.session.get(audio_url, headers=headers, stream=True, timeout=self.timeout)
+        response.raise_for_status()
+        total_size = int(response.headers.get('content-length', 0))
+
+        if reservation:
+            reservation.reset(0)
+
+        with open(part_path, 'wb') as f, tqdm(
+            total=total_size,
+            unit='B',
+            unit_scale=True,
+            desc='下载音频'
+        ) as pbar:
+            tee = StreamTee(f)
+            downloaded = 0
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    if reservation:
+                        reservation.consume(len(chunk))
+                    tee.write(chunk)
+                    pbar.update(len(chunk))
+                    downloaded += len(chunk)
+                    if on_progress:
+                        on_progress(downloaded, total_size)
+
+        os.replace(part_path, save_path)
+        return tee.result()
+
+    def _download_segmented(self, audio_url: str, save_path: str, total_size: int, etag: str,
+                            on_progress=None, reservation: admission.Reservation = None) -> str:
+        """
+        分段并行下载到 .part 文件，分段进度保存在 .part.json 中
 
-                file_size = os.path.getsize(save_path)
-                logger.info(f"下载完成: {save_path}, 大小: {file_size} bytes")
+        哈希和文件头需要按文件顺序处理：每写入一块后，把从文件开头连续完成的部分
+        送入 StreamTee（刚写入的数据通常仍在系统页缓存中），下载结束时两者也随之完成。
 
-                # 验证下载
-                self._validate_download(save_path, file_size)
+        Args:
+            audio_url: 音频下载链接
+            save_path: 保存路径
+            total_size: 文件总大小
+            etag: 服务器返回的 ETag（变化时重新下载）
+            on_progress: 进度回调 (已下载字节数, 总字节数)
+            reservation: 磁盘空间预留（写入时扣减并限制带宽）
 
-                return save_path, file_size
+        Returns:
+            数据流信息（见 StreamTee.result）
+        """
+        part_path = f"{save_path}.part"
+        map_path = f"{save_path}.part.json"
+
+        segment_map = self._load_segment_map(map_path, audio_url, total_size, etag)
+        if segment_map is None or not os.path.exists(part_path):
+            segment_count = max(1, min(self.segment_workers, total_size // self.min_segment_size))
+            segment_size = -(-total_size // segment_count)
+            segment_map = {
+                "url": audio_url,
+                "total_size": total_size,
+                "etag": etag,
+                # 每段: [起始字节, 结束字节(含), 已下载字节数]
+                "segments": [
+                    [start, min(start + segment_size, total_size) - 1, 0]
+                    for start in range(0, total_size, segment_size)
+                ],
+            }
+            with open(part_path, 'wb') as f:
+                f.truncate(total_size)
+            self._save_segment_map(map_path, segment_map)
+        else:
+            resumed = sum(segment[2] for segment in segment_map["segments"])
+            logger.info(f"从断点继续下载: 已完成 {resumed}/{total_size} bytes")
+
+        segments = segment_map["segments"]
+        if reservation:
+            reservation.reset(sum(segment[2] for segment in segments))
+        lock = threading.Lock()
+        state = {"saved_at": time.monotonic(), "hashed": 0, "hashing": False}
+        tee = StreamTee()
+        hash_reader = open(part_path, 'rb', buffering=0)
+
+        def contiguous_end() -> int:
+            """从文件开头连续下载完成的字节数（调用方持有 lock）"""
+            contiguous = 0
+            for seg_start, seg_end, seg_done in segments:
+                contiguous = seg_start + seg_done
+                if seg_start + seg_done <= seg_end:
+                    break
+            return contiguous
+
+        def advance_digest():
+            """
+            把从文件开头连续下载完成的字节送入 StreamTee（调用方不持有 lock）
+
+            lock 内只确定待处理的字节范围，读取和计算哈希在 lock 外进行，其他分段线程可以继续记录进度；
+            同一时间只有一个线程处理，其他线程发现已有线程在处理时直接返回，由该线程处理到最新位置。
+            """
+            with lock:
+                if state["hashing"]:
+                    return
+                state["hashing"] = True
+            try:
+                while True:
+                    with lock:
+                        start, end = state["hashed"], contiguous_end()
+                        if end <= start:
+                            state["hashing"] = False
+                            return
+                    hash_reader.seek(start)
+                    remaining = end - start
+                    while remaining > 0:
+                        data = hash_reader.read(min(remaining, 1024 * 1024))
+                        if not data:
+                            break
+                        tee.write(data)
+                        remaining -= len(data)
+                    with lock:
+                        state["hashed"] = end - remaining
+                    if remaining:
+                        break
+            finally:
+                with lock:
+                    state["hashing"] = False
+
+        with tqdm(
+            total=total_size,
+            initial=sum(segment[2] for segment in segments),
+            unit='B',
+            unit_scale=True,
+            desc='下载音频'
+        ) as pbar:
+
+            def download_segment(segment):
+                start, end, done = segment
+                if start + done > end:
+                    return
+                headers = {"User-Agent": self.user_agent, "Range": f"bytes={start + done}-{end}"}
+                response = self.session.get(audio_url, headers=headers, stream=True, timeout=self.timeout)
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise AudioFetchError(f"服务器未返回分段内容: HTTP {response.status_code}")
 
-            except Exception as e:
-                logger.warning(f"下载失败（尝试 {attempt + 1}/{self.max_retries}）: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)  # 指数退避
-                else:
-                    raise AudioFetchError(f"下载失败（已重试 {self.max_retries} 次）: {e}")
+                with open(part_path, 'r+b', buffering=0) as f:
+                    f.seek(start + done)
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if not chunk:
+                            continue
+                        chunk = chunk[:end + 1 - (start + segment[2])]
+                        if reservation:
+                            reservation.consume(len(chunk))
+                        f.write(chunk)
+                        with lock:
+                            segment[2] += len(chunk)
+                            catch_up = start <= state["hashed"]
+                            pbar.update(len(chunk))
+                            if on_progress:
+                                on_progress(pbar.n, total_size)
+                            # 定期持久化分段进度（写入已直接落到文件，断点不会超前于数据）
+                            if time.monotonic() - state["saved_at"] >= 1.0:
+                                self._save_segment_map(map_path, segment_map)
+                                state["saved_at"] = time.monotonic()
+                        if catch_up:
+                            advance_digest()
+                        if start + segment[2] > end:
+                            break
+
+                if start + segment[2] <= end:
+                    raise AudioFetchError(f"分段下载不完整: bytes={start}-{end}")
 
-    def _validate_download(self, file_path: str, file_size: int):
+            try:
+                with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                    for future in [executor.submit(download_segment, segment) for segment in segments]:
+                        future.result()
+                advance_digest()
+            finally:
+                hash_reader.close()
+                with lock:
+                    self._save_segment_map(map_path, segment_map)
+
+        if state["hashed"] != total_size:
+            raise AudioFetchError(f"音频校验不完整: {state['hashed']}/{total_size} bytes")
+
+        os.replace(part_path, save_path)
+        os.remove(map_path)
+        return tee.result()
+
+    def _load_segment_map(self, map_path: str, audio_url: str, total_size: int, etag: str) -> Optional[dict]:
+        """读取分段进度（链接、大小或 ETag 不一致时视为无效）"""
+        try:
+            with open(map_path, 'r', encoding='utf-8') as f:
+                segment_map = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (segment_map.get("url"), segment_map.get("total_size"), segment_map.get("etag")) != (audio_url, total_size, etag):
+            logger.info("音频已变化，重新下载")
+            return None
+        return segment_map
+
+    def _save_segment_map(self, map_path: str, segment_map: dict):
+        """保存分段进度（先写临时文件再替换）"""
+        tmp_path = f"{map_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(segment_map, f)
+        os.replace(tmp_path, map_path)
+
+    def _validate_download(self, file_path: str, file_size: int, container: Optional[str]):
         """
         验证下载的音频文件
 
         Args:
             file_path: 文件路径
             file_size: 文件大小
+            container: 根据文件开头魔数识别的容器格式（无法识别时为 None，如服务器返回了错误页面）
 
         Raises:
             AudioFetchError: 验证失败
         """
         checks = {
-            "file_exists": os.path.exists(file_path),
             "file_size": file_size > 1024 * 100,  # 至少 100KB
             "file_format": file_path.endswith(('.m4a', '.mp3', '.wav')),
+            "container": container is not None,
         }
 
         if not all(checks.values()):
@@ -196,12 +480,14 @@ class AudioFetcher:
 
         logger.debug("音频下载验证通过")
 
-    def validate_audio_quality(self, file_path: str) -> dict:
+    def validate_audio_quality(self, file_path: str, audio_info: dict = None, file_size: int = None) -> dict:
         """
         检测音频质量
 
         Args:
             file_path: 音频文件路径
+            audio_info: 下载时已解析的音频头信息（为空时读取文件头解析）
+            file_size: 已知的文件大小（为空时读取文件属性）
 
         Returns:
             质量检测结果字典
@@ -212,20 +498,29 @@ class AudioFetcher:
         logger.info(f"开始检测音频质量: {file_path}")
 
         try:
-            # 简化检测：只检查文件基本属性
-            # m4a 格式在 Windows 上 librosa 可能无法直接加载，但 faster-whisper 可以处理
-            file_size = os.path.getsize(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
 
             checks = {
-                "file_exists": os.path.exists(file_path),
                 "file_size": file_size > 1024 * 100,  # 至少 100KB
                 "file_format": file_path.endswith(('.m4a', '.mp3', '.wav')),
             }
 
+            # 只解析文件头获取时长和采样率（不解码音频）；无法解析时交给 ASR 服务处理
+            try:
+                info = audio_info or probe_audio(file_path)
+            except (AudioProbeError, OSError) as e:
+                logger.warning(f"音频头解析失败，跳过时长/采样率检测: {e}")
+                info = {"duration": 0, "sample_rate": 0, "channels": 0}
+            else:
+                checks["duration"] = info["duration"] >= self.min_duration
+                checks["sample_rate"] = info["sample_rate"] == 0 or info["sample_rate"] >= self.min_sample_rate
+
             result = {
                 "passed": all(checks.values()),
-                "duration": 0,  # 将由 Whisper 在转录时获取
-                "sample_rate": 0,
+                "duration": info["duration"],
+                "sample_rate": info["sample_rate"],
+                "channels": info["channels"],
                 "amplitude": 0,
                 "checks": checks
             }
@@ -233,7 +528,10 @@ class AudioFetcher:
             if not result["passed"]:
                 raise AudioQualityError(f"音频质量检测失败: {checks}")
 
-            logger.info(f"音频质量检测通过: 文件大小={file_size / 1024 / 1024:.1f}MB")
+            logger.info(
+                f"音频质量检测通过: 文件大小={file_size / 1024 / 1024:.1f}MB, "
+                f"时长={info['duration']:.1f}s, 采样率={info['sample_rate']}Hz, 声道={info['channels']}"
+            )
             return result
 
         except Exception as e:
@@ -241,13 +539,17 @@ class AudioFetcher:
                 raise
             raise AudioQualityError(f"音频文件无效或损坏: {e}")
 
-    def fetch(self, page_url: str, save_dir: str = "data/audio") -> Tuple[str, dict]:
+    def fetch(self, page_url: str, save_dir: str = "data/audio", on_progress=None,
+              file_stem: str = None, on_save_path=None) -> Tuple[str, dict]:
         """
         完整的音频获取流程
 
         Args:
             page_url: 播客页面 URL
             save_dir: 保存目录
+            on_progress: 下载进度回调 (已下载字节数, 总字节数)
+            file_stem: 文件名（不含扩展名），见 fetch_audio
+            on_save_path: 确定保存路径后、开始下载前的回调 (保存路径, 音频链接)
 
         Returns:
             (文件路径, 元数据字典)
@@ -256,31 +558,79 @@ class AudioFetcher:
             AudioFetchError: 获取失败
             AudioQualityError: 质量不合格
         """
-        # 1. 提取音频链接
-        audio_url = self.extract_audio_url(page_url)
+        # 1. 解析页面（音频链接、标题、时长）
+        episode = self.resolve_episode(page_url)
 
-        # 2. 生成保存路径
-        file_ext = audio_url.split('.')[-1].split('?')[0]
-        if file_ext not in ['m4a', 'mp3', 'wav']:
-            file_ext = 'm4a'
+        # 2. 下载音频
+        return self.fetch_audio(episode["audio_url"], save_dir, on_progress=on_progress, episode=episode,
+                                file_stem=file_stem, on_save_path=on_save_path)
 
-        timestamp = int(time.time())
-        filename = f"podcast_{timestamp}.{file_ext}"
-        save_path = os.path.join(save_dir, filename)
+    def fetch_audio(self, audio_url: str, save_dir: str = "data/audio", on_progress=None,
+                    episode: dict = None, file_stem: str = None, on_save_path=None) -> Tuple[str, dict]:
+        """
+        按音频地址获取音频（已知音频地址时跳过页面解析，如订阅源中的 enclosure）
 
-        # 3. 下载音频
-        file_path, file_size = self.download_audio(audio_url, save_path)
+        保存路径对同一播客（或同一音频链接）固定不变，中断后再次获取时找到同一个 .part 文件和分段进度继续下载，
+        不同节目同时下载也不会共用文件。
 
-        # 4. 质量检测
-        quality_info = self.validate_audio_quality(file_path)
+        Args:
+            audio_url: 音频下载链接
+            save_dir: 保存目录
+            on_progress: 下载进度回调 (已下载字节数, 总字节数)
+            episode: 页面解析结果（标题、时长），可为空
+            file_stem: 文件名（不含扩展名，如 podcast_{播客 ID}），为空时按音频链接的哈希生成
+            on_save_path: 确定保存路径后、开始下载前的回调 (保存路径, 音频链接)，用于记录检查点
+
+        Returns:
+            (文件路径, 元数据字典)
+
+        Raises:
+            AudioFetchError: 获取失败
+            AudioQualityError: 质量不合格
+        """
+        episode = episode or {}
+
+        # 1. 生成保存路径
+        file_ext = audio_url.split('.')[-1].split('?')[0]
+        if file_ext not in ['m4a', 'mp3', 'wav']:
+            file_ext = 'm4a'
 
-        # 5. 返回元数据
+        if not file_stem:
+            file_stem = f"podcast_{hashlib.sha256(audio_url.encode('utf-8')).hexdigest()[:16]}"
+        save_path = os.path.join(save_dir, f"{file_stem}.{file_ext}")
+        if on_save_path:
+            on_save_path(save_path, audio_url)
+
+        # 2. 命中缓存时直接复用，否则下载并加入缓存
+        probe = self._probe(audio_url)
+        cached = self.cache.lookup(audio_url, etag=probe[1], size=probe[0]) if self.cache else None
+        if cached:
+            logger.info(f"音频缓存命中，跳过下载: {cached['path']}")
+            link_or_copy(cached["path"], save_path)
+            file_path, file_size, sha256, audio_info = save_path, cached["size"], cached["sha256"], None
+            if on_progress:
+                on_progress(file_size, file_size)
+        else:
+            file_path, stream_info = self.download_audio(audio_url, save_path, on_progress=on_progress,
+                                                         probe=probe)
+            file_size, sha256, audio_info = stream_info["file_size"], stream_info["sha256"], stream_info["audio"]
+            if self.cache:
+                self.cache.store(audio_url, probe[1], file_path, sha256, size=file_size)
+
+        # 3. 质量检测（下载时已解析文件头的不再读取文件）
+        quality_info = self.validate_audio_quality(file_path, audio_info=audio_info, file_size=file_size)
+
+        # 4. 返回元数据
         metadata = {
             "file_path": file_path,
             "file_size": file_size,
             "audio_url": audio_url,
-            "duration": quality_info["duration"],
+            "sha256": sha256,
+            "cached": bool(cached),
+            "title": episode.get("title", ""),
+            "duration": quality_info["duration"] or episode.get("duration", 0),
             "sample_rate": quality_info["sample_rate"],
+            "channels": quality_info["channels"],
         }
 
         logger.info(f"音频获取完成: {file_path}")
@@ -0,0 +1,386 @@
+"""
+音频头信息解析模块
+只读取文件头和少量元数据（MP4/M4A 的 moov/mvhd、MP3 的 ID3/Xing/VBRI、WAV 的 fmt/data），
+不解码音频即可得到时长、采样率和声道数；
+下载时也可以用 StreamProbe 边接收数据边收集所需的文件头，无需再读取文件
+"""
+
+import io
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+
+class AudioProbeError(Exception):
+    """音频头解析异常"""
+    pass
+
+
+def probe_audio(file_path: str) -> Dict[str, Any]:
+    """
+    解析音频文件头
+
+    Args:
+        file_path: 音频文件路径（.m4a/.mp4/.mp3/.wav）
+
+    Returns:
+        {format, duration（秒）, sample_rate, channels, bitrate（bps，未知时为 0）}
+
+    Raises:
+        AudioProbeError: 格式不支持或文件头损坏
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(12)
+        container = sniff_format(head)
+        if not container:
+            suffix = Path(file_path).suffix.lower()
+            raise AudioProbeError(f"无法识别的音频格式: {suffix or head[:8]!r}")
+        return _probe(container, f, os.fstat(f.fileno()).st_size)
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """
+    根据文件开头的魔数判断容器格式
+
+    Args:
+        head: 文件开头至少 12 个字节
+
+    Returns:
+        mp4/mp3/wav，无法识别时返回 None
+    """
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return "wav"
+    if head[4:8] in (b'ftyp', b'moov', b'free', b'mdat', b'wide', b'skip'):
+        return "mp4"
+    if head[:3] == b'ID3' or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def _probe(container: str, f: BinaryIO, file_size: int) -> Dict[str, Any]:
+    """按容器格式解析文件头（截断的文件头统一转换为 AudioProbeError）"""
+    probe = {"mp4": _probe_mp4, "mp3": _probe_mp3, "wav": _probe_wav}[container]
+    try:
+        return probe(f, file_size)
+    except (struct.error, IndexError) as e:
+        raise AudioProbeError(f"音频文件头不完整: {e}")
+
+
+class StreamProbe:
+    """
+    流式文件头收集器：按顺序接收下载的数据块，只保留解析所需的部分
+
+    MP3/WAV 的信息在文件开头，保留前 head_limit 字节；
+    MP4 的 moov 可能在文件末尾（mdat 之后），按顶层 box 边界跳过其他 box，只截取 moov。
+    """
+
+    def __init__(self, head_limit: int = 4 * 1024 * 1024, moov_limit: int = 64 * 1024 * 1024):
+        """
+        初始化收集器
+
+        Args:
+            head_limit: 保留的文件开头字节数（MP3 的 ID3 标签可能包含封面图片）
+            moov_limit: moov box 的最大截取字节数，超出时放弃
+        """
+        self.head_limit = head_limit
+        self.moov_limit = moov_limit
+        self.format: Optional[str] = None
+        self.size = 0
+
+        self._head = bytearray()
+        self._box_at = 0           # 下一个顶层 box 的起始位置
+        self._box_header = b''     # 跨数据块的 box 头
+        self._moov: Optional[bytearray] = None
+        self._moov_end = 0
+        self._moov_complete = False
+        self._scanning = True
+
+    def feed(self, chunk: bytes):
+        """
+        接收下一段数据（必须按文件顺序）
+
+        Args:
+            chunk: 数据块
+        """
+        position = self.size
+        self.size += len(chunk)
+
+        if len(self._head) < self.head_limit:
+            self._head += chunk[:self.head_limit - len(self._head)]
+        if self.format is None and len(self._head) >= 12:
+            self.format = sniff_format(bytes(self._head[:12]))
+            if self.format != "mp4":
+                self._scanning = False
+        if self._scanning:
+            self._scan_mp4(chunk, position)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        解析收集到的文件头（需在全部数据接收完后调用）
+
+        Returns:
+            与 probe_audio 相同的字典
+
+        Raises:
+            AudioProbeError: 格式不支持或所需的文件头不完整
+        """
+        if not self.format:
+            raise AudioProbeError(f"无法识别的音频格式: {bytes(self._head[:8])!r}")
+        if self.format == "mp4":
+            if not self._moov_complete:
+                raise AudioProbeError("MP4 缺少 moov box 或 moov 不完整")
+            return _probe("mp4", io.BytesIO(bytes(self._moov)), self.size)
+        return _probe(self.format, io.BytesIO(bytes(self._head)), self.size)
+
+    def _scan_mp4(self, chunk: bytes, position: int):
+        """沿顶层 box 边界扫描数据块，截取 moov box"""
+        index, length = 0, len(chunk)
+        while index < length and self._scanning:
+            offset = position + index
+
+            if self._moov is not None:
+                # 正在截取 moov
+                take = min(length - index, self._moov_end - offset)
+                self._moov += chunk[index:index + take]
+                index += take
+                if offset + take >= self._moov_end:
+                    self._moov_complete = True
+                    self._scanning = False
+                continue
+
+            if offset < self._box_at:
+                # 跳过其他 box 的内容
+                index = min(length, self._box_at - position)
+                continue
+
+            # 读取 box 头（可能跨数据块，最多 16 字节）
+            needed = 16 - len(self._box_header)
+            taken = chunk[index:index + needed]
+            self._box_header += taken
+            index += len(taken)
+            if len(self._box_header) < 8:
+                continue
+            size, box_type = struct.unpack('>I4s', self._box_header[:8])
+            header_size = 8
+            if size == 1:
+                if len(self._box_header) < 16:
+                    continue
+                size = struct.unpack('>Q', self._box_header[8:16])[0]
+                header_size = 16
+            # 多读的字节属于 box 内容，退回到当前数据块
+            index -= len(self._box_header) - header_size
+            header = self._box_header[:header_size]
+            self._box_header = b''
+
+            if size < header_size or (box_type == b'moov' and size > self.moov_limit):
+                # 大小为 0（延伸到文件末尾）或无效的 box、过大的 moov：停止扫描
+                self._scanning = False
+            elif box_type == b'moov':
+                self._moov = bytearray(header)
+                self._moov_end = self._box_at + size
+            self._box_at += size
+
+
+# ==================== MP4 / M4A ====================
+
+def _iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """遍历 [start, end) 范围内的 box，返回 (类型, 内容起始位置, box 结束位置)"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            raise AudioProbeError(f"MP4 box 大小无效: {box_type!r}")
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def _find_box(f: BinaryIO, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    """查找子 box，返回 (内容起始位置, 结束位置)"""
+    for found_type, body_start, box_end in _iter_boxes(f, start, end):
+        if found_type == box_type:
+            return body_start, box_end
+    return None
+
+
+def _probe_mp4(f: BinaryIO, file_size: int) -> Dict[str, Any]:
+    """解析 MP4/M4A：moov/mvhd 得到时长，音频轨道的 stsd 得到采样率和声道数"""
+    moov = _find_box(f, 0, file_size, b'moov')
+    if not moov:
+        raise AudioProbeError("MP4 缺少 moov box")
+
+    mvhd = _find_box(f, *moov, b'mvhd')
+    if not mvhd:
+        raise AudioProbeError("MP4 缺少 mvhd box")
+    f.seek(mvhd[0])
+    version = f.read(1)[0]
+    if version == 1:
+        f.seek(mvhd[0] + 20)
+        timescale, duration = struct.unpack('>IQ', f.read(12))
+    else:
+        f.seek(mvhd[0] + 12)
+        timescale, duration = struct.unpack('>II', f.read(8))
+    if not timescale:
+        raise AudioProbeError("MP4 mvhd timescale 为 0")
+
+    sample_rate, channels = 0, 0
+    for box_type, body_start, box_end in _iter_boxes(f, *moov):
+        if box_type != b'trak':
+            continue
+        mdia = _find_box(f, body_start, box_end, b'mdia')
+        hdlr = mdia and _find_box(f, *mdia, b'hdlr')
+        if not hdlr:
+            continue
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b'soun':
+            continue
+
+        minf = _find_box(f, *mdia, b'minf')
+        stbl = minf and _find_box(f, *minf, b'stbl')
+        stsd = stbl and _find_box(f, *stbl, b'stsd')
+        if stsd:
+            # stsd: version/flags(4) + entry_count(4) + 第一个音频采样描述
+            # 采样描述: size(4) type(4) reserved(6) data_ref(2) version(2) revision(2) vendor(4)
+            #           channels(2) sample_size(2) compression_id(2) packet_size(2) sample_rate(16.16)
+            f.seek(stsd[0] + 8 + 24)
+            channels, _, _, _, rate_fixed = struct.unpack('>HHHHI', f.read(12))
+            sample_rate = rate_fixed >> 16
+        break
+
+    return {
+        "format": "mp4",
+        "duration": duration / timescale,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bitrate": int(file_size * 8 * timescale / duration) if duration else 0,
+    }
+
+
+# ==================== MP3 ====================
+
+# MPEG 版本 → 采样率表
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),   # MPEG-1
+    2: (22050, 24000, 16000),   # MPEG-2
+    0: (11025, 12000, 8000),    # MPEG-2.5
+}
+
+# (MPEG-1?, layer) → 码率表（kbps）
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+def _skip_id3(f: BinaryIO) -> int:
+    """跳过 ID3v2 标签，返回第一个音频帧的搜索起点"""
+    f.seek(0)
+    header = f.read(10)
+    if header[:3] != b'ID3' or len(header) < 10:
+        return 0
+    # 标签大小为 syncsafe 整数（每字节 7 位）
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _probe_mp3(f: BinaryIO, file_size: int) -> Dict[str, Any]:
+    """解析 MP3：第一个帧头得到采样率和声道，Xing/Info 或 VBRI 头得到帧数，否则按 CBR 估算"""
+    start = _skip_id3(f)
+    f.seek(start)
+    data = f.read(64 * 1024)
+
+    for index in range(len(data) - 4):
+        if data[index] != 0xFF or data[index + 1] & 0xE0 != 0xE0:
+            continue
+        header = struct.unpack('>I', data[index:index + 4])[0]
+        version = (header >> 19) & 0x3
+        layer = 4 - ((header >> 17) & 0x3)
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        break
+    else:
+        raise AudioProbeError("未找到 MP3 帧头")
+
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    channel_mode = (header >> 6) & 0x3
+    channels = 1 if channel_mode == 3 else 2
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or mpeg1 else 576)
+    audio_start = start + index
+
+    frames = None
+    # Xing/Info 头位于 side info 之后
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = index + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack('>I', data[xing + 8:xing + 12])[0]
+    # VBRI 头固定位于帧头后 32 字节
+    vbri = index + 4 + 32
+    if frames is None and data[vbri:vbri + 4] == b'VBRI':
+        frames = struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+    elif bitrate:
+        duration = (file_size - audio_start) * 8 / bitrate
+    else:
+        raise AudioProbeError("MP3 码率未知，无法计算时长")
+
+    return {
+        "format": "mp3",
+        "duration": duration,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bitrate": int((file_size - audio_start) * 8 / duration) if frames and duration else bitrate,
+    }
+
+
+# ==================== WAV ====================
+
+def _probe_wav(f: BinaryIO, file_size: int) -> Dict[str, Any]:
+    """解析 WAV：fmt 块得到采样率、声道和字节率，data 块大小除以字节率得到时长"""
+    channels = sample_rate = byte_rate = 0
+    data_size = None
+
+    offset = 12
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'fmt ':
+            _, channels, sample_rate, byte_rate = struct.unpack('<HHII', f.read(12))
+        elif chunk_id == b'data':
+            # 流式写入的 WAV 可能没有回填 data 大小
+            data_size = min(chunk_size, file_size - offset - 8)
+            break
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    if not byte_rate or data_size is None:
+        raise AudioProbeError("WAV 缺少 fmt 或 data 块")
+
+    return {
+        "format": "wav",
+        "duration": data_size / byte_rate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bitrate": byte_rate * 8,
+    }
@@ -70,6 +70,9 @@ class Config:
             'HF_TOKEN': [
                 ['diarization', 'hf_token']
             ],
+            'MEDIA_URL_SECRET': [
+                ['media', 'secret']
+            ],
         }
 
         # 从环境变量读取并覆盖配置
@@ -4,6 +4,9 @@
 """
 
 import sqlite3
+import json
+import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -25,14 +28,19 @@ class Database:
         # 确保数据库目录存在
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self.conn = None
+        # 连接在多个线程间共享，所有写入都持有此锁（其他线程的提交不会混入任务认领等事务）
+        self._lock = threading.RLock()
         self._connect()
         self._init_tables()
 
     def _connect(self):
         """建立数据库连接"""
         try:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
             self.conn.row_factory = sqlite3.Row  # 返回字典格式
+            # WAL 模式允许多个进程（Web + 独立 worker）同时读写
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA busy_timeout=30000")
             logger.info(f"数据库连接成功: {self.db_path}")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
@@ -118,6 +126,102 @@ class Database:
             )
         """)
 
+        # 流水线检查点表（每个阶段的产出，用于崩溃后断点续传）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                podcast_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (podcast_id, stage),
+                FOREIGN KEY (podcast_id) REFERENCES podcasts(id) ON DELETE CASCADE
+            )
+        """)
+
+        # 产物构建记录表（输入哈希未变化的产物无需重建）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                podcast_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                path TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                output_hash TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (podcast_id, name),
+                FOREIGN KEY (podcast_id) REFERENCES podcasts(id) ON DELETE CASCADE
+            )
+        """)
+
+        # 音频缓存表（音频链接 + ETag + 大小 → 按内容寻址的缓存文件）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS audio_cache (
+                audio_url TEXT PRIMARY KEY,
+                etag TEXT DEFAULT '',
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # 节目页面解析缓存表（页面 URL → 音频链接、标题、时长，按 TTL 失效）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS resolved_pages (
+                page_url TEXT PRIMARY KEY,
+                audio_url TEXT NOT NULL,
+                title TEXT DEFAULT '',
+                duration INTEGER DEFAULT 0,
+                resolved_at REAL NOT NULL
+            )
+        """)
+
+        # ASR 结果缓存表（音频内容 + 模型 + 识别参数 → 压缩的原始结果文件，按最近使用时间淘汰）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS asr_cache (
+                cache_key TEXT PRIMARY KEY,
+                audio_sha256 TEXT NOT NULL,
+                model TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                hits INTEGER DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_asr_cache_last_used ON asr_cache(last_used_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_asr_cache_audio ON asr_cache(audio_sha256)")
+
+        # 订阅源表（RSS/Atom，按条件 GET 定期检查更新）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feeds (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT DEFAULT '',
+                category TEXT DEFAULT '',
+                etag TEXT DEFAULT '',
+                last_modified TEXT DEFAULT '',
+                last_checked_at REAL,
+                error_message TEXT DEFAULT '',
+                enabled BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # 订阅源条目表（已见过的 GUID，保证每期节目只入队一次）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_items (
+                feed_id TEXT NOT NULL,
+                guid TEXT NOT NULL,
+                title TEXT DEFAULT '',
+                enclosure_url TEXT DEFAULT '',
+                podcast_id TEXT,
+                published_at TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (feed_id, guid),
+                FOREIGN KEY (feed_id) REFERENCES feeds(id) ON DELETE CASCADE
+            )
+        """)
+
         # 检查并添加 has_diarization 字段到 transcripts 表
         cursor.execute("PRAGMA table_info(transcripts)")
         columns = [col[1] for col in cursor.fetchall()]
@@ -163,6 +267,56 @@ class Database:
             """)
             logger.info("添加 audio_file_path 字段到 podcasts 表")
 
+        # 检查并添加 audio_sha256 字段到 podcasts 表（音频内容哈希，相同音频复用转录结果）
+        cursor.execute("PRAGMA table_info(podcasts)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if 'audio_sha256' not in columns:
+            cursor.execute("""
+                ALTER TABLE podcasts ADD COLUMN audio_sha256 TEXT DEFAULT ''
+            """)
+            logger.info("添加 audio_sha256 字段到 podcasts 表")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_podcasts_audio_sha256 ON podcasts(audio_sha256)")
+
+        # 检查并添加音频头信息字段到 podcasts 表（下载后解析文件头得到）
+        cursor.execute("PRAGMA table_info(podcasts)")
+        columns = [col[1] for col in cursor.fetchall()]
+        for column in ('sample_rate', 'channels'):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE podcasts ADD COLUMN {column} INTEGER DEFAULT 0")
+                logger.info(f"添加 {column} 字段到 podcasts 表")
+
+        # 检查并添加 last_used_at 字段到 audio_cache 表（按最近使用时间淘汰缓存）
+        cursor.execute("PRAGMA table_info(audio_cache)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if 'last_used_at' not in columns:
+            cursor.execute("ALTER TABLE audio_cache ADD COLUMN last_used_at REAL DEFAULT 0")
+            logger.info("添加 last_used_at 字段到 audio_cache 表")
+
+        # 检查并添加 paragraph_gap 字段到 podcasts 表（重新分段时指定的段落间隔，为空时使用配置值）
+        cursor.execute("PRAGMA table_info(podcasts)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if 'paragraph_gap' not in columns:
+            cursor.execute("ALTER TABLE podcasts ADD COLUMN paragraph_gap REAL")
+            logger.info("添加 paragraph_gap 字段到 podcasts 表")
+
+        # 检查并添加任务队列所需字段到 tasks 表
+        cursor.execute("PRAGMA table_info(tasks)")
+        columns = [col[1] for col in cursor.fetchall()]
+        task_columns = {
+            'payload': "TEXT DEFAULT ''",
+            'error_message': "TEXT DEFAULT ''",
+            'attempts': "INTEGER DEFAULT 0",
+            'lease_owner': "TEXT",
+            'lease_expires_at': "REAL",
+            'heartbeat_at': "REAL",
+            'stage': "TEXT DEFAULT ''",
+            'detail': "TEXT DEFAULT ''",
+        }
+        for column, definition in task_columns.items():
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE tasks ADD COLUMN {column} {definition}")
+                logger.info(f"添加 {column} 字段到 tasks 表")
+
         self.conn.commit()
         logger.info("数据库表初始化完成")
 
@@ -180,12 +334,13 @@ class Database:
             podcast_id: 播客 ID
         """
         podcast_id = str(uuid.uuid4())
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO podcasts (id, title, url, status)
-            VALUES (?, ?, ?, ?)
-        """, (podcast_id, title or "未命名播客", url, "pending"))
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO podcasts (id, title, url, status)
+                VALUES (?, ?, ?, ?)
+            """, (podcast_id, title or "未命名播客", url, "pending"))
+            self.conn.commit()
         logger.info(f"创建播客记录: {podcast_id}")
         return podcast_id
 
@@ -218,9 +373,10 @@ class Database:
         fields = ", ".join([f"{k} = ?" for k in kwargs.keys()])
         values = list(kwargs.values()) + [podcast_id]
 
-        cursor = self.conn.cursor()
-        cursor.execute(f"UPDATE podcasts SET {fields} WHERE id = ?", values)
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(f"UPDATE podcasts SET {fields} WHERE id = ?", values)
+            self.conn.commit()
         logger.debug(f"更新播客 {podcast_id}: {kwargs}")
 
     def list_podcasts(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
@@ -261,28 +417,33 @@ class Database:
         Returns:
             是否删除成功
         """
-        try:
-            cursor = self.conn.cursor()
+        with self._lock:
+            try:
+                cursor = self.conn.cursor()
 
-            # 删除转录记录
-            cursor.execute("DELETE FROM transcripts WHERE podcast_id = ?", (podcast_id,))
+                # 删除转录记录
+                cursor.execute("DELETE FROM transcripts WHERE podcast_id = ?", (podcast_id,))
 
-            # 删除笔记记录
-            cursor.execute("DELETE FROM notes WHERE podcast_id = ?", (podcast_id,))
+                # 删除笔记记录
+                cursor.execute("DELETE FROM notes WHERE podcast_id = ?", (podcast_id,))
 
-            # 删除任务记录
-            cursor.execute("DELETE FROM tasks WHERE podcast_id = ?", (podcast_id,))
+                # 删除任务记录
+                cursor.execute("DELETE FROM tasks WHERE podcast_id = ?", (podcast_id,))
 
-            # 删除播客记录
-            cursor.execute("DELETE FROM podcasts WHERE id = ?", (podcast_id,))
+                # 删除检查点和产物记录
+                cursor.execute("DELETE FROM checkpoints WHERE podcast_id = ?", (podcast_id,))
+                cursor.execute("DELETE FROM artifacts WHERE podcast_id = ?", (podcast_id,))
 
-            self.conn.commit()
-            logger.info(f"删除播客记录: {podcast_id}")
-            return True
-        except Exception as e:
-            logger.error(f"删除播客失败: {e}")
-            self.conn.rollback()
-            return False
+                # 删除播客记录
+                cursor.execute("DELETE FROM podcasts WHERE id = ?", (podcast_id,))
+
+                self.conn.commit()
+                logger.info(f"删除播客记录: {podcast_id}")
+                return True
+            except Exception as e:
+                logger.error(f"删除播客失败: {e}")
+                self.conn.rollback()
+                return False
 
     def delete_podcasts_batch(self, podcast_ids: List[str]) -> int:
         """
@@ -308,26 +469,29 @@ class Database:
         Returns:
             删除的播客数量
         """
-        try:
-            cursor = self.conn.cursor()
-
-            # 获取所有播客 ID
-            cursor.execute("SELECT id FROM podcasts")
-            podcast_ids = [row[0] for row in cursor.fetchall()]
-
-            # 删除所有记录
-            cursor.execute("DELETE FROM transcripts")
-            cursor.execute("DELETE FROM notes")
-            cursor.execute("DELETE FROM tasks")
-            cursor.execute("DELETE FROM podcasts")
-
-            self.conn.commit()
-            logger.info(f"清空所有播客: {len(podcast_ids)} 条记录")
-            return len(podcast_ids)
-        except Exception as e:
-            logger.error(f"清空播客失败: {e}")
-            self.conn.rollback()
-            return 0
+        with self._lock:
+            try:
+                cursor = self.conn.cursor()
+
+                # 获取所有播客 ID
+                cursor.execute("SELECT id FROM podcasts")
+                podcast_ids = [row[0] for row in cursor.fetchall()]
+
+                # 删除所有记录
+                cursor.execute("DELETE FROM transcripts")
+                cursor.execute("DELETE FROM notes")
+                cursor.execute("DELETE FROM tasks")
+                cursor.execute("DELETE FROM checkpoints")
+                cursor.execute("DELETE FROM artifacts")
+                cursor.execute("DELETE FROM podcasts")
+
+                self.conn.commit()
+                logger.info(f"清空所有播客: {len(podcast_ids)} 条记录")
+                return len(podcast_ids)
+            except Exception as e:
+                logger.error(f"清空播客失败: {e}")
+                self.conn.rollback()
+                return 0
 
     # ==================== 转录相关操作 ====================
 
@@ -345,15 +509,58 @@ class Database:
         Returns:
             transcript_id: 转录记录 ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO transcripts (podcast_id, file_path, word_count, model_version)
-            VALUES (?, ?, ?, ?)
-        """, (podcast_id, file_path, word_count, model_version))
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO transcripts (podcast_id, file_path, word_count, model_version)
+                VALUES (?, ?, ?, ?)
+            """, (podcast_id, file_path, word_count, model_version))
+            self.conn.commit()
         logger.info(f"创建转录记录: podcast_id={podcast_id}")
         return cursor.lastrowid
 
+    def upsert_transcript(self, podcast_id: str, file_path: str,
+                          word_count: int = 0, model_version: str = "") -> int:
+        """
+        更新播客最新的转录记录，不存在时创建（重复执行流水线不会产生重复记录）
+
+        Args:
+            podcast_id: 播客 ID
+            file_path: 转录文件路径
+            word_count: 字数统计
+            model_version: 模型版本
+
+        Returns:
+            transcript_id: 转录记录 ID
+        """
+        existing = self.get_transcript(podcast_id)
+        if not existing:
+            return self.create_transcript(podcast_id, file_path, word_count, model_version)
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE transcripts
+                SET file_path = ?, word_count = ?, model_version = ?
+                WHERE id = ?
+            """, (file_path, word_count, model_version, existing['id']))
+            self.conn.commit()
+        logger.info(f"更新转录记录: podcast_id={podcast_id}")
+        return existing['id']
+
+    def update_transcript_path(self, transcript_id: int, file_path: str):
+        """
+        更新转录记录的文件路径（文件移动或重命名后调用）
+
+        Args:
+            transcript_id: 转录记录 ID
+            file_path: 新的文件路径
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("UPDATE transcripts SET file_path = ? WHERE id = ?", (file_path, transcript_id))
+            self.conn.commit()
+
     def get_transcript(self, podcast_id: str) -> Optional[Dict[str, Any]]:
         """
         获取播客的转录记录
@@ -408,15 +615,29 @@ class Database:
         Returns:
             note_id: 笔记记录 ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO notes (podcast_id, note_type, file_path, model_name)
-            VALUES (?, ?, ?, ?)
-        """, (podcast_id, note_type, file_path, model_name))
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO notes (podcast_id, note_type, file_path, model_name)
+                VALUES (?, ?, ?, ?)
+            """, (podcast_id, note_type, file_path, model_name))
+            self.conn.commit()
         logger.info(f"创建笔记记录: podcast_id={podcast_id}, type={note_type}")
         return cursor.lastrowid
 
+    def update_note_path(self, note_id: int, file_path: str):
+        """
+        更新笔记记录的文件路径（文件移动或重命名后调用）
+
+        Args:
+            note_id: 笔记记录 ID
+            file_path: 新的文件路径
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("UPDATE notes SET file_path = ? WHERE id = ?", (file_path, note_id))
+            self.conn.commit()
+
     def get_notes(self, podcast_id: str) -> List[Dict[str, Any]]:
         """
         获取播客的所有笔记
@@ -457,41 +678,46 @@ class Database:
         Returns:
             是否删除成功
         """
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-            self.conn.commit()
-            logger.info(f"删除笔记记录: note_id={note_id}, affected={cursor.rowcount}")
-            return cursor.rowcount > 0
-        except Exception as e:
-            logger.error(f"删除笔记记录失败: {e}")
-            self.conn.rollback()
-            return False
+        with self._lock:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                self.conn.commit()
+                logger.info(f"删除笔记记录: note_id={note_id}, affected={cursor.rowcount}")
+                return cursor.rowcount > 0
+            except Exception as e:
+                logger.error(f"删除笔记记录失败: {e}")
+                self.conn.rollback()
+                return False
 
     # ==================== 任务相关操作 ====================
 
-    def create_task(self, podcast_id: str, task_type: str) -> str:
+    def create_task(self, podcast_id: str, task_type: str, payload: dict = None) -> str:
         """
         创建任务记录
 
         Args:
             podcast_id: 播客 ID
-            task_type: 任务类型（download/transcribe/analyze）
+            task_type: 任务类型（podcast/documentary/download/transcribe/analyze）
+            payload: 任务参数（JSON 序列化后保存）
 
         Returns:
             task_id: 任务 ID
         """
         task_id = str(uuid.uuid4())
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO tasks (id, podcast_id, task_type, status)
-            VALUES (?, ?, ?, ?)
-        """, (task_id, podcast_id, task_type, "pending"))
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO tasks (id, podcast_id, task_type, status, payload)
+                VALUES (?, ?, ?, ?, ?)
+            """, (task_id, podcast_id, task_type, "pending",
+                  json.dumps(payload or {}, ensure_ascii=False)))
+            self.conn.commit()
         logger.info(f"创建任务: {task_id}, type={task_type}")
         return task_id
 
-    def update_task(self, task_id: str, status: str = None, progress: int = None):
+    def update_task(self, task_id: str, status: str = None, progress: int = None,
+                    error_message: str = None, stage: str = None, detail: dict = None):
         """
         更新任务状态
 
@@ -499,6 +725,9 @@ class Database:
             task_id: 任务 ID
             status: 任务状态
             progress: 进度百分比
+            error_message: 错误信息
+            stage: 当前阶段（fetch/download/transcribe/render）
+            detail: 阶段详情（已下载字节数、ASR 任务状态等）
         """
         updates = []
         values = []
@@ -509,6 +738,15 @@ class Database:
         if progress is not None:
             updates.append("progress = ?")
             values.append(progress)
+        if error_message is not None:
+            updates.append("error_message = ?")
+            values.append(error_message)
+        if stage is not None:
+            updates.append("stage = ?")
+            values.append(stage)
+        if detail is not None:
+            updates.append("detail = ?")
+            values.append(json.dumps(detail, ensure_ascii=False))
 
         if not updates:
             return
@@ -517,11 +755,12 @@ class Database:
         values.append(datetime.now().isoformat())
         values.append(task_id)
 
-        cursor = self.conn.cursor()
-        cursor.execute(f"""
-            UPDATE tasks SET {', '.join(updates)} WHERE id = ?
-        """, values)
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                UPDATE tasks SET {', '.join(updates)} WHERE id = ?
+            """, values)
+            self.conn.commit()
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -536,8 +775,672 @@ class Database:
         cursor = self.conn.cursor()
         cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
         row = cursor.fetchone()
+        return self._task_row_to_dict(row) if row else None
+
+    def get_tasks_by_podcast(self, podcast_id: str) -> List[Dict[str, Any]]:
+        """
+        获取播客的所有任务
+
+        Args:
+            podcast_id: 播客 ID
+
+        Returns:
+            任务列表（最新的在前）
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT * FROM tasks
+            WHERE podcast_id = ?
+            ORDER BY created_at DESC
+        """, (podcast_id,))
+        return [self._task_row_to_dict(row) for row in cursor.fetchall()]
+
+    def get_tasks(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量获取任务信息
+
+        Args:
+            task_ids: 任务 ID 列表
+
+        Returns:
+            任务列表
+        """
+        if not task_ids:
+            return []
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM tasks WHERE id IN ({', '.join('?' for _ in task_ids)})",
+            list(task_ids)
+        )
+        return [self._task_row_to_dict(row) for row in cursor.fetchall()]
+
+    def get_active_tasks(self) -> List[Dict[str, Any]]:
+        """
+        获取所有未结束（pending/running）的任务
+
+        Returns:
+            任务列表
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT * FROM tasks
+            WHERE status IN ('pending', 'running')
+            ORDER BY created_at
+        """)
+        return [self._task_row_to_dict(row) for row in cursor.fetchall()]
+
+    def claim_next_task(self, task_types: List[str] = None, worker_id: str = None,
+                        lease_seconds: float = 60, max_attempts: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        原子地认领下一个任务并加租约（pending -> running）
+
+        租约过期（持有者崩溃或失联）的 running 任务会被重新认领；
+        已达最大尝试次数的过期任务标记为失败。
+        使用 BEGIN IMMEDIATE 保证多个进程/主机同时认领时不会重复（进程内各线程的写入都持有 self._lock，
+        不会在认领事务中途提交）；最后的更新仍检查任务状态和租约，未更新到任务时视为未认领。
+
+        Args:
+            task_types: 只认领这些类型的任务，None 表示不限
+            worker_id: 认领者标识
+            lease_seconds: 租约时长（秒），持有者需在到期前续约
+            max_attempts: 最大尝试次数
+
+        Returns:
+            被认领的任务，没有可认领的任务时返回 None
+        """
+        now = time.time()
+        type_filter = ""
+        type_params: List[Any] = []
+        if task_types:
+            type_filter = f" AND task_type IN ({', '.join('?' for _ in task_types)})"
+            type_params = list(task_types)
+
+        with self._lock:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(f"""
+                    UPDATE tasks
+                    SET status = 'failed', error_message = ?, lease_owner = NULL,
+                        lease_expires_at = NULL, updated_at = ?
+                    WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?{type_filter}
+                """, ["任务租约过期且已达最大尝试次数", datetime.now().isoformat(), now, max_attempts]
+                    + type_params)
+
+                cursor.execute(f"""
+                    SELECT id FROM tasks
+                    WHERE (status = 'pending' OR (status = 'running' AND lease_expires_at < ?)){type_filter}
+                    ORDER BY created_at, rowid LIMIT 1
+                """, [now] + type_params)
+                row = cursor.fetchone()
+                if not row:
+                    self.conn.commit()
+                    return None
+
+                cursor.execute("""
+                    UPDATE tasks
+                    SET status = 'running', attempts = attempts + 1, lease_owner = ?,
+                        lease_expires_at = ?, heartbeat_at = ?, updated_at = ?
+                    WHERE id = ? AND (status = 'pending' OR (status = 'running' AND lease_expires_at < ?))
+                """, (worker_id, now + lease_seconds, now, datetime.now().isoformat(), row[0], now))
+                claimed = cursor.rowcount == 1
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+        if not claimed:
+            return None
+        return self.get_task(row[0])
+
+    def heartbeat_task(self, task_id: str, worker_id: str, lease_seconds: float = 60) -> bool:
+        """
+        续约任务（只有当前持有者可以续约）
+
+        Args:
+            task_id: 任务 ID
+            worker_id: 认领者标识
+            lease_seconds: 新的租约时长（秒）
+
+        Returns:
+            是否续约成功（False 表示租约已被其他 worker 接管）
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE tasks SET lease_expires_at = ?, heartbeat_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'running'
+            """, (now + lease_seconds, now, task_id, worker_id))
+            self.conn.commit()
+            return cursor.rowcount > 0
+
+    def finish_task(self, task_id: str, worker_id: str, status: str,
+                    error_message: str = None) -> bool:
+        """
+        结束任务并释放租约（只有当前持有者可以结束）
+
+        Args:
+            task_id: 任务 ID
+            worker_id: 认领者标识
+            status: 最终状态（completed/failed）
+            error_message: 错误信息
+
+        Returns:
+            是否更新成功
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE tasks
+                SET status = ?, progress = CASE WHEN ? = 'completed' THEN 100 ELSE progress END,
+                    error_message = COALESCE(?, error_message),
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner IS ? AND status = 'running'
+            """, (status, status, error_message, datetime.now().isoformat(), task_id, worker_id))
+            self.conn.commit()
+            return cursor.rowcount > 0
+
+    def requeue_running_tasks(self) -> int:
+        """
+        将没有租约的 running 任务重新放回队列（旧版本进程退出时遗留）
+
+        持有租约的任务由租约过期机制处理（见 claim_next_task），
+        以免误改仍在其他 worker 中运行的任务。
+
+        Returns:
+            重新入队的任务数量
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE tasks SET status = 'pending', updated_at = ?
+                WHERE status = 'running' AND lease_expires_at IS NULL
+            """, (datetime.now().isoformat(),))
+            self.conn.commit()
+            count = cursor.rowcount
+        if count:
+            logger.info(f"重新入队未完成任务: {count} 个")
+        return count
+
+    @staticmethod
+    def _task_row_to_dict(row) -> Dict[str, Any]:
+        """将任务行转换为字典，并解析 payload 和 detail"""
+        task = dict(row)
+        for field in ('payload', 'detail'):
+            try:
+                task[field] = json.loads(task.get(field) or '{}')
+            except (TypeError, ValueError):
+                task[field] = {}
+        return task
+
+    # ==================== 检查点相关操作 ====================
+
+    def save_checkpoint(self, podcast_id: str, stage: str, data: dict):
+        """
+        保存（覆盖）某个阶段的检查点
+
+        Args:
+            podcast_id: 播客 ID
+            stage: 阶段名称（audio/asr_task/asr_result/render）
+            data: 阶段产出
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO checkpoints (podcast_id, stage, data, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (podcast_id, stage, json.dumps(data, ensure_ascii=False), datetime.now().isoformat()))
+            self.conn.commit()
+        logger.debug(f"保存检查点: {podcast_id} / {stage}")
+
+    def get_checkpoints(self, podcast_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        获取播客的所有检查点
+
+        Args:
+            podcast_id: 播客 ID
+
+        Returns:
+            {阶段名称: 阶段产出}
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT stage, data FROM checkpoints WHERE podcast_id = ?", (podcast_id,))
+        checkpoints = {}
+        for row in cursor.fetchall():
+            try:
+                checkpoints[row[0]] = json.loads(row[1])
+            except (TypeError, ValueError):
+                logger.warning(f"检查点数据损坏，已忽略: {podcast_id} / {row[0]}")
+        return checkpoints
+
+    def clear_checkpoints(self, podcast_id: str, stages: List[str] = None):
+        """
+        删除检查点
+
+        Args:
+            podcast_id: 播客 ID
+            stages: 要删除的阶段，None 表示全部
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            if stages:
+                cursor.execute(
+                    f"DELETE FROM checkpoints WHERE podcast_id = ? "
+                    f"AND stage IN ({', '.join('?' for _ in stages)})",
+                    [podcast_id] + list(stages)
+                )
+            else:
+                cursor.execute("DELETE FROM checkpoints WHERE podcast_id = ?", (podcast_id,))
+            self.conn.commit()
+
+    # ==================== 产物记录相关操作 ====================
+
+    def save_artifact(self, podcast_id: str, name: str, path: str,
+                      input_hash: str, output_hash: str = None):
+        """
+        保存（覆盖）产物构建记录
+
+        Args:
+            podcast_id: 播客 ID
+            name: 产物名称（segments_json/md/pdf/note_* 等）
+            path: 产物文件路径
+            input_hash: 构建时的输入哈希
+            output_hash: 产物内容哈希
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO artifacts (podcast_id, name, path, input_hash, output_hash, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (podcast_id, name, path, input_hash, output_hash, datetime.now().isoformat()))
+            self.conn.commit()
+
+    def get_artifacts(self, podcast_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        获取播客的所有产物构建记录
+
+        Args:
+            podcast_id: 播客 ID
+
+        Returns:
+            {产物名称: 记录字典}
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM artifacts WHERE podcast_id = ?", (podcast_id,))
+        return {row['name']: dict(row) for row in cursor.fetchall()}
+
+    # ==================== 订阅源相关操作 ====================
+
+    def create_feed(self, url: str, category: str = "", title: str = "") -> str:
+        """
+        创建订阅源
+
+        Args:
+            url: RSS/Atom 地址
+            category: 新节目归入的栏目
+            title: 订阅源标题（首次检查时会用源中的标题更新）
+
+        Returns:
+            feed_id: 订阅源 ID
+        """
+        feed_id = str(uuid.uuid4())
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT INTO feeds (id, url, title, category)
+                VALUES (?, ?, ?, ?)
+            """, (feed_id, url, title or "", category or ""))
+            self.conn.commit()
+        logger.info(f"创建订阅源: {feed_id} ({url})")
+        return feed_id
+
+    def get_feed(self, feed_id: str) -> Optional[Dict[str, Any]]:
+        """获取订阅源"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM feeds WHERE id = ?", (feed_id,))
+        row = cursor.fetchone()
         return dict(row) if row else None
 
+    def get_feed_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """按地址获取订阅源"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM feeds WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def list_feeds(self) -> List[Dict[str, Any]]:
+        """
+        获取所有订阅源（附带已入队的节目数）
+
+        Returns:
+            订阅源列表
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT f.*, COUNT(i.podcast_id) AS episode_count
+            FROM feeds f LEFT JOIN feed_items i ON i.feed_id = f.id
+            GROUP BY f.id
+            ORDER BY f.created_at DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def list_due_feeds(self, interval: float) -> List[Dict[str, Any]]:
+        """
+        获取到期需要检查的订阅源
+
+        Args:
+            interval: 检查间隔（秒）
+
+        Returns:
+            启用且从未检查或距上次检查超过间隔的订阅源
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT * FROM feeds
+            WHERE enabled = 1 AND (last_checked_at IS NULL OR last_checked_at <= ?)
+            ORDER BY last_checked_at IS NOT NULL, last_checked_at
+        """, (time.time() - interval,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def update_feed(self, feed_id: str, **kwargs):
+        """
+        更新订阅源
+
+        Args:
+            feed_id: 订阅源 ID
+            **kwargs: 要更新的字段
+        """
+        if not kwargs:
+            return
+
+        fields = ", ".join([f"{k} = ?" for k in kwargs.keys()])
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(f"UPDATE feeds SET {fields} WHERE id = ?", list(kwargs.values()) + [feed_id])
+            self.conn.commit()
+
+    def delete_feed(self, feed_id: str) -> bool:
+        """
+        删除订阅源及其条目记录（已创建的播客保留）
+
+        Args:
+            feed_id: 订阅源 ID
+
+        Returns:
+            是否删除成功
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM feed_items WHERE feed_id = ?", (feed_id,))
+            cursor.execute("DELETE FROM feeds WHERE id = ?", (feed_id,))
+            deleted = cursor.rowcount > 0
+            self.conn.commit()
+        return deleted
+
+    def get_seen_guids(self, feed_id: str) -> set:
+        """获取订阅源已见过的条目 GUID"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT guid FROM feed_items WHERE feed_id = ?", (feed_id,))
+        return {row[0] for row in cursor.fetchall()}
+
+    def add_feed_item(self, feed_id: str, guid: str, title: str = "", enclosure_url: str = "",
+                      published_at: str = "", podcast_id: str = None) -> bool:
+        """
+        记录订阅源条目（已存在时忽略）
+
+        多个进程同时检查同一订阅源时，只有插入成功的一方负责入队。
+
+        Args:
+            feed_id: 订阅源 ID
+            guid: 条目 GUID
+            title: 条目标题
+            enclosure_url: 音频地址
+            published_at: 发布时间
+            podcast_id: 对应的播客 ID（仅标记为已见、不处理的旧条目为空）
+
+        Returns:
+            是否为新条目
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR IGNORE INTO feed_items (feed_id, guid, title, enclosure_url, published_at, podcast_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (feed_id, guid, title or "", enclosure_url or "", published_at or "", podcast_id))
+            inserted = cursor.rowcount > 0
+            self.conn.commit()
+        return inserted
+
+    def set_feed_item_podcast(self, feed_id: str, guid: str, podcast_id: str):
+        """关联订阅源条目与创建的播客"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "UPDATE feed_items SET podcast_id = ? WHERE feed_id = ? AND guid = ?",
+                (podcast_id, feed_id, guid)
+            )
+            self.conn.commit()
+
+    # ==================== 音频缓存相关操作 ====================
+
+    def save_audio_cache(self, audio_url: str, etag: str, size: int, sha256: str, path: str):
+        """
+        保存（覆盖）音频缓存记录
+
+        Args:
+            audio_url: 音频下载链接
+            etag: 服务器返回的 ETag
+            size: 文件大小
+            sha256: 音频内容的 SHA-256
+            path: 缓存文件路径
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO audio_cache (audio_url, etag, size, sha256, path, updated_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (audio_url, etag, size, sha256, path, datetime.now().isoformat(), time.time()))
+            self.conn.commit()
+
+    def get_audio_cache(self, audio_url: str) -> Optional[Dict[str, Any]]:
+        """
+        获取音频链接对应的缓存记录
+
+        Args:
+            audio_url: 音频下载链接
+
+        Returns:
+            缓存记录字典，不存在时返回 None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM audio_cache WHERE audio_url = ?", (audio_url,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def touch_audio_cache(self, sha256: str):
+        """记录一次缓存命中（更新该内容所有记录的最近使用时间）"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("UPDATE audio_cache SET last_used_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            self.conn.commit()
+
+    def delete_audio_cache(self, sha256: str):
+        """删除某个音频内容的全部缓存记录（不删除文件）"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM audio_cache WHERE sha256 = ?", (sha256,))
+            self.conn.commit()
+
+    def list_audio_cache_files(self) -> List[Dict[str, Any]]:
+        """
+        列出音频缓存文件（同一内容的多个链接合并为一条，最久未使用的在前）
+
+        Returns:
+            [{sha256, path, size, last_used_at}]
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT sha256, path, MAX(size) AS size, MAX(last_used_at) AS last_used_at
+            FROM audio_cache GROUP BY sha256, path ORDER BY last_used_at
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def count_podcasts_by_audio_sha256(self, sha256: str) -> int:
+        """
+        统计使用某个音频内容的播客数量
+
+        Args:
+            sha256: 音频内容的 SHA-256
+
+        Returns:
+            播客数量
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM podcasts WHERE audio_sha256 = ?", (sha256,))
+        return cursor.fetchone()[0]
+
+    def save_resolved_page(self, page_url: str, audio_url: str, title: str = "", duration: int = 0):
+        """
+        保存（覆盖）节目页面解析结果
+
+        Args:
+            page_url: 节目页面 URL
+            audio_url: 音频下载链接
+            title: 节目标题
+            duration: 节目时长（秒）
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO resolved_pages (page_url, audio_url, title, duration, resolved_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (page_url, audio_url, title or "", int(duration or 0), time.time()))
+            self.conn.commit()
+
+    def get_resolved_page(self, page_url: str, max_age: float = None) -> Optional[Dict[str, Any]]:
+        """
+        获取节目页面解析结果
+
+        Args:
+            page_url: 节目页面 URL
+            max_age: 最长有效时间（秒），None 表示不过期
+
+        Returns:
+            {page_url, audio_url, title, duration}，不存在或已过期时返回 None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM resolved_pages WHERE page_url = ?", (page_url,))
+        row = cursor.fetchone()
+        if not row or (max_age is not None and time.time() - row['resolved_at'] > max_age):
+            return None
+        return {
+            'page_url': row['page_url'],
+            'audio_url': row['audio_url'],
+            'title': row['title'],
+            'duration': row['duration'],
+        }
+
+    def save_asr_cache_entry(self, cache_key: str, audio_sha256: str, model: str, path: str, size: int):
+        """
+        保存（覆盖）ASR 结果缓存记录
+
+        Args:
+            cache_key: 缓存键（音频内容、模型和识别参数的哈希）
+            audio_sha256: 音频内容的 SHA-256
+            model: ASR 模型
+            path: 压缩结果文件路径
+            size: 文件大小（字节）
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO asr_cache (cache_key, audio_sha256, model, path, size, hits, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+            """, (cache_key, audio_sha256, model, path, int(size), now, now))
+            self.conn.commit()
+
+    def get_asr_cache_entry(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取 ASR 结果缓存记录
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            缓存记录字典，不存在时返回 None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM asr_cache WHERE cache_key = ?", (cache_key,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def touch_asr_cache_entry(self, cache_key: str):
+        """记录一次缓存命中（更新最近使用时间和命中次数）"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE asr_cache SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?
+            """, (time.time(), cache_key))
+            self.conn.commit()
+
+    def delete_asr_cache_entry(self, cache_key: str):
+        """删除 ASR 结果缓存记录（不删除文件）"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM asr_cache WHERE cache_key = ?", (cache_key,))
+            self.conn.commit()
+
+    def list_asr_cache_entries(self, audio_sha256: str = None) -> List[Dict[str, Any]]:
+        """
+        列出 ASR 结果缓存记录（最久未使用的在前）
+
+        Args:
+            audio_sha256: 只列出该音频内容的记录，为空时列出全部
+
+        Returns:
+            缓存记录列表
+        """
+        cursor = self.conn.cursor()
+        if audio_sha256:
+            cursor.execute("SELECT * FROM asr_cache WHERE audio_sha256 = ? ORDER BY last_used_at", (audio_sha256,))
+        else:
+            cursor.execute("SELECT * FROM asr_cache ORDER BY last_used_at")
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_asr_cache_totals(self) -> Dict[str, int]:
+        """
+        获取 ASR 结果缓存的总条目数和总大小
+
+        Returns:
+            {entries, bytes}
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM asr_cache")
+        entries, total = cursor.fetchone()
+        return {'entries': entries, 'bytes': total}
+
+    def list_podcasts_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """
+        按状态获取播客列表
+
+        Args:
+            statuses: 状态列表
+
+        Returns:
+            播客列表（按创建时间升序）
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM podcasts WHERE status IN ({', '.join('?' for _ in statuses)}) "
+            f"ORDER BY created_at",
+            list(statuses)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
     # ==================== 配置相关操作 ====================
 
     def set_setting(self, key: str, value: str):
@@ -548,12 +1451,13 @@ class Database:
             key: 配置键
             value: 配置值
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES (?, ?, ?)
-        """, (key, value, datetime.now().isoformat()))
-        self.conn.commit()
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO settings (key, value, updated_at)
+                VALUES (?, ?, ?)
+            """, (key, value, datetime.now().isoformat()))
+            self.conn.commit()
 
     def get_setting(self, key: str, default: str = None) -> Optional[str]:
         """
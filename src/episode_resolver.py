@@ -0,0 +1,205 @@
+"""
+节目页面解析模块
+从小宇宙节目页面中一次性提取音频链接、标题和时长，
+批量处理时用 asyncio 有界并发地解析大量页面，解析结果按 TTL 缓存在数据库中
+"""
+
+import asyncio
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Union
+from loguru import logger
+
+import http_client
+
+
+class EpisodeResolveError(Exception):
+    """页面解析异常"""
+    pass
+
+
+# 页面内嵌的 Next.js 数据（包含节目标题、时长和音频地址）
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>',
+    re.DOTALL
+)
+
+# 没有内嵌数据时的兜底：一次扫描同时匹配 enclosureUrl 和各格式的音频链接
+AUDIO_URL_PATTERN = re.compile(
+    r'"enclosureUrl"\s*:\s*"(?P<enclosure>[^"]+)"'
+    r'|(?P<url>https?://[^"\'\s<>]+\.(?P<ext>m4a|mp3|wav)[^"\'\s<>]*)'
+)
+
+# 兜底匹配的优先级（数值越小越优先）
+_MATCH_PRIORITY = {"m4a": 0, "enclosure": 1, "mp3": 2, "wav": 3}
+
+
+def _has_audio(node: Any) -> bool:
+    """是否是带音频地址的节目对象"""
+    if not isinstance(node, dict):
+        return False
+    enclosure = node.get("enclosure")
+    return bool(node.get("enclosureUrl") or (isinstance(enclosure, dict) and enclosure.get("url")))
+
+
+def _find_episode(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    在内嵌 JSON 中查找带音频地址的节目对象
+
+    优先取 props.pageProps.episode（当前页面的节目）；结构不同时按文档顺序深度优先查找第一个，
+    避免取到页面中推荐的其他节目
+    """
+    episode = data
+    for key in ("props", "pageProps", "episode"):
+        episode = episode.get(key) if isinstance(episode, dict) else None
+    if _has_audio(episode):
+        return episode
+
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if _has_audio(node):
+                return node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def parse_episode_page(html: str) -> Dict[str, Any]:
+    """
+    从节目页面 HTML 中提取音频链接、标题和时长
+
+    优先解析内嵌的 __NEXT_DATA__ JSON；没有时对 HTML 做一次正则扫描兜底（只能得到音频链接）。
+
+    Args:
+        html: 页面 HTML
+
+    Returns:
+        {audio_url, title, duration}
+
+    Raises:
+        EpisodeResolveError: 未找到音频链接
+    """
+    match = NEXT_DATA_PATTERN.search(html)
+    if match:
+        try:
+            episode = _find_episode(json.loads(match.group(1)))
+        except ValueError:
+            episode = None
+        if episode:
+            enclosure = episode.get("enclosure")
+            audio_url = episode.get("enclosureUrl") or enclosure.get("url")
+            return {
+                "audio_url": audio_url,
+                "title": episode.get("title") or "",
+                "duration": int(episode.get("duration") or 0),
+            }
+
+    best = None
+    for found in AUDIO_URL_PATTERN.finditer(html):
+        kind = "enclosure" if found.group("enclosure") else found.group("ext")
+        candidate = (_MATCH_PRIORITY[kind], found.group("enclosure") or found.group("url"))
+        if best is None or candidate[0] < best[0]:
+            best = candidate
+            if best[0] == 0:
+                break
+
+    if not best:
+        raise EpisodeResolveError("未能从页面中提取到音频链接")
+    return {"audio_url": best[1], "title": "", "duration": 0}
+
+
+class EpisodeResolver:
+    """节目页面解析器（带 TTL 缓存，支持 asyncio 批量并发解析）"""
+
+    def __init__(self, session=None, db=None, ttl: float = 86400, concurrency: int = 10,
+                 timeout: float = 30, user_agent: str = None):
+        """
+        初始化解析器
+
+        Args:
+            session: HTTP 会话（默认使用进程内共享的连接池会话）
+            db: 数据库对象（为空时不缓存解析结果）
+            ttl: 解析结果缓存时长（秒）
+            concurrency: 批量解析时同时请求的页面数（不宜超过 http.pool_maxsize）
+            timeout: 页面请求超时（秒）
+            user_agent: 请求使用的 User-Agent
+        """
+        self.session = session or http_client.get_session()
+        self.db = db
+        self.ttl = ttl
+        self.concurrency = max(1, int(concurrency or 1))
+        self.timeout = timeout
+        self.user_agent = user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+    def resolve(self, page_url: str) -> Dict[str, Any]:
+        """
+        解析单个节目页面（缓存未过期时不发请求）
+
+        Args:
+            page_url: 节目页面 URL
+
+        Returns:
+            {page_url, audio_url, title, duration}
+
+        Raises:
+            EpisodeResolveError: 请求或解析失败
+        """
+        if self.db is not None:
+            cached = self.db.get_resolved_page(page_url, max_age=self.ttl)
+            if cached:
+                logger.debug(f"页面解析缓存命中: {page_url}")
+                return cached
+
+        logger.info(f"开始解析页面: {page_url}")
+        try:
+            response = self.session.get(page_url, headers={"User-Agent": self.user_agent}, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            raise EpisodeResolveError(f"页面请求失败: {e}")
+
+        episode = parse_episode_page(response.text)
+        episode["page_url"] = page_url
+        logger.info(f"找到音频链接: {episode['audio_url']}")
+
+        if self.db is not None:
+            self.db.save_resolved_page(page_url, episode["audio_url"], episode["title"], episode["duration"])
+        return episode
+
+    async def resolve_many_async(self, page_urls: Iterable[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        并发解析多个节目页面（最多同时 concurrency 个请求）
+
+        Args:
+            page_urls: 节目页面 URL 列表
+
+        Returns:
+            与输入顺序一致的结果列表，失败的位置为异常对象
+        """
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="resolver") as executor:
+            return await asyncio.gather(
+                *(loop.run_in_executor(executor, self.resolve, url) for url in page_urls),
+                return_exceptions=True
+            )
+
+    def resolve_many(self, page_urls: Iterable[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        并发解析多个节目页面（同步入口）
+
+        Args:
+            page_urls: 节目页面 URL 列表
+
+        Returns:
+            与输入顺序一致的结果列表，失败的位置为异常对象
+        """
+        page_urls = list(page_urls)
+        started = time.time()
+        results = asyncio.run(self.resolve_many_async(page_urls))
+        failed = sum(isinstance(result, Exception) for result in results)
+        logger.info(f"页面解析完成: {len(page_urls) - failed}/{len(page_urls)} 成功, 耗时 {time.time() - started:.1f}s")
+        return results
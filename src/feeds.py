@@ -0,0 +1,299 @@
+"""
+订阅源模块
+定期用条件 GET（ETag / If-Modified-Since）检查 RSS/Atom 订阅源，只在内容变化时解析，
+新节目的音频地址（enclosure）直接入队处理，不再抓取节目页面
+"""
+
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+import http_client
+
+
+class FeedError(Exception):
+    """订阅源异常"""
+    pass
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+ITUNES_NS = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+
+
+def _text(element, path: str) -> str:
+    """读取子元素文本（不存在时返回空字符串）"""
+    found = element.find(path)
+    return (found.text or "").strip() if found is not None and found.text else ""
+
+
+def _parse_duration(value: str) -> int:
+    """解析 itunes:duration（秒数或 HH:MM:SS / MM:SS）"""
+    if not value:
+        return 0
+    try:
+        seconds = 0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+        return int(seconds)
+    except ValueError:
+        return 0
+
+
+def _published_timestamp(value: str) -> float:
+    """发布时间转换为时间戳（RFC 822 或 ISO 8601，无法解析时为 0）"""
+    if not value:
+        return 0.0
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def parse_feed(content: bytes) -> Dict[str, Any]:
+    """
+    解析 RSS 2.0 / Atom 订阅源
+
+    Args:
+        content: 订阅源 XML
+
+    Returns:
+        {title, items: [{guid, title, link, enclosure_url, published, duration}]}，
+        条目按发布时间从新到旧排列，没有音频地址的条目被忽略
+
+    Raises:
+        FeedError: XML 无法解析或不是 RSS/Atom
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        raise FeedError(f"订阅源 XML 解析失败: {e}")
+
+    items = []
+    if root.tag == "rss" or root.find("channel") is not None:
+        channel = root.find("channel")
+        if channel is None:
+            raise FeedError("RSS 缺少 channel 元素")
+        title = _text(channel, "title")
+        for entry in channel.iter("item"):
+            enclosure = entry.find("enclosure")
+            enclosure_url = enclosure.get("url", "").strip() if enclosure is not None else ""
+            if not enclosure_url:
+                continue
+            items.append({
+                "guid": _text(entry, "guid") or enclosure_url,
+                "title": _text(entry, "title"),
+                "link": _text(entry, "link"),
+                "enclosure_url": enclosure_url,
+                "published": _text(entry, "pubDate"),
+                "duration": _parse_duration(_text(entry, f"{ITUNES_NS}duration")),
+            })
+    elif root.tag == f"{ATOM_NS}feed":
+        title = _text(root, f"{ATOM_NS}title")
+        for entry in root.iter(f"{ATOM_NS}entry"):
+            links = {link.get("rel", "alternate"): link.get("href", "") for link in entry.findall(f"{ATOM_NS}link")}
+            enclosure_url = links.get("enclosure", "").strip()
+            if not enclosure_url:
+                continue
+            items.append({
+                "guid": _text(entry, f"{ATOM_NS}id") or enclosure_url,
+                "title": _text(entry, f"{ATOM_NS}title"),
+                "link": links.get("alternate", ""),
+                "enclosure_url": enclosure_url,
+                "published": _text(entry, f"{ATOM_NS}published") or _text(entry, f"{ATOM_NS}updated"),
+                "duration": _parse_duration(_text(entry, f"{ITUNES_NS}duration")),
+            })
+    else:
+        raise FeedError(f"不支持的订阅源格式: {root.tag}")
+
+    # 稳定排序：无法解析发布时间的条目保持原顺序
+    items.sort(key=lambda item: _published_timestamp(item["published"]), reverse=True)
+    return {"title": title, "items": items}
+
+
+class FeedPoller:
+    """订阅源轮询器"""
+
+    def __init__(self, db, enqueue: Callable[[str, str, dict], str] = None,
+                 check_interval: float = 1800, initial_items: int = 1,
+                 timeout: float = 30, user_agent: str = None):
+        """
+        初始化轮询器
+
+        Args:
+            db: 数据库对象
+            enqueue: 入队函数 (podcast_id, task_type, payload) -> task_id（默认直接写入任务表）
+            check_interval: 每个订阅源的检查间隔（秒）
+            initial_items: 新订阅时入队的最新节目数（更早的节目只标记为已见）
+            timeout: 请求超时（秒）
+            user_agent: 请求使用的 User-Agent
+        """
+        self.db = db
+        self.enqueue = enqueue or db.create_task
+        self.check_interval = check_interval or 1800
+        self.initial_items = max(0, int(initial_items or 0))
+        self.timeout = timeout
+        self.user_agent = user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        self.session = http_client.get_session()
+
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def subscribe(self, url: str, category: str = "") -> Dict[str, Any]:
+        """
+        添加订阅源并立即检查一次
+
+        Args:
+            url: RSS/Atom 地址
+            category: 新节目归入的栏目
+
+        Returns:
+            订阅源记录（含本次入队的播客 ID 列表 new_podcast_ids）
+
+        Raises:
+            FeedError: 已订阅，或订阅源无法获取/解析
+        """
+        if self.db.get_feed_by_url(url):
+            raise FeedError(f"已订阅: {url}")
+
+        feed_id = self.db.create_feed(url, category=category)
+        try:
+            new_podcast_ids = self.check_feed(self.db.get_feed(feed_id))
+        except FeedError:
+            self.db.delete_feed(feed_id)
+            raise
+
+        feed = self.db.get_feed(feed_id)
+        feed["new_podcast_ids"] = new_podcast_ids
+        return feed
+
+    def check_feed(self, feed: Dict[str, Any]) -> List[str]:
+        """
+        检查单个订阅源，新节目入队
+
+        Args:
+            feed: 订阅源记录
+
+        Returns:
+            本次入队的播客 ID 列表
+
+        Raises:
+            FeedError: 请求失败或解析失败
+        """
+        headers = {"User-Agent": self.user_agent}
+        if feed.get("etag"):
+            headers["If-None-Match"] = feed["etag"]
+        if feed.get("last_modified"):
+            headers["If-Modified-Since"] = feed["last_modified"]
+
+        try:
+            response = self.session.get(feed["url"], headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                logger.debug(f"订阅源未变化: {feed['url']}")
+                self.db.update_feed(feed["id"], last_checked_at=time.time(), error_message="")
+                return []
+            response.raise_for_status()
+            parsed = parse_feed(response.content)
+        except Exception as e:
+            self.db.update_feed(feed["id"], last_checked_at=time.time(), error_message=str(e))
+            raise e if isinstance(e, FeedError) else FeedError(f"订阅源请求失败: {e}")
+
+        first_check = feed.get("last_checked_at") is None
+        seen = self.db.get_seen_guids(feed["id"])
+        new_items = [item for item in parsed["items"] if item["guid"] not in seen]
+
+        podcast_ids = []
+        for position, item in enumerate(new_items):
+            if first_check and position >= self.initial_items:
+                # 新订阅的历史节目只标记为已见
+                self.db.add_feed_item(feed["id"], item["guid"], item["title"],
+                                      item["enclosure_url"], item["published"])
+                continue
+            podcast_id = self._enqueue_item(feed, item)
+            if podcast_id:
+                podcast_ids.append(podcast_id)
+
+        self.db.update_feed(
+            feed["id"],
+            title=parsed["title"] or feed.get("title") or "",
+            etag=response.headers.get("etag", ""),
+            last_modified=response.headers.get("last-modified", ""),
+            last_checked_at=time.time(),
+            error_message=""
+        )
+        if podcast_ids:
+            logger.info(f"订阅源 {parsed['title'] or feed['url']}: {len(podcast_ids)} 期新节目已入队")
+        return podcast_ids
+
+    def check_due(self) -> int:
+        """
+        检查所有到期的订阅源
+
+        Returns:
+            入队的节目数
+        """
+        total = 0
+        for feed in self.db.list_due_feeds(self.check_interval):
+            try:
+                total += len(self.check_feed(feed))
+            except FeedError as e:
+                logger.warning(f"检查订阅源失败: {feed['url']}: {e}")
+        return total
+
+    def start(self, poll_interval: float = 60):
+        """
+        启动后台轮询线程（重复调用无副作用）
+
+        Args:
+            poll_interval: 查找到期订阅源的间隔（秒）
+        """
+        if self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, args=(poll_interval,), name="feed-poller", daemon=True)
+        self._thread.start()
+        logger.info(f"订阅源轮询已启动: 每 {self.check_interval:.0f}s 检查一次")
+
+    def stop(self):
+        """停止后台轮询线程"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self, poll_interval: float):
+        """后台线程主循环"""
+        while not self._stopping.is_set():
+            try:
+                self.check_due()
+            except Exception as e:
+                logger.error(f"订阅源轮询出错: {e}")
+            self._stopping.wait(poll_interval)
+
+    def _enqueue_item(self, feed: Dict[str, Any], item: Dict[str, Any]) -> Optional[str]:
+        """为新条目创建播客并入队（其他进程已处理同一条目时返回 None）"""
+        if not self.db.add_feed_item(feed["id"], item["guid"], item["title"],
+                                     item["enclosure_url"], item["published"]):
+            return None
+
+        podcast_id = self.db.create_podcast(item["link"] or item["enclosure_url"], title=item["title"])
+        updates = {"audio_url": item["enclosure_url"]}
+        if feed.get("category"):
+            updates["category"] = feed["category"]
+        if item["duration"]:
+            updates["duration"] = item["duration"]
+        self.db.update_podcast(podcast_id, **updates)
+        self.db.set_feed_item_podcast(feed["id"], item["guid"], podcast_id)
+
+        self.enqueue(podcast_id, "podcast", {
+            "url": item["link"] or item["enclosure_url"],
+            "audio_url": item["enclosure_url"],
+        })
+        return podcast_id
@@ -0,0 +1,163 @@
+"""
+共享 HTTP 客户端模块
+进程内所有页面解析、音频下载和转录结果下载共用一个带连接池的会话，
+同一主机的请求复用 keep-alive 连接，并按主机统计请求数、耗时和流量
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# 默认连接池参数（未在配置中指定时使用）
+DEFAULT_SETTINGS = {
+    "pool_connections": 10,   # 缓存连接池的主机数
+    "pool_maxsize": 10,       # 每个主机保留的最大连接数
+    "connect_timeout": 10,    # 建立连接超时（秒）
+    "read_timeout": 60,       # 读取超时（秒）
+}
+
+
+class HostStats:
+    """单个主机的请求统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（latency 为响应头返回前的耗时）"""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "latency_avg": round(self.latency_total / self.requests, 4) if self.requests else 0.0,
+            "latency_max": round(self.latency_max, 4),
+        }
+
+
+class PooledSession(requests.Session):
+    """带默认超时和按主机统计的 requests 会话（线程间共享）"""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 connect_timeout: float = 10, read_timeout: float = 60):
+        """
+        初始化会话
+
+        Args:
+            pool_connections: 缓存连接池的主机数
+            pool_maxsize: 每个主机保留的最大连接数
+            connect_timeout: 默认连接超时（秒）
+            read_timeout: 默认读取超时（秒）
+        """
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=int(pool_connections), pool_maxsize=int(pool_maxsize))
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.default_timeout = (connect_timeout, read_timeout)
+
+        self._stats: Dict[str, HostStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        """发送请求（未指定 timeout 时使用默认超时），并记录主机统计"""
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+
+        host = urlsplit(url).netloc
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            self._record(host, error=True)
+            raise
+
+        self._record(host, latency=time.monotonic() - started, error=response.status_code >= 400)
+        if kwargs.get("stream"):
+            self._count_streamed_bytes(host, response)
+        else:
+            self._record_bytes(host, len(response.content))
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各主机的统计
+
+        Returns:
+            {主机: {requests, errors, bytes, latency_avg, latency_max}}
+        """
+        with self._stats_lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    def _count_streamed_bytes(self, host: str, response: requests.Response):
+        """包装流式响应的 iter_content，读取时累计字节数"""
+        iter_content = response.iter_content
+
+        def counted_iter_content(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                if chunk:
+                    self._record_bytes(host, len(chunk))
+                yield chunk
+
+        response.iter_content = counted_iter_content
+
+    def _record(self, host: str, latency: float = 0.0, error: bool = False):
+        """记录一次请求"""
+        with self._stats_lock:
+            stats = self._stats.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+
+    def _record_bytes(self, host: str, size: int):
+        """累计响应字节数"""
+        with self._stats_lock:
+            self._stats.setdefault(host, HostStats()).bytes += size
+
+
+_settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+
+def configure(settings: Optional[Dict[str, Any]]):
+    """
+    加载连接池配置（config.yaml 的 http 部分），已创建的会话会关闭并按新配置重建
+
+    Args:
+        settings: {pool_connections, pool_maxsize, connect_timeout, read_timeout}
+    """
+    global _settings, _session
+    with _session_lock:
+        _settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session() -> PooledSession:
+    """
+    获取进程内共享的 HTTP 会话
+
+    Returns:
+        会话对象
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession(**{key: _settings[key] for key in DEFAULT_SETTINGS})
+        return _session
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """获取共享会话的按主机统计（尚未发出请求时为空）"""
+    with _session_lock:
+        session = _session
+    return session.stats() if session else {}
@@ -0,0 +1,222 @@
+"""
+后台任务队列模块
+基于数据库 tasks 表的持久化任务队列，由工作线程池消费。
+任务以租约方式认领并定期续约，多个进程或主机可以共享同一个数据库并行消费，
+持有者崩溃后租约过期，任务会被其他 worker 重新认领。
+"""
+
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Any
+from loguru import logger
+
+
+class JobQueueError(Exception):
+    """任务队列异常"""
+    pass
+
+
+class TaskProgress:
+    """任务进度上报器（写入 tasks 表，同一阶段内按时间间隔节流）"""
+
+    def __init__(self, db, task_id: str, min_interval: float = 0.5):
+        """
+        初始化进度上报器
+
+        Args:
+            db: 数据库对象
+            task_id: 任务 ID
+            min_interval: 同一阶段两次写库的最小间隔（秒）
+        """
+        self.db = db
+        self.task_id = task_id
+        self.min_interval = min_interval
+        self._stage = None
+        self._reported_at = 0.0
+
+    def __call__(self, stage: str, progress: float = None, detail: dict = None):
+        """
+        上报进度
+
+        Args:
+            stage: 当前阶段
+            progress: 总体进度百分比（0-100）
+            detail: 阶段详情
+        """
+        progress = None if progress is None else int(max(0, min(100, progress)))
+        now = time.monotonic()
+        # 阶段切换和阶段完成（进度 100）总是写入，同一阶段内的频繁更新（如下载字节数）按间隔节流
+        if stage == self._stage and progress != 100 and now - self._reported_at < self.min_interval:
+            return
+
+        self._stage, self._reported_at = stage, now
+        try:
+            self.db.update_task(self.task_id, progress=progress, stage=stage, detail=detail or {})
+        except Exception as e:
+            logger.debug(f"任务进度写入失败: {self.task_id}: {e}")
+
+
+class JobQueue:
+    """持久化后台任务队列"""
+
+    def __init__(self, db, num_workers: int = 2, poll_interval: float = 1.0,
+                 lease_seconds: float = 60, max_attempts: int = 3, worker_id: str = None):
+        """
+        初始化任务队列
+
+        Args:
+            db: 数据库对象
+            num_workers: 工作线程数量
+            poll_interval: 队列为空时的轮询间隔（秒）
+            lease_seconds: 任务租约时长（秒），执行期间每 1/3 租约续约一次
+            max_attempts: 任务最大尝试次数（租约过期重新认领也计入）
+            worker_id: 本进程的 worker 标识（默认 主机名:进程号:随机串）
+        """
+        self.db = db
+        self.num_workers = max(1, int(num_workers or 1))
+        self.poll_interval = poll_interval or 1.0
+        self.lease_seconds = lease_seconds or 60
+        self.max_attempts = max_attempts or 3
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._workers: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def register(self, task_type: str, handler: Callable[[Dict[str, Any]], Any]):
+        """
+        注册任务处理函数
+
+        Args:
+            task_type: 任务类型
+            handler: 处理函数，参数为任务字典（含 podcast_id 和 payload）
+        """
+        self._handlers[task_type] = handler
+
+    def enqueue(self, podcast_id: str, task_type: str, payload: dict = None) -> str:
+        """
+        提交任务到队列
+
+        Args:
+            podcast_id: 播客 ID
+            task_type: 任务类型
+            payload: 任务参数
+
+        Returns:
+            task_id: 任务 ID
+        """
+        if task_type not in self._handlers:
+            raise JobQueueError(f"未注册的任务类型: {task_type}")
+
+        task_id = self.db.create_task(podcast_id, task_type, payload)
+        self._wakeup.set()
+        return task_id
+
+    def start(self):
+        """启动工作线程（重复调用无副作用）"""
+        if self._workers:
+            return
+
+        # 上次进程退出时未完成的任务重新入队
+        self.db.requeue_running_tasks()
+
+        self._stopping.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"job-worker-{i + 1}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        logger.info(f"任务队列已启动: {self.num_workers} 个工作线程, worker_id={self.worker_id}")
+
+    def stop(self, timeout: float = None):
+        """
+        停止工作线程（正在执行的任务会执行完毕）
+
+        Args:
+            timeout: 每个线程的等待超时（秒）
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        logger.info("任务队列已停止")
+
+    def _worker_loop(self):
+        """工作线程主循环"""
+        task_types = list(self._handlers.keys())
+
+        while not self._stopping.is_set():
+            try:
+                task = self.db.claim_next_task(
+                    task_types,
+                    worker_id=self.worker_id,
+                    lease_seconds=self.lease_seconds,
+                    max_attempts=self.max_attempts
+                )
+            except Exception as e:
+                logger.error(f"认领任务失败: {e}")
+                task = None
+
+            if not task:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_task(task)
+
+    def _run_task(self, task: Dict[str, Any]):
+        """执行单个任务并记录结果"""
+        task_id = task['id']
+        handler = self._handlers.get(task['task_type'])
+        logger.info(
+            f"开始执行任务: {task_id}, type={task['task_type']}, podcast_id={task['podcast_id']}, "
+            f"attempt={task.get('attempts')}"
+        )
+
+        # 处理函数通过 task['report_progress'](stage, progress, detail) 上报进度
+        task['report_progress'] = TaskProgress(self.db, task_id)
+
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop,
+            args=(task_id, finished),
+            name=f"job-heartbeat-{task_id[:8]}",
+            daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            handler(task)
+            status, error_message = "completed", None
+            logger.info(f"任务完成: {task_id}")
+        except Exception as e:
+            logger.error(f"任务失败: {task_id}: {e}")
+            logger.debug(traceback.format_exc())
+            status, error_message = "failed", str(e)
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        if not self.db.finish_task(task_id, self.worker_id, status, error_message):
+            logger.warning(f"任务租约已被其他 worker 接管，忽略本次结果: {task_id}")
+
+    def _heartbeat_loop(self, task_id: str, finished: threading.Event):
+        """任务执行期间定期续约"""
+        interval = self.lease_seconds / 3
+        while not finished.wait(interval):
+            try:
+                if not self.db.heartbeat_task(task_id, self.worker_id, self.lease_seconds):
+                    logger.warning(f"任务续约失败（租约已丢失）: {task_id}")
+                    return
+            except Exception as e:
+                logger.error(f"任务续约出错: {task_id}: {e}")
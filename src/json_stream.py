@@ -0,0 +1,248 @@
+"""
+流式 JSON 解析模块
+从字节块迭代器（HTTP 响应流、文件）中逐个解析数组元素，只在内存中保留当前元素，
+用于解析长音频的转录结果（数万个句子及词级时间）和转录 JSON，内存占用不随节目时长增长
+"""
+
+import codecs
+import gzip
+import itertools
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+
+class JSONStreamError(ValueError):
+    """JSON 格式错误或数据不完整"""
+    pass
+
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JSONStreamReader:
+    """
+    基于字节块的增量 JSON 读取器
+
+    容器（对象、数组）逐层遍历，标量和被读取的元素用标准库解码器整体解码；
+    缓冲区只保留尚未消费的数据。
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        """
+        初始化读取器
+
+        Args:
+            chunks: 字节块迭代器（UTF-8 编码）
+        """
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """读入下一块并丢弃已消费的部分（流已结束时返回 False）"""
+        if self.eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            text = self._text_decoder.decode(b"", final=True)
+        else:
+            text = self._text_decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def _grow(self):
+        """缓冲区中未消费的数据至少增加一倍（解码不完整的值时使用，总读取量保持线性）"""
+        target = max(len(self.buffer) - self.pos, 1) * 2
+        while len(self.buffer) - self.pos < target:
+            if not self._fill():
+                return
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符（不消费）"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise JSONStreamError("JSON 数据不完整")
+
+    def expect(self, char: str):
+        """消费指定的结构字符"""
+        found = self.peek()
+        if found != char:
+            raise JSONStreamError(f"JSON 格式错误: 期望 {char!r}，实际 {found!r}")
+        self.pos += 1
+
+    def read_value(self) -> Any:
+        """解码下一个完整的值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JSONStreamError(f"JSON 格式错误: {e}")
+                self._grow()
+                continue
+            # 数字后面紧接缓冲区末尾时可能还没读完（如 "12" 之后还有 ".5"）
+            if not self.eof and isinstance(value, (int, float)) and NUMBER_TAIL.fullmatch(self.buffer, end):
+                self._grow()
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        """跳过下一个值（容器逐个元素跳过，不整体解码）"""
+        char = self.peek()
+        if char == "[":
+            for _ in self.iter_array():
+                self.skip_value()
+        elif char == "{":
+            for _ in self.iter_object():
+                self.skip_value()
+        else:
+            self.read_value()
+
+    def iter_array(self) -> Iterator[None]:
+        """
+        遍历数组：每个元素之前 yield 一次，调用方必须在下一次迭代前读取或跳过该元素
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise JSONStreamError(f"JSON 格式错误: 数组中出现 {char!r}")
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        遍历对象：每个键 yield 一次，调用方必须在下一次迭代前读取或跳过对应的值
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise JSONStreamError("JSON 格式错误: 对象的键不是字符串")
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise JSONStreamError(f"JSON 格式错误: 对象中出现 {char!r}")
+
+
+def iter_file_chunks(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    按块读取文件（.gz 文件自动解压）
+
+    Args:
+        path: 文件路径
+        chunk_size: 每块字节数
+
+    Yields:
+        字节块
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
+def iter_sentence_groups(chunks: Iterable[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    从转录结果中逐句读取
+
+    兼容 transcription_url 下载的单个结果、原始结果列表和句子文件：
+    任意层级的 sentences 数组都会被读取，transcripts 数组逐个声道进入，其他字段（如全文 text）直接跳过。
+
+    Args:
+        chunks: 转录结果 JSON 的字节块
+
+    Yields:
+        (分组序号, 句子)：同一个 sentences 数组（同一声道）的句子分组序号相同
+    """
+    reader = JSONStreamReader(chunks)
+    groups = itertools.count()
+
+    def walk_container():
+        char = reader.peek()
+        if char == "[":
+            for _ in reader.iter_array():
+                yield from walk_container()
+        elif char == "{":
+            for key in reader.iter_object():
+                if key == "sentences" and reader.peek() == "[":
+                    group = next(groups)
+                    for _ in reader.iter_array():
+                        yield group, reader.read_value()
+                elif key == "transcripts" and reader.peek() == "[":
+                    yield from walk_container()
+                else:
+                    reader.skip_value()
+        else:
+            reader.skip_value()
+
+    yield from walk_container()
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    逐个读取顶层对象中某个数组字段的元素（其他字段跳过）
+
+    Args:
+        chunks: JSON 对象的字节块
+        key: 数组字段名
+
+    Yields:
+        数组元素
+    """
+    reader = JSONStreamReader(chunks)
+    for name in reader.iter_object():
+        if name == key and reader.peek() == "[":
+            for _ in reader.iter_array():
+                yield reader.read_value()
+            return
+        reader.skip_value()
+
+
+def read_fields(chunks: Iterable[bytes], keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    读取顶层对象中的若干字段（其他字段逐个元素跳过，不整体解码）
+
+    Args:
+        chunks: JSON 对象的字节块
+        keys: 字段名
+
+    Returns:
+        {字段名: 值}（不存在的字段不包含在结果中）
+    """
+    wanted = set(keys)
+    values = {}
+    reader = JSONStreamReader(chunks)
+    for name in reader.iter_object():
+        if name in wanted:
+            values[name] = reader.read_value()
+            if len(values) == len(wanted):
+                break
+        else:
+            reader.skip_value()
+    return values
@@ -3,8 +3,16 @@
 提供命令行界面进行播客分析
 """
 
+import os
 import sys
+import json
+import time
 import argparse
+import shutil
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
 from loguru import logger
 
@@ -17,8 +25,22 @@ sys.path.insert(0, str(Path(__file__).parent))
 from config import get_config
 from database import get_db
 from audio_fetcher import AudioFetcher, AudioFetchError, AudioQualityError
-from transcriber_qwen import QwenTranscriber, TranscriptionError
+from transcriber_qwen import (QwenTranscriber, TranscriptionError, ASRTaskFailedError, save_sentences,
+                              write_sentences, iter_sentences_file, paragraphs_from_groups)
 from storage_manager import StorageManager
+from artifacts import content_hash
+from audio_cache import AudioCache, link_or_copy
+from asr_cache import ASRCache, cache_key
+from json_stream import iter_file_chunks, iter_array_items, read_fields
+from episode_resolver import EpisodeResolver
+from audio_probe import probe_audio, AudioProbeError
+from audio_chunker import (ChunkingError, detect_silences, plan_chunks, extract_chunks, chunk_path,
+                           sentences_from_raw, merge_chunk_sentences)
+from feeds import FeedPoller, FeedError
+import rate_limiter
+import http_client
+import admission
+import media_server
 
 logger.info("使用通义千问 API 模式")
 
@@ -47,202 +69,1144 @@ def setup_logging(config):
     )
 
 
-def process_podcast(url: str, config, db):
+def build_audio_cache(config, db) -> AudioCache:
+    """根据配置创建音频缓存"""
+    return AudioCache(
+        db,
+        config.get("storage.audio_cache_dir", "data/cache/audio"),
+        max_mb=config.get("storage.audio_cache_max_mb", 4096)
+    )
+
+
+def build_fetcher(config, session=None, db=None) -> AudioFetcher:
+    """根据配置创建音频获取器（默认使用进程内共享的 HTTP 会话，传入 db 时启用音频缓存）"""
+    audio_cache = build_audio_cache(config, db) if db else None
+    return AudioFetcher({
+        "resolver": build_resolver(config, session=session, db=db),
+        "user_agent": config.get("download.user_agent"),
+        "timeout": config.get("download.timeout"),
+        "max_retries": config.get("download.max_retries"),
+        "chunk_size": config.get("download.chunk_size"),
+        "min_duration": config.get("audio_validation.min_duration"),
+        "min_sample_rate": config.get("audio_validation.min_sample_rate"),
+        "segment_workers": config.get("download.segment_workers"),
+        "min_segment_mb": config.get("download.min_segment_mb"),
+        "session": session,
+        "audio_cache": audio_cache
+    })
+
+
+def build_resolver(config, session=None, db=None) -> EpisodeResolver:
+    """根据配置创建节目页面解析器（传入 db 时缓存解析结果）"""
+    return EpisodeResolver(
+        session=session,
+        db=db,
+        ttl=config.get("resolver.ttl", 86400),
+        concurrency=config.get("resolver.concurrency", 10),
+        timeout=config.get("download.timeout", 30),
+        user_agent=config.get("download.user_agent")
+    )
+
+
+def build_feed_poller(config, db, enqueue=None) -> FeedPoller:
+    """根据配置创建订阅源轮询器（enqueue 为空时直接写入任务表）"""
+    return FeedPoller(
+        db,
+        enqueue=enqueue,
+        check_interval=config.get("feeds.check_interval", 1800),
+        initial_items=config.get("feeds.initial_items", 1),
+        timeout=config.get("download.timeout", 30),
+        user_agent=config.get("download.user_agent")
+    )
+
+
+def build_transcriber(config, session=None) -> QwenTranscriber:
+    """根据配置创建转录器（默认使用进程内共享的 HTTP 会话）"""
+    return QwenTranscriber({
+        "api_key": config.get("whisper.qwen_api_key"),
+        "language": config.get("whisper.language"),
+        "model": config.get("whisper.qwen_model", "paraformer-v2"),
+        "diarization": config.get("whisper.diarization", True),
+        "paragraph_gap": config.get("analyzer.paragraph_gap"),
+        "poll_interval": config.get("whisper.poll_interval"),
+        "poll_max_interval": config.get("whisper.poll_max_interval"),
+        "poll_duration_ratio": config.get("whisper.poll_duration_ratio", 0.05),
+        "result_workers": config.get("whisper.result_workers"),
+        "download_workers": config.get("whisper.download_workers"),
+        "download_retries": config.get("whisper.download_retries"),
+        "batch_size": config.get("whisper.batch_size"),
+        "batch_window": config.get("whisper.batch_window", 2.0),
+        "session": session
+    })
+
+
+def build_asr_cache(config, db) -> ASRCache:
+    """根据配置创建 ASR 结果缓存"""
+    return ASRCache(
+        db,
+        config.get("storage.asr_cache_dir", "data/cache/asr"),
+        max_mb=config.get("whisper.cache_max_mb", 2048)
+    )
+
+
+# 各阶段在总体进度中所占的区间（百分比）
+PROGRESS_RANGES = {
+    "fetch": (0, 5),
+    "download": (5, 30),
+    "transcribe": (30, 90),
+    "render": (90, 100),
+    "resegment": (0, 100),
+}
+
+# ASR 任务状态对应的转录阶段内进度（0-1）
+ASR_STATUS_PROGRESS = {
+    "SUBMITTING": 0.0,
+    "PENDING": 0.1,
+    "RUNNING": 0.3,
+    "SUCCEEDED": 0.9,
+}
+
+
+def report_progress(job: dict, stage: str, fraction: float = 0.0, **detail):
     """
-    处理播客的完整流程
+    上报任务进度（任务上下文中有 on_progress 回调时生效）
 
     Args:
-        url: 播客页面 URL
+        job: 任务上下文
+        stage: 阶段名称（见 PROGRESS_RANGES）
+        fraction: 阶段内完成比例（0-1）
+        **detail: 阶段详情
+    """
+    callback = job.get("on_progress")
+    if not callback:
+        return
+
+    start, end = PROGRESS_RANGES.get(stage, (0, 100))
+    fraction = max(0.0, min(1.0, fraction))
+    try:
+        callback(stage, start + (end - start) * fraction, detail)
+    except Exception as e:
+        logger.debug(f"进度上报失败: {e}")
+
+
+def _checkpointed_audio_path(db, podcast_id: str):
+    """
+    查找已下载完成的音频（检查点或数据库中记录的路径，文件需仍然存在）
+
+    Returns:
+        (音频路径, 检查点数据)，未找到时音频路径为 None
+    """
+    checkpoint = db.get_checkpoints(podcast_id).get("audio") or {}
+    podcast = db.get_podcast(podcast_id) or {}
+
+    # 重命名后数据库中的 audio_file_path 会更新，优先使用
+    for candidate in (podcast.get("audio_file_path"), checkpoint.get("audio_path")):
+        if candidate and Path(candidate).exists():
+            return candidate, checkpoint
+    return None, checkpoint
+
+
+def fetch_stage(job: dict, fetcher: AudioFetcher, config, db):
+    """
+    流水线阶段：音频获取（已有音频检查点时跳过下载）
+
+    Args:
+        job: 任务上下文（需包含 podcast_id, url）
+        fetcher: 音频获取器
         config: 配置对象
         db: 数据库对象
     """
-    logger.info(f"开始处理播客: {url}")
+    podcast_id = job["podcast_id"]
+
+    audio_path, checkpoint = _checkpointed_audio_path(db, podcast_id)
+    if audio_path:
+        logger.info(f"[{podcast_id}] 从检查点恢复音频，跳过下载: {audio_path}")
+        report_progress(job, "download", 1.0, cached=True)
+        job["audio_path"] = audio_path
+        job["audio_url"] = checkpoint.get("audio_url") or (db.get_podcast(podcast_id) or {}).get("audio_url")
+        db.update_podcast(podcast_id, status="transcribing")
+        return
+
+    logger.info(f"[{podcast_id}] 音频获取: {job['url']}")
+
+    db.update_podcast(podcast_id, status="downloading")
+    report_progress(job, "fetch", 0.0, url=job["url"])
+
+    def on_download(downloaded, total):
+        report_progress(job, "download", downloaded / total if total else 0.0,
+                        downloaded=downloaded, total=total)
+
+    def on_save_path(save_path, audio_url):
+        # 下载开始前记录保存路径：中断后重试时继续下载同一个 .part 文件
+        db.save_checkpoint(podcast_id, "audio", {"download_path": save_path, "audio_url": audio_url})
+
+    # 保存路径按播客 ID 固定（同一播客重试时断点续传，不同播客互不影响）
+    fetch_kwargs = {
+        "save_dir": config.get("storage.audio_dir"),
+        "on_progress": on_download,
+        "file_stem": f"podcast_{podcast_id}",
+        "on_save_path": on_save_path,
+    }
+    if job.get("enclosure_url"):
+        # 订阅源已提供音频地址，不再抓取节目页面
+        audio_path, metadata = fetcher.fetch_audio(job["enclosure_url"], **fetch_kwargs)
+    else:
+        audio_path, metadata = fetcher.fetch(job["url"], **fetch_kwargs)
+
+    db.save_checkpoint(podcast_id, "audio", {
+        "audio_path": audio_path,
+        "audio_url": metadata["audio_url"],
+        "file_size": metadata["file_size"],
+        "sha256": metadata["sha256"],
+    })
+
+    # 更新播客信息（包括音频文件路径）
+    updates = {}
+    # 提交时未填写标题的播客使用页面中的节目标题
+    if metadata.get("title") and not (db.get_podcast(podcast_id) or {}).get("title"):
+        updates["title"] = metadata["title"]
+    db.update_podcast(
+        podcast_id,
+        audio_url=metadata["audio_url"],
+        duration=round(metadata["duration"]),
+        sample_rate=metadata["sample_rate"],
+        channels=metadata["channels"],
+        file_size=metadata["file_size"],
+        audio_file_path=audio_path,  # 保存音频文件路径
+        audio_sha256=metadata["sha256"],
+        status="transcribing",
+        **updates
+    )
 
-    # 1. 创建播客记录
-    podcast_id = db.create_podcast(url)
-    logger.info(f"创建播客记录: {podcast_id}")
+    job["audio_path"] = audio_path
+    job["audio_url"] = metadata["audio_url"]
+    job["duration"] = metadata["duration"]
+    logger.info(f"✓ 音频获取成功: {audio_path}")
+
+
+def _asr_checkpoint_usable(checkpoint: dict, model: str, audio_sha256: str = None) -> bool:
+    """ASR 结果检查点是否可用（模型或音频内容不一致、结果文件缺失时不可用）"""
+    if not checkpoint or checkpoint.get("model") != model:
+        return False
+    if audio_sha256 and checkpoint.get("audio_sha256") not in (None, audio_sha256):
+        logger.info("音频内容已变化，ASR 结果检查点失效")
+        return False
+    return any(path and Path(path).exists() for path in (checkpoint.get("sentences_path"), checkpoint.get("raw_path")))
+
+
+def _asr_cache_key(transcriber: QwenTranscriber, audio_sha256: str, config, chunked: bool = False) -> str:
+    """ASR 结果缓存键：音频内容 + 模型 + 识别参数（实际分段转录时还包括分段参数，分段结果与整段结果不混用）"""
+    options = transcriber.cache_options()
+    if chunked:
+        options["chunking"] = {
+            name: config.get(f"chunking.{name}", default)
+            for name, default in (("chunk_seconds", 900), ("overlap_seconds", 5), ("search_seconds", 60),
+                                  ("silence_db", -35), ("silence_min", 0.4))
+        }
+    return cache_key(audio_sha256, transcriber.model, options)
+
+
+def _chunk_dir(podcast_id: str, config) -> Path:
+    """长音频分段文件目录"""
+    return Path(config.get("chunking.chunk_dir", "data/cache/chunks")) / podcast_id
+
+
+def _chunking_available(job: dict, config) -> bool:
+    """
+    是否可以分段转录：已启用、音频足够长，且分段文件能以签名 URL 提交给 ASR 服务
+    （分段只存在于本地，提交 file:// 路径时 ASR 服务无法读取）
+    """
+    duration = job.get("duration") or 0
+    if not config.get("chunking.enabled", False) or duration < config.get("chunking.min_duration", 3600):
+        return False
+    if not media_server.get_publisher().can_publish(str(_chunk_dir(job["podcast_id"], config))):
+        logger.warning(f"[{job['podcast_id']}] 分段目录无法发布为签名 URL（需配置 media.public_base_url，"
+                       f"且 chunking.chunk_dir 在 media.roots 中），按整段转录")
+        return False
+    return True
+
+
+def _plan_long_audio(job: dict, config):
+    """
+    规划长音频分段（不能分段、音频不够长或无法检测静音时返回 None，按整段转录）
+
+    Args:
+        job: 任务上下文（需包含 podcast_id, audio_path, duration）
+        config: 配置对象
+
+    Returns:
+        分段列表（见 audio_chunker.plan_chunks）或 None
+    """
+    if not _chunking_available(job, config):
+        return None
+    duration = job["duration"]
 
     try:
-        # 2. 音频获取
-        logger.info("=" * 50)
-        logger.info("步骤 1/2: 音频获取")
-        logger.info("=" * 50)
+        silences = detect_silences(
+            job["audio_path"],
+            noise_db=config.get("chunking.silence_db", -35),
+            min_silence=config.get("chunking.silence_min", 0.4)
+        )
+    except ChunkingError as e:
+        logger.warning(f"[{job['podcast_id']}] 无法分段，按整段转录: {e}")
+        return None
+
+    chunks = plan_chunks(
+        duration, silences,
+        chunk_seconds=config.get("chunking.chunk_seconds", 900),
+        overlap_seconds=config.get("chunking.overlap_seconds", 5),
+        search_seconds=config.get("chunking.search_seconds", 60)
+    )
+    return chunks if len(chunks) > 1 else None
+
+
+def _transcribe_chunked_async(job: dict, transcriber: QwenTranscriber, chunks: list, config, db,
+                              audio_sha256: str, tasks: dict = None, on_result=None) -> Future:
+    """
+    分段并行转录长音频，全部完成后合并句子（时间偏移、重叠去重、说话人对齐）
+
+    分段规划和每个分段的任务 ID 保存在 asr_chunks 检查点中，恢复时已提交的分段重新轮询原任务，
+    只截取和提交尚未提交（或任务已失败）的分段。
+
+    Args:
+        job: 任务上下文（需包含 podcast_id, audio_path）
+        transcriber: 转录器
+        chunks: 分段规划
+        config: 配置对象
+        db: 数据库对象
+        audio_sha256: 音频内容的 SHA-256（检查点与音频对应）
+        tasks: 检查点中已提交的分段任务 {分段序号: {task_id, file_urls}}
+        on_result: 合并后的原始结果回调 (raw_results)，用于保存检查点和句子文件
+
+    Returns:
+        合并结果保存后完成的 Future
+
+    Raises:
+        ChunkingError: 截取分段失败
+    """
+    podcast_id = job["podcast_id"]
+    chunk_dir = _chunk_dir(podcast_id, config)
+    tasks = {str(index): task for index, task in (tasks or {}).items()}
+    tasks_lock = threading.Lock()
+
+    def save_chunk_checkpoint():
+        with tasks_lock:
+            db.save_checkpoint(podcast_id, "asr_chunks", {
+                "model": transcriber.model,
+                "audio_sha256": audio_sha256,
+                "chunks": chunks,
+                "tasks": dict(tasks),
+            })
+
+    def remember_task(index: int, task_id: str, file_urls: list):
+        with tasks_lock:
+            tasks[str(index)] = {"task_id": task_id, "file_urls": file_urls}
+        save_chunk_checkpoint()
+
+    def forget_task(index: int):
+        # 原任务已失败或已过期：重新截取（文件已删除时）并提交该分段
+        with tasks_lock:
+            tasks.pop(str(index), None)
+        save_chunk_checkpoint()
+        if not Path(chunk_path(str(chunk_dir), index)).exists():
+            extract_chunks(job["audio_path"], chunks, str(chunk_dir), indexes=[index])
+
+    pending = [index for index in range(len(chunks))
+               if str(index) not in tasks and not Path(chunk_path(str(chunk_dir), index)).exists()]
+    logger.info(f"[{podcast_id}] 长音频分段转录: {len(chunks)} 段（{len(chunks) - len(pending)} 段已截取或已提交）")
+    chunk_paths = extract_chunks(job["audio_path"], chunks, str(chunk_dir),
+                                 max_workers=config.get("chunking.extract_workers", 4), indexes=pending)
+    save_chunk_checkpoint()
+
+    stage_future = Future()
+    raw_by_chunk = [None] * len(chunks)
+    state = {"remaining": len(chunks), "failed": False}
+    lock = threading.Lock()
+    report_progress(job, "transcribe", 0.0, state="SUBMITTING", chunks=len(chunks))
+
+    def on_chunk_done(index: int, future: Future):
+        error = future.exception()
+        with lock:
+            if state["failed"]:
+                return
+            if error is not None:
+                # 任一分段失败即整体失败，之后完成的分段不再处理
+                state["failed"] = True
+            else:
+                state["remaining"] -= 1
+            remaining = state["remaining"]
+        if error is not None:
+            stage_future.set_exception(error)
+            return
+
+        report_progress(job, "transcribe", 0.9 * (len(chunks) - remaining) / len(chunks),
+                        state="RUNNING", chunks=len(chunks), chunks_done=len(chunks) - remaining)
+        if remaining:
+            return
+
+        try:
+            sentences = merge_chunk_sentences(chunks, [sentences_from_raw(raw) for raw in raw_by_chunk])
+            raw_results = [{"sentences": sentences}]
+            if on_result:
+                on_result(raw_results)
+            db.clear_checkpoints(podcast_id, ["asr_chunks"])
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+            logger.info(f"[{podcast_id}] 分段转录合并完成: {len(sentences)} 句")
+        except Exception as e:
+            stage_future.set_exception(e)
+        else:
+            stage_future.set_result(None)
+
+    for index, (chunk, path) in enumerate(zip(chunks, chunk_paths)):
+        task = tasks.get(str(index)) or {}
+        try:
+            future = _transcribe_resumable(
+                transcriber, path,
+                task_id=task.get("task_id"),
+                file_urls=task.get("file_urls"),
+                on_resubmit=lambda index=index: forget_task(index),
+                retries=config.get("whisper.resume_retries", 2),
+                label=f"[{podcast_id}] 分段 {index}: ",
+                audio_duration=chunk["end"] - chunk["start"],
+                on_submit=lambda task_id, file_urls, index=index: remember_task(index, task_id, file_urls),
+                on_result=lambda raw, index=index: raw_by_chunk.__setitem__(index, raw)
+            )
+        except Exception as e:
+            # 提交失败：已提交的分段任务保存在检查点中，下次恢复时重新轮询
+            future = Future()
+            future.set_exception(e)
+        future.add_done_callback(lambda future, index=index: on_chunk_done(index, future))
+
+    return stage_future
+
+
+def _transcribe_resumable(transcriber: QwenTranscriber, audio_path: str, task_id: str = None,
+                          file_urls: list = None, on_resubmit=None, retries: int = 2, label: str = "",
+                          **transcribe_kwargs) -> Future:
+    """
+    转录并按失败原因处理重试
+
+    有任务 ID（检查点中的任务，或本次提交后得到的任务）时：任务本身失败、不存在或已过期（ASRTaskFailedError）
+    且是从检查点恢复的任务时重新提交；结果下载失败、查询暂时失败等其他错误只对同一任务重新查询和下载，
+    最多 retries 次，不为已完成的识别重复付费。
+
+    Args:
+        transcriber: 转录器
+        audio_path: 音频文件路径
+        task_id: 检查点中已提交的任务 ID
+        file_urls: 该任务中属于本音频的文件 URL
+        on_resubmit: 放弃检查点中的任务、重新提交前的回调（用于清除任务检查点）
+        retries: 对同一任务重试查询和下载的次数
+        label: 日志前缀
+        **transcribe_kwargs: 传给 transcribe_async 的其他参数（on_submit 会被包装以记录新任务 ID）
+
+    Returns:
+        转录完成的 Future
+
+    Raises:
+        TranscriptionError: 首次提交失败
+    """
+    result = Future()
+    current = {"task_id": task_id, "file_urls": file_urls, "resumed": bool(task_id), "attempt": 0}
+    on_submit = transcribe_kwargs.pop("on_submit", None)
+
+    def record_submit(new_task_id, new_file_urls):
+        current.update(task_id=new_task_id, file_urls=new_file_urls, resumed=False, attempt=0)
+        if on_submit:
+            on_submit(new_task_id, new_file_urls)
+
+    def start(resume: bool):
+        if resume:
+            future = transcriber.transcribe_async(audio_path, task_id=current["task_id"],
+                                                  file_urls=current["file_urls"], on_submit=record_submit,
+                                                  **transcribe_kwargs)
+        else:
+            future = transcriber.transcribe_async(audio_path, on_submit=record_submit, **transcribe_kwargs)
+        future.add_done_callback(done)
+
+    def done(future: Future):
+        error = future.exception()
+        if error is None:
+            result.set_result(future.result())
+            return
+        try:
+            if isinstance(error, ASRTaskFailedError) and current["resumed"]:
+                # 检查点中的任务已失败或已过期，重新提交
+                logger.warning(f"{label}恢复的转录任务已失败，重新提交: {error}")
+                current.update(task_id=None, file_urls=None, resumed=False)
+                if on_resubmit:
+                    on_resubmit()
+                start(resume=False)
+            elif current["task_id"] and not isinstance(error, ASRTaskFailedError) \
+                    and current["attempt"] < retries:
+                # 任务可能已完成，只是查询或下载结果失败：重新查询同一任务
+                current["attempt"] += 1
+                logger.warning(f"{label}获取转录结果失败，重新查询任务 {current['task_id']}"
+                               f"（{current['attempt']}/{retries}）: {error}")
+                start(resume=True)
+            else:
+                result.set_exception(error)
+        except Exception as e:
+            result.set_exception(e)
+
+    if task_id:
+        logger.info(f"{label}从检查点恢复转录任务，重新轮询: {task_id}")
+    start(resume=bool(task_id))
+    return result
+
+
+def _completed_future(result=None) -> Future:
+    """创建已完成的 Future"""
+    future = Future()
+    future.set_result(result)
+    return future
+
 
-        db.update_podcast(podcast_id, status="downloading")
+def transcribe_stage(job: dict, transcriber: QwenTranscriber, db, config=None):
+    """
+    流水线阶段：语音转录（阻塞直到转录完成，参数见 transcribe_stage_async）
+    """
+    transcribe_stage_async(job, transcriber, db, config).result()
+
+
+def transcribe_stage_async(job: dict, transcriber: QwenTranscriber, db, config=None) -> Future:
+    """
+    流水线阶段：语音转录（仅使用通义千问 API）
+
+    已有 ASR 结果检查点时直接复用；相同音频内容、模型和识别参数已有缓存结果时直接复用；
+    已有任务 ID 检查点时重新轮询该任务而不是重新提交。
+    提交后由共享轮询器等待任务完成，调用线程立即返回。
+    转录结果边下载边解析，逐句写入句子文件（检查点目录），不在内存中展开；段落由 render_stage 从句子文件生成。
 
-        fetcher = AudioFetcher({
-            "user_agent": config.get("download.user_agent"),
-            "timeout": config.get("download.timeout"),
-            "max_retries": config.get("download.max_retries"),
-            "chunk_size": config.get("download.chunk_size")
+    Args:
+        job: 任务上下文（需包含 podcast_id, audio_path，可选 audio_url、duration）
+        transcriber: 转录器
+        db: 数据库对象
+        config: 配置对象（用于定位检查点目录）
+
+    Returns:
+        ASR 结果检查点保存后完成的 Future
+
+    Raises:
+        TranscriptionError: 提交失败
+    """
+    podcast_id = job["podcast_id"]
+    logger.info(f"[{podcast_id}] 语音转录")
+
+    db.update_podcast(podcast_id, status="transcribing")
+    job["model_name"] = f"qwen-{transcriber.model}"
+    # 重新分段时保存过段落间隔的播客沿用该值，否则使用配置值
+    stored_gap = (db.get_podcast(podcast_id) or {}).get("paragraph_gap")
+    job["paragraph_gap"] = stored_gap if stored_gap is not None else transcriber.paragraph_gap
+
+    config = config or get_config()
+    checkpoints = db.get_checkpoints(podcast_id)
+    audio_sha256 = (checkpoints.get("audio") or {}).get("sha256")
+    if _asr_checkpoint_usable(checkpoints.get("asr_result"), transcriber.model, audio_sha256) \
+            and _ensure_sentences_file(podcast_id, config, db):
+        logger.info(f"[{podcast_id}] 从检查点恢复 ASR 结果，跳过转录")
+        return _completed_future()
+
+    storage = StorageManager(config)
+    if not audio_sha256:
+        audio_sha256 = content_hash(job["audio_path"])
+    raw_path = storage.get_checkpoint_path(podcast_id, "asr_raw.json")
+    sentences_path = storage.get_checkpoint_path(podcast_id, SENTENCES_FILENAME)
+    storage.ensure_directory(raw_path)
+
+    def save_asr_checkpoint(task_id=None, has_raw=True):
+        db.save_checkpoint(podcast_id, "asr_result", {
+            "raw_path": str(raw_path) if has_raw else None,
+            "sentences_path": str(sentences_path),
+            "task_id": task_id,
+            "model": transcriber.model,
+            "audio_sha256": audio_sha256,
         })
 
-        audio_path, metadata = fetcher.fetch(
-            url,
-            save_dir=config.get("storage.audio_dir")
-        )
+    # 超长音频在静音处切成重叠分段并行转录（需启用 chunking、安装 ffmpeg 并能发布签名 URL）；
+    # 已有分段检查点时沿用其中的规划和各分段的任务
+    chunk_checkpoint = checkpoints.get("asr_chunks") or {}
+    if chunk_checkpoint.get("chunks") and chunk_checkpoint.get("model") == transcriber.model \
+            and chunk_checkpoint.get("audio_sha256") == audio_sha256 and _chunking_available(job, config):
+        chunks = chunk_checkpoint["chunks"]
+    else:
+        chunk_checkpoint = {}
+        chunks = _plan_long_audio(job, config)
+
+    # 相同音频内容用相同参数（按实际是否分段）转录过（重试、重复提交、其他播客的同一期节目）时复用缓存结果
+    asr_cache = build_asr_cache(config, db)
+    key = _asr_cache_key(transcriber, audio_sha256, config, chunked=bool(chunks))
+    cached_path = asr_cache.get(key)
+    if cached_path:
+        logger.info(f"[{podcast_id}] 命中 ASR 结果缓存，跳过转录")
+        link_or_copy(cached_path, str(sentences_path))
+        save_asr_checkpoint(has_raw=False)
+        if chunk_checkpoint:
+            db.clear_checkpoints(podcast_id, ["asr_chunks"])
+            shutil.rmtree(_chunk_dir(podcast_id, config), ignore_errors=True)
+        report_progress(job, "transcribe", 1.0, cached=True)
+        return _completed_future()
+
+    def store_result(raw=None, task_id=None):
+        # raw 为空时原始结果和句子文件已由转录器流式写入
+        if raw is not None:
+            with open(raw_path, 'w', encoding='utf-8') as f:
+                json.dump(raw, f, ensure_ascii=False)
+            save_sentences(str(sentences_path), raw)
+        save_asr_checkpoint(task_id)
+        try:
+            asr_cache.put(key, audio_sha256, transcriber.model, str(sentences_path))
+        except OSError as e:
+            logger.warning(f"[{podcast_id}] 写入 ASR 结果缓存失败: {e}")
+
+    report_progress(job, "transcribe", 0.0, state="SUBMITTING")
+    transcribe_started = time.time()
+
+    def on_status(state):
+        report_progress(job, "transcribe", ASR_STATUS_PROGRESS.get(state, 0.3),
+                        state=state, elapsed=round(time.time() - transcribe_started))
+
+    if chunks:
+        return _transcribe_chunked_async(job, transcriber, chunks, config, db, audio_sha256,
+                                         tasks=chunk_checkpoint.get("tasks"), on_result=store_result)
+
+    task_checkpoint = checkpoints.get("asr_task") or {}
+    task_id = task_checkpoint.get("task_id") if task_checkpoint.get("model") == transcriber.model else None
+
+    def on_submit(new_task_id, file_urls):
+        task_checkpoint.update({
+            "task_id": new_task_id,
+            "file_urls": file_urls,
+            "model": transcriber.model,
+            "submitted_at": time.time(),
+        })
+        db.save_checkpoint(podcast_id, "asr_task", task_checkpoint)
+
+    def on_result(raw):
+        store_result(raw, task_checkpoint.get("task_id") or task_id)
+
+    return _transcribe_resumable(
+        transcriber, job["audio_path"],
+        task_id=task_id,
+        file_urls=task_checkpoint.get("file_urls"),
+        on_resubmit=lambda: db.clear_checkpoints(podcast_id, ["asr_task"]),
+        retries=config.get("whisper.resume_retries", 2),
+        label=f"[{podcast_id}] ",
+        audio_url=job.get("audio_url"),
+        audio_duration=job.get("duration"),
+        on_submit=on_submit,
+        on_result=on_result,
+        on_status=on_status,
+        output_paths=(str(raw_path), str(sentences_path)),
+        audio_sha256=audio_sha256,
+    )
 
-        # 更新播客信息（包括音频文件路径）
-        db.update_podcast(
-            podcast_id,
-            audio_url=metadata["audio_url"],
-            duration=int(metadata["duration"]),
-            file_size=metadata["file_size"],
-            audio_file_path=audio_path,  # 保存音频文件路径
-            status="transcribing"
-        )
 
-        logger.info(f"✓ 音频获取成功: {audio_path}")
+# 句子文件（精简的句子级 ASR 结果，分段和重新分段的输入）
+SENTENCES_FILENAME = "sentences.json.gz"
 
-        # 3. 语音转录（仅使用通义千问 API）
-        logger.info("=" * 50)
-        logger.info("步骤 2/2: 语音转录")
-        logger.info("=" * 50)
 
-        transcriber_config = {
-            "api_key": config.get("whisper.qwen_api_key"),
-            "language": config.get("whisper.language"),
-            "model": config.get("whisper.qwen_model", "paraformer-v2"),
-            "paragraph_gap": config.get("analyzer.paragraph_gap")
-        }
-        transcriber = QwenTranscriber(transcriber_config)
-        paragraphs = transcriber.transcribe(audio_path, audio_url=metadata["audio_url"])
-        model_name = f"qwen-{transcriber_config['model']}"
+def _ensure_sentences_file(podcast_id: str, config, db):
+    """
+    获取播客的句子文件，旧数据只有原始 ASR 结果时从中生成
 
-        # 获取播客信息（包含栏目）
-        podcast = db.get_podcast(podcast_id)
-        category = podcast.get('category', '') if podcast else ''
+    Returns:
+        句子文件路径，没有任何 ASR 结果时返回 None
+    """
+    checkpoint = db.get_checkpoints(podcast_id).get("asr_result") or {}
+    sentences_path = checkpoint.get("sentences_path")
+    if sentences_path and Path(sentences_path).exists():
+        return sentences_path
 
-        # 初始化存储管理器
-        storage = StorageManager(config)
+    raw_path = checkpoint.get("raw_path")
+    if not raw_path or not Path(raw_path).exists():
+        return None
 
-        # 生成转录文件（JSON, Markdown, PDF）
-        logger.info("=" * 50)
-        logger.info("生成转录文件")
-        logger.info("=" * 50)
+    sentences_path = str(StorageManager(config).get_checkpoint_path(podcast_id, SENTENCES_FILENAME))
+    try:
+        write_sentences(sentences_path, iter_sentences_file(raw_path))
+    except (OSError, ValueError) as e:
+        logger.warning(f"[{podcast_id}] 生成句子文件失败: {e}")
+        return None
+    db.save_checkpoint(podcast_id, "asr_result", {**checkpoint, "sentences_path": sentences_path})
+    return sentences_path
 
-        from transcript_formatter import format_transcript
-        import json
-
-        # 1. 保存 JSON 格式（用于 Web 界面对话式布局）
-        transcript_json_path = storage.get_transcript_path(podcast_id, category, "json")
-        storage.ensure_directory(transcript_json_path)
-
-        json_data = {
-            "segments": paragraphs,
-            "metadata": {
-                "podcast_id": podcast_id,
-                "model": model_name,
-                "category": category or "未分类",
-                "speaker_names": {}  # 初始为空，用户可以通过 Web 界面重命名
-            },
-            "word_count": sum(len(p["text"]) for p in paragraphs),
-            "paragraph_count": len(paragraphs)
-        }
 
-        with open(transcript_json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
-        logger.info(f"✓ JSON 文件: {transcript_json_path}")
+def _read_json(path):
+    """读取 JSON 文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_segments_json(path, segments, metadata: dict) -> dict:
+    """
+    逐段写入转录 JSON（段落来自生成器时内存中只有当前段落），写完后落盘并原子替换
+
+    Args:
+        path: 转录 JSON 路径
+        segments: 段落迭代器
+        metadata: 元数据
+
+    Returns:
+        {word_count, paragraph_count}
+    """
+    counts = {"word_count": 0, "paragraph_count": 0}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "metadata": ')
+        f.write(json.dumps(metadata, ensure_ascii=False))
+        f.write(',\n  "segments": [')
+        for segment in segments:
+            f.write(",\n    " if counts["paragraph_count"] else "\n    ")
+            f.write(json.dumps(segment, ensure_ascii=False))
+            counts["word_count"] += len(segment["text"])
+            counts["paragraph_count"] += 1
+        f.write("\n  ],\n" if counts["paragraph_count"] else "],\n")
+        f.write(f'  "word_count": {counts["word_count"]},\n  "paragraph_count": {counts["paragraph_count"]}\n}}\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return counts
+
+
+def _read_transcript_summary(path) -> dict:
+    """读取转录 JSON 的元数据和统计（逐段跳过段落，不整体加载）"""
+    return read_fields(iter_file_chunks(path), ["metadata", "word_count", "paragraph_count"])
+
+
+def _write_json_durable(path, data):
+    """写入 JSON 文件并落盘（先写临时文件再原子替换，避免留下不完整的文件）"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def build_transcript_graph(podcast_id: str, config, db, paragraphs=None,
+                           model_name: str = None, paragraph_gap: float = None,
+                           content_type: str = None):
+    """
+    构建单个播客的转录产物依赖图：原始 ASR 结果 → 段落 JSON → Markdown
 
-        # 2. 生成 Markdown 文件
-        transcript_md_path = storage.get_transcript_path(podcast_id, category, "md")
-        storage.ensure_directory(transcript_md_path)
+    PDF 不在依赖图中，下载时由 pdf_renderer 按需生成并缓存。
 
+    Args:
+        podcast_id: 播客 ID
+        config: 配置对象
+        db: 数据库对象
+        paragraphs: 刚转录得到的段落（为空时从句子文件重新分段）
+        model_name: 转录模型名称（为空时沿用已有 JSON 中的记录）
+        paragraph_gap: 段落间隔阈值（秒，为空时使用播客记录中保存的值，没有时使用 analyzer.paragraph_gap）
+        content_type: 内容类型（podcast/documentary）
+
+    Returns:
+        (依赖图, {产物名称: 路径})
+    """
+    from artifacts import ArtifactGraph
+    from transcript_formatter import format_transcript, TranscriptFormatter
+
+    podcast = db.get_podcast(podcast_id) or {}
+    category = podcast.get('category', '') or ''
+    title = podcast.get('title', '') or ''
+    content_type = content_type or podcast.get('content_type') or 'podcast'
+    if paragraph_gap is None:
+        paragraph_gap = podcast.get("paragraph_gap")
+    if paragraph_gap is None:
+        paragraph_gap = config.get("analyzer.paragraph_gap", 2.0)
+
+    storage = StorageManager(config)
+    paths = {
+        "segments_json": str(storage.get_transcript_path(podcast_id, category, "json")),
+        "md": str(storage.get_transcript_path(podcast_id, category, "md")),
+    }
+
+    existing = {}
+    if Path(paths["segments_json"]).exists():
+        try:
+            existing = _read_transcript_summary(paths["segments_json"])
+        except (OSError, ValueError):
+            existing = {}
+    existing_metadata = existing.get("metadata", {})
+    model_name = model_name or existing_metadata.get("model", "")
+
+    metadata = {
+        "podcast_id": podcast_id,
+        "model": model_name,
+        "category": category or "未分类",
+    }
+    if content_type == "documentary":
+        metadata["title"] = title
+        metadata["content_type"] = "documentary"
+
+    graph = ArtifactGraph(db, podcast_id)
+
+    sentences_path = _ensure_sentences_file(podcast_id, config, db)
+
+    def build_segments_json(target):
+        segments = paragraphs
+        if segments is None:
+            # 逐句读取句子文件、逐段写入 JSON，内存占用与节目时长无关
+            segments = paragraphs_from_groups(iter_sentences_file(sentences_path), paragraph_gap)
+
+        # 保留用户已经设置的说话人名称
+        speaker_names = {}
+        if Path(target).exists():
+            try:
+                speaker_names = _read_transcript_summary(target).get("metadata", {}).get("speaker_names", {})
+            except (OSError, ValueError):
+                speaker_names = {}
+
+        _write_segments_json(target, segments, {**metadata, "speaker_names": speaker_names})
+        logger.info(f"✓ JSON 文件: {target}")
+
+    if sentences_path:
+        graph.add_source("asr_sentences", sentences_path)
+        graph.add("segments_json", paths["segments_json"], build_segments_json,
+                  inputs=["asr_sentences"],
+                  params={"paragraph_gap": paragraph_gap, "metadata": metadata})
+    elif paragraphs is not None:
+        # 没有原始结果检查点（如旧数据），以本次段落内容作为输入
+        graph.add("segments_json", paths["segments_json"], build_segments_json,
+                  params={"paragraphs": paragraphs, "metadata": metadata})
+    else:
+        # 只有已生成的 JSON，把它当作源节点
+        graph.add_source("segments_json", paths["segments_json"])
+
+    def build_markdown(target):
+        data = _read_json(paths["segments_json"])
+        speaker_names = data.get("metadata", {}).get("speaker_names", {})
         format_transcript(
-            paragraphs,
-            metadata={
-                "podcast_id": podcast_id,
-                "model": model_name,
-                "category": category or "未分类",
-                "speaker_names": {}
-            },
+            data.get("segments", []),
+            metadata={**metadata, "speaker_names": speaker_names},
             output_format='markdown',
-            output_path=str(transcript_md_path)
+            output_path=target
         )
-        logger.info(f"✓ Markdown 文件: {transcript_md_path}")
+        logger.info(f"✓ Markdown 文件: {target}")
+
+    graph.add("md", paths["md"], build_markdown, inputs=["segments_json"],
+              params={"template": TranscriptFormatter.VERSION, "metadata": metadata})
+
+    return graph, paths
+
+
+def render_stage(job: dict, config, db):
+    """
+    流水线阶段：生成转录文件（JSON, Markdown）并标记完成
+
+    JSON 落盘后即标记完成；产物的输入哈希未变化时跳过生成（见 artifacts.ArtifactGraph）。
+    PDF 在下载时按需生成（见 pdf_renderer）。
+
+    Args:
+        job: 任务上下文（需包含 podcast_id, model_name，可选 paragraphs；没有段落时从句子文件生成）
+        config: 配置对象
+        db: 数据库对象
+    """
+    podcast_id = job["podcast_id"]
+    model_name = job["model_name"]
+
+    podcast = db.get_podcast(podcast_id)
+    category = podcast.get('category', '') if podcast else ''
+    title = podcast.get('title', '') if podcast else ''
+
+    logger.info(f"[{podcast_id}] 生成转录文件")
+    report_progress(job, "render", 0.0, step="json")
+
+    graph, paths = build_transcript_graph(
+        podcast_id, config, db,
+        paragraphs=job.get("paragraphs"),
+        model_name=model_name,
+        paragraph_gap=job.get("paragraph_gap"),
+        content_type=job.get("content_type", "podcast")
+    )
+    graph.build(["segments_json"])
+
+    transcript_json_path = paths["segments_json"]
+    transcript_md_path = paths["md"]
+
+    # 创建或更新转录记录（保存 JSON 路径，用于 Web 界面）
+    summary = _read_transcript_summary(transcript_json_path)
+    word_count = summary.get("word_count", 0)
+    db.upsert_transcript(
+        podcast_id,
+        transcript_json_path,  # 保存 JSON 路径
+        word_count=word_count,
+        model_version=model_name
+    )
+
+    db.save_checkpoint(podcast_id, "render", {
+        "json_path": transcript_json_path,
+        "md_path": transcript_md_path,
+    })
+
+    # 更新播客状态
+    db.update_podcast(podcast_id, status="completed")
+
+    # Markdown 是派生产物，生成失败不影响转录结果（可通过 rebuild 重新生成）
+    report_progress(job, "render", 0.5, step="markdown")
+    try:
+        graph.build()
+    except Exception as e:
+        logger.warning(f"⚠ Markdown 生成失败: {e}")
+
+    job.update({
+        "category": category,
+        "title": title,
+        "transcript_json_path": transcript_json_path,
+        "transcript_md_path": transcript_md_path,
+        "word_count": word_count,
+        "paragraph_count": summary.get("paragraph_count", 0),
+    })
+
+    logger.info("✓ 语音转录成功")
+    logger.info(f"✓ 转录字数: {word_count}")
+    if category:
+        logger.info(f"✓ 栏目分类: {category}")
 
-        # 3. 生成 PDF 文件（可选，需要 reportlab 库）
-        pdf_path = None
-        try:
-            transcript_pdf_path = storage.get_transcript_path(podcast_id, category, "pdf")
-            storage.ensure_directory(transcript_pdf_path)
-
-            format_transcript(
-                paragraphs,
-                metadata={
-                    "podcast_id": podcast_id,
-                    "model": model_name,
-                    "category": category or "未分类"
-                },
-                output_format='pdf',
-                output_path=str(transcript_pdf_path)
-            )
-            pdf_path = transcript_pdf_path
-            logger.info(f"✓ PDF 文件: {transcript_pdf_path}")
-        except ImportError:
-            logger.warning("⚠ 未安装 reportlab，跳过 PDF 生成。安装方法: pip install reportlab")
-        except Exception as e:
-            logger.warning(f"⚠ PDF 生成失败: {e}")
 
-        # 创建转录记录（保存 JSON 路径，用于 Web 界面）
-        word_count = sum(len(p["text"]) for p in paragraphs)
-        db.create_transcript(
+def rebuild_artifacts(podcast_id: str, config, db, force: bool = False, paragraph_gap: float = None) -> list:
+    """
+    重新生成已完成播客的过期产物（不会重新下载或转录）
+
+    Args:
+        podcast_id: 播客 ID
+        config: 配置对象
+        db: 数据库对象
+        force: 忽略哈希强制重建
+        paragraph_gap: 段落间隔阈值（秒）；指定时保存到播客记录，之后的 rebuild 和重新转录沿用该值；
+            为空时使用已保存的值，没有时使用 analyzer.paragraph_gap
+
+    Returns:
+        实际重建的产物名称列表
+    """
+    graph, paths = build_transcript_graph(podcast_id, config, db, paragraph_gap=paragraph_gap)
+    if not Path(paths["segments_json"]).exists() and graph.nodes["segments_json"]["source"]:
+        raise FileNotFoundError(f"未找到转录结果，请重新转录: {podcast_id}")
+
+    rebuilt = graph.build(force=force)
+    if paragraph_gap is not None:
+        db.update_podcast(podcast_id, paragraph_gap=paragraph_gap)
+
+    if "segments_json" in rebuilt:
+        data = _read_transcript_summary(paths["segments_json"])
+        db.upsert_transcript(
             podcast_id,
-            str(transcript_json_path),  # 保存 JSON 路径
-            word_count=word_count,
-            model_version=model_name
+            paths["segments_json"],
+            word_count=data.get("word_count", 0),
+            model_version=data.get("metadata", {}).get("model", "")
         )
 
-        # 更新播客状态
-        db.update_podcast(podcast_id, status="completed")
+    return rebuilt
+
+
+# 重新分段子进程内的配置和数据库连接（由 _init_resegment_worker 创建）
+_resegment_context = {}
+
+
+def _init_resegment_worker(config_path: str, db_path: str):
+    """重新分段子进程初始化：各子进程使用自己的配置对象和数据库连接"""
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    _resegment_context["config"] = get_config(config_path)
+    _resegment_context["db"] = get_db(db_path)
+
+
+def _resegment_worker(podcast_id: str, paragraph_gap: float, force: bool) -> list:
+    """在子进程中重新分段单个播客（返回重建的产物名称列表）"""
+    return rebuild_artifacts(podcast_id, _resegment_context["config"], _resegment_context["db"],
+                             force=force, paragraph_gap=paragraph_gap)
+
+
+def resegment_library(config, db, podcast_ids: list = None, paragraph_gap: float = None,
+                      force: bool = False, workers: int = None, on_progress=None) -> dict:
+    """
+    用本地句子文件重新分段（调整 paragraph_gap 后不需要重新转录），多个播客在进程池中并行处理
+
+    Args:
+        config: 配置对象
+        db: 数据库对象
+        podcast_ids: 播客 ID 列表（默认所有已完成的播客）
+        paragraph_gap: 段落间隔阈值（秒，为空时使用 analyzer.paragraph_gap）
+        force: 忽略哈希强制重建
+        workers: 进程数（默认 analyzer.resegment_workers，0 表示 CPU 核数）
+        on_progress: 进度回调 (stage, progress, detail)，每处理完一个播客调用一次
+
+    Returns:
+        {rebuilt: [播客 ID], unchanged: [播客 ID], failed: {播客 ID: 错误信息}}
+    """
+    podcast_ids = podcast_ids or [p["id"] for p in db.list_podcasts_by_status(["completed"])]
+    summary = {"rebuilt": [], "unchanged": [], "failed": {}}
+    job = {"on_progress": on_progress}
+    report_progress(job, "resegment", 0.0, total=len(podcast_ids), done=0)
+    if not podcast_ids:
+        report_progress(job, "resegment", 1.0, total=0, done=0, failed=0)
+        return summary
+
+    if workers is None:
+        workers = config.get("analyzer.resegment_workers", 0)
+    workers = min(len(podcast_ids), workers or os.cpu_count() or 1)
+
+    # spawn：子进程不继承父进程的数据库连接和线程
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_resegment_worker,
+                             initargs=(config.config_path, db.db_path)) as executor:
+        futures = {
+            executor.submit(_resegment_worker, podcast_id, paragraph_gap, force): podcast_id
+            for podcast_id in podcast_ids
+        }
+        for future in as_completed(futures):
+            podcast_id = futures[future]
+            try:
+                rebuilt = future.result()
+            except Exception as e:
+                logger.error(f"重新分段失败 {podcast_id}: {e}")
+                summary["failed"][podcast_id] = str(e)
+            else:
+                summary["rebuilt" if "segments_json" in rebuilt else "unchanged"].append(podcast_id)
+            done = len(summary["rebuilt"]) + len(summary["unchanged"]) + len(summary["failed"])
+            if done < len(podcast_ids):
+                report_progress(job, "resegment", done / len(podcast_ids), total=len(podcast_ids), done=done,
+                                failed=len(summary["failed"]))
+
+    logger.info(f"重新分段完成: 重建 {len(summary['rebuilt'])}, 无变化 {len(summary['unchanged'])}, "
+                f"失败 {len(summary['failed'])}")
+    report_progress(job, "resegment", 1.0, total=len(podcast_ids), done=len(podcast_ids), **summary)
+    return summary
+
+
+def mark_failed(job: dict, error: Exception, db):
+    """根据异常类型记录失败日志并更新播客状态"""
+    if isinstance(error, AudioFetchError):
+        logger.error(f"✗ 音频获取失败: {error}")
+    elif isinstance(error, AudioQualityError):
+        logger.error(f"✗ 音频质量不合格: {error}")
+    elif isinstance(error, TranscriptionError):
+        logger.error(f"✗ 语音转录失败: {error}")
+    else:
+        logger.error(f"✗ 处理失败: {error}")
+    db.update_podcast(job["podcast_id"], status="failed", error_message=str(error))
+
+
+def process_podcast(url: str, config, db, podcast_id: str = None, on_progress=None,
+                    audio_url: str = None):
+    """
+    处理播客的完整流程
+
+    Args:
+        url: 播客页面 URL
+        config: 配置对象
+        db: 数据库对象
+        podcast_id: 已创建的播客 ID（由任务队列传入），为空时新建记录
+        on_progress: 进度回调 (stage, progress, detail)
+        audio_url: 已知的音频地址（订阅源 enclosure），提供时跳过页面解析
+    """
+    logger.info(f"开始处理播客: {url}")
+
+    # 1. 创建播客记录
+    if not podcast_id:
+        podcast_id = db.create_podcast(url)
+        logger.info(f"创建播客记录: {podcast_id}")
+
+    job = {"podcast_id": podcast_id, "url": url, "on_progress": on_progress, "enclosure_url": audio_url}
+
+    try:
+        # 2. 音频获取
+        logger.info("=" * 50)
+        logger.info("步骤 1/2: 音频获取")
+        logger.info("=" * 50)
+        fetch_stage(job, build_fetcher(config, db=db), config, db)
+
+        # 3. 语音转录
+        logger.info("=" * 50)
+        logger.info("步骤 2/2: 语音转录")
+        logger.info("=" * 50)
+        transcriber = build_transcriber(config)
+        transcribe_stage(job, transcriber, db, config)
 
-        logger.info(f"✓ 语音转录成功")
-        logger.info(f"✓ 转录字数: {word_count}")
-        if category:
-            logger.info(f"✓ 栏目分类: {category}")
+        # 生成转录文件（JSON, Markdown）
+        logger.info("=" * 50)
+        logger.info("生成转录文件")
+        logger.info("=" * 50)
+        render_stage(job, config, db)
 
         # 4. 显示结果摘要
         logger.info("=" * 50)
         logger.info("处理完成")
         logger.info("=" * 50)
         logger.info(f"播客 ID: {podcast_id}")
-        logger.info(f"栏目: {category or '未分类'}")
-        logger.info(f"音频文件: {audio_path}")
-        logger.info(f"Markdown 文件: {transcript_md_path}")
-        if pdf_path:
-            logger.info(f"PDF 文件: {pdf_path}")
-        logger.info(f"段落数量: {len(paragraphs)}")
-        logger.info(f"总字数: {word_count}")
+        logger.info(f"栏目: {job['category'] or '未分类'}")
+        logger.info(f"音频文件: {job['audio_path']}")
+        logger.info(f"Markdown 文件: {job['transcript_md_path']}")
+        logger.info(f"段落数量: {job['paragraph_count']}")
+        logger.info(f"总字数: {job['word_count']}")
 
         # 显示前 3 个段落预览
         logger.info("\n转录预览（前 3 段）:")
-        formatted = transcriber.format_transcript_text(paragraphs[:3])
+        preview = list(itertools.islice(
+            iter_array_items(iter_file_chunks(job["transcript_json_path"]), "segments"), 3
+        ))
+        formatted = transcriber.format_transcript_text(preview)
         print(formatted)
 
         return podcast_id
 
-    except AudioFetchError as e:
-        logger.error(f"✗ 音频获取失败: {e}")
-        db.update_podcast(podcast_id, status="failed", error_message=str(e))
+    except Exception as e:
+        mark_failed(job, e, db)
         raise
 
-    except AudioQualityError as e:
-        logger.error(f"✗ 音频质量不合格: {e}")
-        db.update_podcast(podcast_id, status="failed", error_message=str(e))
-        raise
 
-    except TranscriptionError as e:
-        logger.error(f"✗ 语音转录失败: {e}")
-        db.update_podcast(podcast_id, status="failed", error_message=str(e))
-        raise
+def process_podcasts(urls, config, db, on_complete=None, on_error=None,
+                     fetcher=None, transcriber=None, concurrency: int = None):
+    """
+    以流水线方式处理多个播客：下载、转录、生成文件三个阶段通过有界队列串联，
+    不同播客的不同阶段并行执行
 
-    except Exception as e:
-        logger.error(f"✗ 处理失败: {e}")
-        db.update_podcast(podcast_id, status="failed", error_message=str(e))
-        raise
+    Args:
+        urls: 播客页面 URL 的可迭代对象
+        config: 配置对象
+        db: 数据库对象
+        on_complete: 单个播客完成后的回调，参数为任务上下文
+        on_error: 单个播客失败后的回调，参数为 (任务上下文, 阶段名, 异常)
+        fetcher: 共享的音频获取器（默认按配置创建）
+        transcriber: 共享的转录器（默认按配置创建）
+        concurrency: 同时下载/转录的播客数，覆盖 pipeline.* 配置
+    """
+    from pipeline import Stage, StagePipeline
+
+    fetcher = fetcher or build_fetcher(config, db=db)
+    transcriber = transcriber or build_transcriber(config)
+
+    def handle_error(job, stage_name, error):
+        mark_failed(job, error, db)
+        if on_error:
+            on_error(job, stage_name, error)
+
+    pipeline = StagePipeline(
+        [
+            Stage("fetch", lambda job: fetch_stage(job, fetcher, config, db),
+                  concurrency or config.get("pipeline.fetch_concurrency", 2)),
+            # 转录阶段只负责提交，等待由共享轮询器完成，线程数与待转录数量无关
+            Stage("transcribe", lambda job: transcribe_stage_async(job, transcriber, db, config),
+                  concurrency or config.get("pipeline.transcribe_concurrency", 4),
+                  max_pending=config.get("pipeline.transcribe_max_pending", 200)),
+            Stage("render", lambda job: render_stage(job, config, db),
+                  config.get("pipeline.render_concurrency", 1)),
+        ],
+        queue_size=config.get("pipeline.queue_size", 2),
+        on_complete=on_complete,
+        on_error=handle_error
+    )
+
+    def jobs():
+        for url in urls:
+            podcast_id = db.create_podcast(url)
+            yield {"podcast_id": podcast_id, "url": url, "submitted_at": time.time()}
 
+    pipeline.run(jobs())
 
-def process_documentary(file_path: str, documentary_id: str, config, db):
+
+def process_documentary(file_path: str, documentary_id: str, config, db, on_progress=None):
     """
     处理纪录片的完整流程
 
@@ -251,171 +1215,458 @@ def process_documentary(file_path: str, documentary_id: str, config, db):
         documentary_id: 纪录片 ID
         config: 配置对象
         db: 数据库对象
+        on_progress: 进度回调 (stage, progress, detail)
     """
     logger.info(f"开始处理纪录片: {documentary_id}")
 
-    try:
-        # 1. 更新状态为转录中
-        db.update_podcast(documentary_id, status="transcribing")
+    job = {
+        "podcast_id": documentary_id,
+        "audio_path": file_path,
+        "content_type": "documentary",
+        "on_progress": on_progress,
+    }
 
-        # 2. 语音转录（使用通义千问 API）
+    try:
+        # 1. 语音转录（使用通义千问 API）
         logger.info("=" * 50)
         logger.info("语音转录")
         logger.info("=" * 50)
 
-        transcriber_config = {
-            "api_key": config.get("whisper.qwen_api_key"),
-            "language": config.get("whisper.language"),
-            "model": config.get("whisper.qwen_model", "paraformer-v2"),
-            "paragraph_gap": config.get("analyzer.paragraph_gap")
-        }
-        transcriber = QwenTranscriber(transcriber_config)
+        audio_sha256 = content_hash(file_path)
+        db.save_checkpoint(documentary_id, "audio", {
+            "audio_path": str(file_path),
+            "sha256": audio_sha256,
+        })
+        audio_info = {}
+        try:
+            audio_info = probe_audio(file_path)
+            job["duration"] = audio_info["duration"]
+        except (AudioProbeError, OSError) as e:
+            logger.warning(f"音频头解析失败: {e}")
+        db.update_podcast(
+            documentary_id,
+            audio_sha256=audio_sha256,
+            duration=round(audio_info.get("duration", 0)),
+            sample_rate=audio_info.get("sample_rate", 0),
+            channels=audio_info.get("channels", 0)
+        )
 
-        # 对于本地文件，需要先上传到 OSS 或使用文件 URL
-        # 这里我们直接传递本地文件路径，transcriber 会处理
-        paragraphs = transcriber.transcribe(file_path)
-        model_name = f"qwen-{transcriber_config['model']}"
+        # 本地文件由 transcriber 以签名 URL 提交（配置了 media.public_base_url 时），否则使用 file:// 路径
+        transcribe_stage(job, build_transcriber(config), db, config)
 
-        # 获取纪录片信息（包含栏目）
-        documentary = db.get_podcast(documentary_id)
-        category = documentary.get('category', '') if documentary else ''
-        title = documentary.get('title', '未命名纪录片') if documentary else '未命名纪录片'
+        # 2. 生成转录文件（JSON, Markdown）
+        logger.info("=" * 50)
+        logger.info("生成转录文件")
+        logger.info("=" * 50)
+        render_stage(job, config, db)
 
-        # 初始化存储管理器
-        storage = StorageManager(config)
+        title = job["title"] or '未命名纪录片'
+        db.update_podcast(documentary_id, title=title)
 
-        # 生成转录文件（JSON, Markdown, PDF）
+        # 显示结果摘要
         logger.info("=" * 50)
-        logger.info("生成转录文件")
+        logger.info("处理完成")
         logger.info("=" * 50)
+        logger.info(f"纪录片 ID: {documentary_id}")
+        logger.info(f"标题: {title}")
+        logger.info(f"栏目: {job['category'] or '未分类'}")
+        logger.info(f"Markdown 文件: {job['transcript_md_path']}")
+        logger.info(f"段落数量: {job['paragraph_count']}")
+        logger.info(f"总字数: {job['word_count']}")
 
-        from transcript_formatter import format_transcript
-        import json
-
-        # 1. 保存 JSON 格式（用于 Web 界面对话式布局）
-        transcript_json_path = storage.get_transcript_path(documentary_id, category, "json")
-        storage.ensure_directory(transcript_json_path)
-
-        json_data = {
-            "segments": paragraphs,
-            "metadata": {
-                "podcast_id": documentary_id,
-                "title": title,
-                "model": model_name,
-                "category": category or "未分类",
-                "content_type": "documentary",
-                "speaker_names": {}
-            },
-            "word_count": sum(len(p["text"]) for p in paragraphs),
-            "paragraph_count": len(paragraphs)
-        }
+        return documentary_id
 
-        with open(transcript_json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
-        logger.info(f"✓ JSON 文件: {transcript_json_path}")
+    except Exception as e:
+        mark_failed(job, e, db)
+        raise
 
-        # 2. 生成 Markdown 文件
-        transcript_md_path = storage.get_transcript_path(documentary_id, category, "md")
-        storage.ensure_directory(transcript_md_path)
 
-        format_transcript(
-            paragraphs,
-            metadata={
-                "podcast_id": documentary_id,
-                "title": title,
-                "model": model_name,
-                "category": category or "未分类",
-                "content_type": "documentary",
-                "speaker_names": {}
-            },
-            output_format='markdown',
-            output_path=str(transcript_md_path)
-        )
-        logger.info(f"✓ Markdown 文件: {transcript_md_path}")
+def resume_podcast(podcast_id: str, config, db):
+    """
+    从最后完成的阶段继续处理播客/纪录片
+
+    Args:
+        podcast_id: 播客 ID
+        config: 配置对象
+        db: 数据库对象
+    """
+    podcast = db.get_podcast(podcast_id)
+    if not podcast:
+        raise ValueError(f"播客不存在: {podcast_id}")
+
+    if podcast.get("content_type") == "documentary":
+        audio_path = (db.get_checkpoints(podcast_id).get("audio") or {}).get("audio_path")
+        if not audio_path or not Path(audio_path).exists():
+            raise ValueError(f"纪录片上传文件不存在，无法恢复: {podcast_id}")
+        return process_documentary(audio_path, podcast_id, config, db)
+
+    # 已知音频地址（订阅源条目或此前解析过）时不再抓取页面
+    return process_podcast(podcast["url"], config, db, podcast_id=podcast_id,
+                           audio_url=podcast.get("audio_url") or None)
+
+
+def run_resume(args, config, db) -> int:
+    """
+    恢复中断的播客处理（默认恢复所有停留在下载/转录中的播客）
+
+    Args:
+        args: 命令行参数（podcast_ids）
+        config: 配置对象
+        db: 数据库对象
+
+    Returns:
+        退出码（有失败条目时为 1）
+    """
+    podcast_ids = args.podcast_ids or [
+        p["id"] for p in db.list_podcasts_by_status(["downloading", "transcribing"])
+    ]
+    if not podcast_ids:
+        logger.info("没有需要恢复的播客")
+        return 0
 
-        # 3. 生成 PDF 文件（可选）
-        pdf_path = None
+    failed = 0
+    for podcast_id in podcast_ids:
+        logger.info(f"恢复处理: {podcast_id}")
         try:
-            transcript_pdf_path = storage.get_transcript_path(documentary_id, category, "pdf")
-            storage.ensure_directory(transcript_pdf_path)
-
-            format_transcript(
-                paragraphs,
-                metadata={
-                    "podcast_id": documentary_id,
-                    "title": title,
-                    "model": model_name,
-                    "category": category or "未分类",
-                    "content_type": "documentary"
-                },
-                output_format='pdf',
-                output_path=str(transcript_pdf_path)
-            )
-            pdf_path = transcript_pdf_path
-            logger.info(f"✓ PDF 文件: {transcript_pdf_path}")
-        except ImportError:
-            logger.warning("⚠ 未安装 reportlab，跳过 PDF 生成。安装方法: pip install reportlab")
+            resume_podcast(podcast_id, config, db)
         except Exception as e:
-            logger.warning(f"⚠ PDF 生成失败: {e}")
+            logger.error(f"恢复失败 {podcast_id}: {e}")
+            failed += 1
 
-        # 创建转录记录（保存 JSON 路径）
-        word_count = sum(len(p["text"]) for p in paragraphs)
-        db.create_transcript(
-            documentary_id,
-            str(transcript_json_path),  # 保存 JSON 路径
-            word_count=word_count,
-            model_version=model_name
+    logger.info(f"恢复完成: 成功 {len(podcast_ids) - failed}, 失败 {failed}")
+    return 1 if failed else 0
+
+
+def run_rebuild(args, config, db) -> int:
+    """
+    重新生成已完成播客的过期产物（模板或参数变化后只重建受影响的文件）
+
+    Args:
+        args: 命令行参数（podcast_ids, force, paragraph_gap, reset_paragraph_gap）
+        config: 配置对象
+        db: 数据库对象
+
+    Returns:
+        退出码（有失败条目时为 1）
+    """
+    podcast_ids = args.podcast_ids or [p["id"] for p in db.list_podcasts_by_status(["completed"])]
+    if not podcast_ids:
+        logger.info("没有需要重建的播客")
+        return 0
+
+    failed = 0
+    for podcast_id in podcast_ids:
+        try:
+            if args.reset_paragraph_gap:
+                db.update_podcast(podcast_id, paragraph_gap=None)
+            rebuilt = rebuild_artifacts(podcast_id, config, db, force=args.force,
+                                        paragraph_gap=args.paragraph_gap)
+            logger.info(f"[{podcast_id}] 重建产物: {', '.join(rebuilt) if rebuilt else '无（均为最新）'}")
+        except Exception as e:
+            logger.error(f"重建失败 {podcast_id}: {e}")
+            failed += 1
+
+    logger.info(f"重建完成: 成功 {len(podcast_ids) - failed}, 失败 {failed}")
+    return 1 if failed else 0
+
+
+def run_feeds(args, config, db) -> int:
+    """
+    管理订阅源（add / list / remove / check）
+
+    新节目只写入任务表，由 worker 进程或 Web 服务内的任务队列处理。
+
+    Args:
+        args: 命令行参数（action, url, category, feed_id）
+        config: 配置对象
+        db: 数据库对象
+
+    Returns:
+        退出码
+    """
+    poller = build_feed_poller(config, db)
+
+    if args.action == "add":
+        try:
+            feed = poller.subscribe(args.url, category=args.category)
+        except FeedError as e:
+            logger.error(f"订阅失败: {e}")
+            return 1
+        logger.info(f"已订阅 [{feed['id']}] {feed['title'] or feed['url']}，"
+                    f"入队 {len(feed['new_podcast_ids'])} 期节目")
+        return 0
+
+    if args.action == "remove":
+        if not db.get_feed(args.feed_id):
+            logger.error(f"订阅源不存在: {args.feed_id}")
+            return 1
+        db.delete_feed(args.feed_id)
+        logger.info(f"已取消订阅: {args.feed_id}")
+        return 0
+
+    if args.action == "check":
+        feeds = [db.get_feed(args.feed_id)] if args.feed_id else db.list_feeds()
+        failed = 0
+        for feed in feeds:
+            if not feed:
+                logger.error(f"订阅源不存在: {args.feed_id}")
+                return 1
+            try:
+                podcast_ids = poller.check_feed(feed)
+                logger.info(f"[{feed['id']}] {feed['title'] or feed['url']}: {len(podcast_ids)} 期新节目")
+            except FeedError as e:
+                logger.error(f"[{feed['id']}] 检查失败: {e}")
+                failed += 1
+        return 1 if failed else 0
+
+    feeds = db.list_feeds()
+    if not feeds:
+        logger.info("没有订阅源")
+    for feed in feeds:
+        status = f"错误: {feed['error_message']}" if feed.get("error_message") else "正常"
+        logger.info(f"[{feed['id']}] {feed['title'] or '-'} {feed['url']} "
+                    f"({feed['episode_count']} 期, {status})")
+    return 0
+
+
+def run_resegment(args, config, db) -> int:
+    """
+    用本地句子文件重新分段（不会重新转录）
+
+    Args:
+        args: 命令行参数（podcast_ids, paragraph_gap, workers, force）
+        config: 配置对象
+        db: 数据库对象
+
+    Returns:
+        退出码（有失败条目时为 1）
+    """
+    summary = resegment_library(config, db, podcast_ids=args.podcast_ids or None,
+                                paragraph_gap=args.paragraph_gap, force=args.force, workers=args.workers)
+    return 1 if summary["failed"] else 0
+
+
+def read_url_list(input_path: str) -> list:
+    """
+    读取 URL 列表文件（每行一个，忽略空行和 # 注释）
+
+    Args:
+        input_path: 文件路径，"-" 表示标准输入
+
+    Returns:
+        URL 列表
+    """
+    if input_path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+def run_batch(args, config, db) -> int:
+    """
+    批量处理 URL 列表：单进程内复用配置、数据库、HTTP 连接池和转录器
+
+    Args:
+        args: 命令行参数（input, output, concurrency）
+        config: 配置对象
+        db: 数据库对象
+
+    Returns:
+        退出码（有失败条目时为 1）
+    """
+    urls = read_url_list(args.input)
+    if not urls:
+        logger.warning("URL 列表为空")
+        return 0
+
+    concurrency = args.concurrency or config.get("pipeline.fetch_concurrency", 2)
+    logger.info(f"批量处理 {len(urls)} 个播客，并发数: {concurrency}")
+
+    # 所有播客共享进程内的 HTTP 连接池（连接池大小见配置 http 部分）
+    fetcher = build_fetcher(config, db=db)
+    transcriber = build_transcriber(config)
+
+    # 先并发解析所有节目页面，结果写入解析缓存，下载阶段直接命中
+    fetcher.resolver.resolve_many(urls)
+
+    output_path = args.output
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    write_lock = threading.Lock()
+    counts = {"completed": 0, "failed": 0}
+
+    def write_result(job: dict, status: str):
+        timings = dict(job.get("timings", {}))
+        timings["total"] = round(time.time() - job["submitted_at"], 3)
+        record = {
+            "url": job["url"],
+            "podcast_id": job["podcast_id"],
+            "status": status,
+            "timings": timings,
+        }
+        if status == "completed":
+            record["word_count"] = job.get("word_count", 0)
+            record["transcript_path"] = job.get("transcript_json_path")
+        else:
+            record["failed_stage"] = job.get("failed_stage")
+            record["error"] = job.get("error")
+
+        with write_lock:
+            counts[status] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            logger.info(
+                f"[{counts['completed'] + counts['failed']}/{len(urls)}] "
+                f"{status}: {job['url']} ({timings['total']:.1f}s)"
+            )
+
+    started = time.time()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        process_podcasts(
+            urls, config, db,
+            on_complete=lambda job: write_result(job, "completed"),
+            on_error=lambda job, stage, error: write_result(job, "failed"),
+            fetcher=fetcher,
+            transcriber=transcriber,
+            concurrency=concurrency
         )
 
-        # 更新纪录片状态
-        db.update_podcast(
-            documentary_id,
-            status="completed",
-            title=title
+    logger.info("=" * 50)
+    logger.info(
+        f"批量处理完成: 成功 {counts['completed']}, 失败 {counts['failed']}, "
+        f"耗时 {time.time() - started:.1f}s"
+    )
+    logger.info(f"结果摘要: {output_path}")
+    for host, stats in http_client.get_stats().items():
+        logger.info(
+            f"HTTP {host}: {stats['requests']} 次请求, {stats['bytes'] / 1024 / 1024:.1f}MB, "
+            f"平均延迟 {stats['latency_avg'] * 1000:.0f}ms"
         )
+    return 1 if counts["failed"] else 0
 
-        logger.info(f"✓ 语音转录成功")
-        logger.info(f"✓ 转录字数: {word_count}")
-        if category:
-            logger.info(f"✓ 栏目分类: {category}")
 
-        # 显示结果摘要
-        logger.info("=" * 50)
-        logger.info("处理完成")
-        logger.info("=" * 50)
-        logger.info(f"纪录片 ID: {documentary_id}")
-        logger.info(f"标题: {title}")
-        logger.info(f"栏目: {category or '未分类'}")
-        logger.info(f"Markdown 文件: {transcript_md_path}")
-        if pdf_path:
-            logger.info(f"PDF 文件: {pdf_path}")
-        logger.info(f"段落数量: {len(paragraphs)}")
-        logger.info(f"总字数: {word_count}")
+def build_batch_parser() -> argparse.ArgumentParser:
+    """批量处理子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="批量处理播客 URL 列表"
+    )
+    parser.add_argument("--input", required=True, help="URL 列表文件（每行一个，- 表示标准输入）")
+    parser.add_argument("--output", default="logs/batch_results.jsonl", help="结果摘要输出路径（JSONL，追加写入）")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时下载/转录的播客数")
+    parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    return parser
 
-        return documentary_id
 
-    except TranscriptionError as e:
-        logger.error(f"✗ 语音转录失败: {e}")
-        db.update_podcast(documentary_id, status="failed", error_message=str(e))
-        raise
+def build_resume_parser() -> argparse.ArgumentParser:
+    """恢复子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="main.py resume",
+        description="从检查点恢复中断的播客处理（请勿与正在运行的 Web 任务队列同时处理同一播客）"
+    )
+    parser.add_argument("podcast_ids", nargs="*", help="播客 ID（默认恢复所有下载/转录中的播客）")
+    parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    return parser
 
-    except Exception as e:
-        logger.error(f"✗ 处理失败: {e}")
-        db.update_podcast(documentary_id, status="failed", error_message=str(e))
-        raise
 
+def build_rebuild_parser() -> argparse.ArgumentParser:
+    """重建子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="main.py rebuild",
+        description="重新生成过期的转录产物（JSON/Markdown），不会重新转录"
+    )
+    parser.add_argument("podcast_ids", nargs="*", help="播客 ID（默认所有已完成的播客）")
+    parser.add_argument("--force", action="store_true", help="忽略哈希强制重建")
+    gap = parser.add_mutually_exclusive_group()
+    gap.add_argument("--paragraph-gap", type=float, default=None,
+                     help="段落间隔阈值（秒，保存到播客记录；默认沿用 resegment 保存的值，没有时使用 analyzer.paragraph_gap）")
+    gap.add_argument("--reset-paragraph-gap", action="store_true",
+                     help="清除保存的段落间隔，改用 analyzer.paragraph_gap")
+    parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    return parser
 
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description="播客分析工具")
-    parser.add_argument("url", help="小宇宙播客页面 URL")
+
+def build_resegment_parser() -> argparse.ArgumentParser:
+    """重新分段子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="main.py resegment",
+        description="用保存的句子级 ASR 结果在本地重新分段（多进程），不会重新转录"
+    )
+    parser.add_argument("podcast_ids", nargs="*", help="播客 ID（默认所有已完成的播客）")
+    parser.add_argument("--paragraph-gap", type=float, default=None,
+                        help="段落间隔阈值（秒，保存到播客记录，之后的 rebuild 和重新转录沿用该值；"
+                             "默认沿用已保存的值，没有时使用 analyzer.paragraph_gap）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--force", action="store_true", help="忽略哈希强制重建")
+    parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    return parser
+
+
+def build_feeds_parser() -> argparse.ArgumentParser:
+    """订阅源子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="main.py feeds",
+        description="管理 RSS/Atom 订阅源（新节目由任务队列处理）"
+    )
     parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+    actions = parser.add_subparsers(dest="action", required=True)
+
+    add = actions.add_parser("add", help="添加订阅源")
+    add.add_argument("url", help="RSS/Atom 地址")
+    add.add_argument("--category", default="", help="新节目归入的栏目")
+
+    actions.add_parser("list", help="列出订阅源")
+
+    remove = actions.add_parser("remove", help="取消订阅")
+    remove.add_argument("feed_id", help="订阅源 ID")
 
-    args = parser.parse_args()
+    check = actions.add_parser("check", help="立即检查订阅源")
+    check.add_argument("feed_id", nargs="?", help="订阅源 ID（默认检查全部）")
+    return parser
+
+
+def main(argv=None):
+    """主函数"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    command = argv[0] if argv and argv[0] in ("batch", "resume", "rebuild", "resegment", "feeds") else None
+    if command == "batch":
+        args = build_batch_parser().parse_args(argv[1:])
+    elif command == "resume":
+        args = build_resume_parser().parse_args(argv[1:])
+    elif command == "rebuild":
+        args = build_rebuild_parser().parse_args(argv[1:])
+    elif command == "resegment":
+        args = build_resegment_parser().parse_args(argv[1:])
+    elif command == "feeds":
+        args = build_feeds_parser().parse_args(argv[1:])
+    else:
+        parser = argparse.ArgumentParser(
+            description="播客分析工具",
+            epilog="批量处理: main.py batch --input urls.txt --concurrency N；"
+                   "断点恢复: main.py resume [podcast_id ...]；"
+                   "重建产物: main.py rebuild [podcast_id ...]；"
+                   "重新分段: main.py resegment [--paragraph-gap N]；"
+                   "订阅源: main.py feeds {add,list,remove,check}"
+        )
+        parser.add_argument("url", help="小宇宙播客页面 URL")
+        parser.add_argument("--config", default="config/config.yaml", help="配置文件路径")
+        args = parser.parse_args(argv)
 
     # 加载配置
     config = get_config(args.config)
     setup_logging(config)
+    rate_limiter.configure(config.get("rate_limits"))
+    http_client.configure(config.get("http"))
+    admission.configure(config.get("admission"))
+    media_server.configure(config.get("media"))
 
     logger.info(f"播客分析工具 v{config.get('app.version')}")
 
@@ -423,6 +1674,17 @@ def main():
     db = get_db(config.get("database.path"))
 
     try:
+        if command == "batch":
+            return run_batch(args, config, db)
+        if command == "resume":
+            return run_resume(args, config, db)
+        if command == "rebuild":
+            return run_rebuild(args, config, db)
+        if command == "resegment":
+            return run_resegment(args, config, db)
+        if command == "feeds":
+            return run_feeds(args, config, db)
+
         # 处理播客
         podcast_id = process_podcast(args.url, config, db)
         logger.info(f"\n✓ 全部完成！播客 ID: {podcast_id}")
@@ -0,0 +1,228 @@
+"""
+本地媒体文件发布模块
+把 data/uploads、data/audio 等目录中的文件发布为带有效期的 HMAC 签名 URL（由 Web 应用的 /media 路由提供，
+支持 Range 请求），远程 ASR 服务可以直接读取上传的文件，不再需要手动转存到其他位置；
+同一文件（按内容哈希）在有效期内重复提交时复用已签发的 URL
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+from loguru import logger
+
+
+# 默认发布参数（未在配置中指定时使用）
+DEFAULT_SETTINGS = {
+    "public_base_url": "",                 # ASR 服务能访问到的本服务地址，为空时不发布（仍提交 file:// 路径）
+    "secret": "",                          # 签名密钥（环境变量 MEDIA_URL_SECRET），为空时使用 secret_file 中的密钥
+    "secret_file": "data/.media_secret",   # 自动生成的密钥文件（Web 进程与 worker 进程共享）
+    "ttl": 86400,                          # URL 有效期（秒）
+    "refresh_before": 3600,                # 缓存的 URL 剩余有效期不足该值时重新签发（秒）
+    "max_cached_urls": 1024,               # 缓存的已签发 URL 数量上限
+    # 可发布的目录 {URL 中的名称: 目录}
+    "roots": {"uploads": "data/uploads", "audio": "data/audio", "chunks": "data/cache/chunks"},
+}
+
+
+class MediaPublisher:
+    """签发和校验媒体文件 URL（线程安全，进程内共享）"""
+
+    def __init__(self, public_base_url: str, secret: bytes, roots: Dict[str, str], ttl: float = 86400,
+                 refresh_before: float = 3600, max_cached_urls: int = 1024):
+        """
+        初始化发布器
+
+        Args:
+            public_base_url: 本服务的外部访问地址（如 https://podcast.example.com），为空时不发布
+            secret: 签名密钥
+            roots: 可发布的目录 {名称: 目录}
+            ttl: URL 有效期（秒）
+            refresh_before: 缓存的 URL 剩余有效期不足该值时重新签发（秒）
+            max_cached_urls: 缓存的 URL 数量上限
+        """
+        self.public_base_url = (public_base_url or "").rstrip("/")
+        self.secret = secret
+        self.roots = {name: Path(directory).resolve() for name, directory in (roots or {}).items()}
+        self.ttl = max(60, int(ttl or 86400))
+        self.refresh_before = min(max(0, int(refresh_before or 0)), self.ttl // 2)
+        self.max_cached_urls = max(1, int(max_cached_urls or 1))
+
+        self._urls: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了外部访问地址"""
+        return bool(self.public_base_url)
+
+    def can_publish(self, path: str) -> bool:
+        """
+        该路径（文件或目录）下的文件能否签发 URL
+
+        Args:
+            path: 本地路径（可以尚不存在）
+
+        Returns:
+            已启用且路径位于可发布目录中时为 True
+        """
+        return self.enabled and bool(self.secret) and self._locate(Path(path).resolve()) is not None
+
+    def publish(self, file_path: str, sha256: str = None) -> Optional[str]:
+        """
+        获取文件的签名 URL（同一内容在有效期内复用已签发的 URL）
+
+        Args:
+            file_path: 本地文件路径
+            sha256: 文件内容的 SHA-256（已知时传入，作为缓存键），为空时按路径、大小和修改时间识别文件
+
+        Returns:
+            签名 URL；未启用或文件不在可发布目录中时返回 None
+        """
+        if not self.enabled or not self.secret:
+            return None
+        path = Path(file_path).resolve()
+        located = self._locate(path)
+        if located is None:
+            logger.debug(f"文件不在可发布目录中，不签发 URL: {path}")
+            return None
+        root, name = located
+
+        stat = path.stat()
+        key = sha256 or f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        now = time.time()
+        with self._lock:
+            entry = self._urls.get(key)
+            if entry and entry["expires"] - now >= self.refresh_before and os.path.exists(entry["path"]):
+                self._urls.move_to_end(key)
+                return entry["url"]
+
+            expires = int(now) + self.ttl
+            url = (f"{self.public_base_url}/media/{root}/{quote(name)}"
+                   f"?expires={expires}&sig={self._sign(root, name, expires)}")
+            self._urls[key] = {"url": url, "path": str(path), "expires": expires}
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_cached_urls:
+                self._urls.popitem(last=False)
+        return url
+
+    def verify(self, root: str, name: str, expires: str, signature: str) -> Optional[Path]:
+        """
+        校验签名 URL 并定位文件
+
+        Args:
+            root: URL 中的目录名称
+            name: 目录内的相对路径
+            expires: 过期时间戳（URL 参数）
+            signature: 签名（URL 参数）
+
+        Returns:
+            文件路径；未配置密钥、签名错误、已过期、路径越界或文件不存在时返回 None
+        """
+        if not self.secret or root not in self.roots or not expires or not signature:
+            return None
+        try:
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if expires_at < time.time():
+            return None
+        if not hmac.compare_digest(self._sign(root, name, expires_at), signature):
+            return None
+
+        path = (self.roots[root] / name).resolve()
+        if not path.is_relative_to(self.roots[root]) or not path.is_file():
+            return None
+        return path
+
+    def _locate(self, path: Path) -> Optional[tuple]:
+        """文件所在的可发布目录 (名称, 相对路径)"""
+        for root, directory in self.roots.items():
+            if path.is_relative_to(directory):
+                return root, path.relative_to(directory).as_posix()
+        return None
+
+    def _sign(self, root: str, name: str, expires: int) -> str:
+        """计算 URL 签名"""
+        message = f"{root}/{name}\n{expires}".encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+
+def load_secret(secret_file: str) -> bytes:
+    """
+    读取密钥文件，不存在时生成（多个进程同时生成时以先写入的为准）
+
+    Args:
+        secret_file: 密钥文件路径
+
+    Returns:
+        密钥
+    """
+    path = Path(secret_file)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再硬链接到目标位置，其他进程不会读到写了一半的密钥
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp_path, path)
+            logger.info(f"已生成媒体 URL 签名密钥: {path}")
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    return path.read_text().strip().encode("utf-8")
+
+
+_settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+_base_dir: Optional[Path] = None
+_publisher: Optional[MediaPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def configure(settings: Optional[Dict[str, Any]], base_dir: str = None):
+    """
+    加载发布配置（config.yaml 的 media 部分），已创建的发布器按新配置重建
+
+    Args:
+        settings: {public_base_url, secret, secret_file, ttl, refresh_before, max_cached_urls, roots}
+        base_dir: 相对路径（目录、密钥文件）的基准目录，为空时使用当前目录
+    """
+    global _settings, _base_dir, _publisher
+    with _publisher_lock:
+        _settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        _base_dir = Path(base_dir) if base_dir else None
+        _publisher = None
+
+
+def get_publisher() -> MediaPublisher:
+    """
+    获取进程内共享的发布器
+
+    Returns:
+        发布器对象
+    """
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            base_dir = _base_dir or Path.cwd()
+            secret = str(_settings.get("secret") or "").encode("utf-8")
+            if not secret and _settings.get("public_base_url"):
+                secret = load_secret(str(base_dir / _settings["secret_file"]))
+            _publisher = MediaPublisher(
+                _settings.get("public_base_url"),
+                secret,
+                {name: base_dir / directory for name, directory in (_settings.get("roots") or {}).items()},
+                ttl=_settings.get("ttl"),
+                refresh_before=_settings.get("refresh_before"),
+                max_cached_urls=_settings.get("max_cached_urls"),
+            )
+        return _publisher
@@ -0,0 +1,174 @@
+"""
+PDF 按需生成模块
+转录完成时不再同步生成 PDF，下载时才在后台进程池中生成（请求立即返回，生成完成后再次请求即可下载），
+并按“转录内容哈希 + 说话人映射 + 模板版本”缓存
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import Any, Dict, Optional
+from loguru import logger
+
+
+class PdfRenderError(Exception):
+    """PDF 生成失败"""
+    pass
+
+
+def pdf_cache_key(transcript: Dict[str, Any]) -> str:
+    """
+    计算 PDF 缓存键
+
+    Args:
+        transcript: 转录 JSON 数据（segments + metadata）
+
+    Returns:
+        十六进制摘要
+    """
+    from transcript_formatter import TranscriptFormatter
+
+    metadata = dict(transcript.get("metadata", {}))
+    speaker_names = metadata.pop("speaker_names", {})
+    payload = {
+        "template": TranscriptFormatter.VERSION,
+        "segments": transcript.get("segments", []),
+        "metadata": metadata,
+        "speaker_names": speaker_names,
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+def render_pdf(transcript_json_path: str, output_path: str) -> str:
+    """
+    从转录 JSON 生成 PDF（在子进程中执行）
+
+    先写入临时文件再重命名，避免并发读取到不完整的 PDF。
+
+    Args:
+        transcript_json_path: 转录 JSON 路径
+        output_path: PDF 输出路径
+
+    Returns:
+        PDF 路径
+    """
+    from transcript_formatter import format_transcript
+
+    with open(transcript_json_path, 'r', encoding='utf-8') as f:
+        transcript = json.load(f)
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    format_transcript(
+        transcript.get("segments", []),
+        metadata=transcript.get("metadata", {}),
+        output_format='pdf',
+        output_path=tmp_path
+    )
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class PdfRenderer:
+    """PDF 按需生成器（进程池 + 内容哈希缓存）"""
+
+    def __init__(self, cache_dir: str, max_workers: int = 1, max_files: int = 200):
+        """
+        初始化生成器
+
+        Args:
+            cache_dir: PDF 缓存目录
+            max_workers: 进程池大小
+            max_files: 缓存保留的最大文件数（超出时删除最久未使用的）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max(1, int(max_workers or 1))
+        self.max_files = max_files
+
+        self._executor = None
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, BaseException] = {}   # 生成失败、尚未报告给请求方的任务
+        self._lock = threading.Lock()
+
+    def request_pdf(self, transcript_json_path: str) -> Optional[str]:
+        """
+        获取转录对应的 PDF，缓存未命中时在进程池中开始生成并立即返回（不等待）
+
+        同一内容的并发请求共享同一个生成任务；生成完成后再次请求即命中缓存。
+
+        Args:
+            transcript_json_path: 转录 JSON 路径
+
+        Returns:
+            PDF 路径；正在生成时返回 None
+
+        Raises:
+            PdfRenderError: 上一次生成失败（报告一次，之后的请求重新生成）
+        """
+        with open(transcript_json_path, 'r', encoding='utf-8') as f:
+            transcript = json.load(f)
+
+        key = pdf_cache_key(transcript)
+        output_path = self.cache_dir / f"{key}.pdf"
+
+        if output_path.exists():
+            logger.debug(f"PDF 缓存命中: {output_path}")
+            os.utime(output_path)
+            return str(output_path)
+
+        with self._lock:
+            error = self._errors.pop(key, None)
+            if error is not None:
+                raise PdfRenderError(f"PDF 生成失败: {error}")
+            if key not in self._pending:
+                logger.info(f"生成 PDF: {transcript_json_path}")
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                future = self._get_executor().submit(render_pdf, str(transcript_json_path), str(output_path))
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done))
+        return None
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        延迟创建进程池（从不下载 PDF 时不启动子进程）
+
+        使用 spawn：fork 多线程的 Web 进程时，子进程可能继承其他线程持有的锁（数据库、日志等）而死锁。
+        子进程只导入入口模块（入口保护之外没有副作用）和本模块。
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _finish(self, key: str, future: Future):
+        """生成任务结束：移出进行中列表，记录失败原因并清理缓存"""
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is not None:
+                logger.error(f"PDF 生成失败: {error}")
+                self._errors[key] = error
+        self._prune()
+
+    def _prune(self):
+        """删除超出数量上限的旧缓存文件"""
+        if not self.max_files:
+            return
+        try:
+            files = sorted(self.cache_dir.glob("*.pdf"), key=lambda p: p.stat().st_mtime, reverse=True)
+            for stale in files[self.max_files:]:
+                stale.unlink()
+        except OSError as e:
+            logger.warning(f"清理 PDF 缓存失败: {e}")
@@ -0,0 +1,244 @@
+"""
+流水线执行模块
+将多个处理阶段用有界队列串联，不同条目的不同阶段可以并行执行
+（例如第 N+1 期下载时第 N 期正在转录）
+
+阶段函数返回 Future 时为异步阶段：工作线程不等待，Future 完成后由分发线程把条目交给下一阶段，
+等待外部服务（如 ASR 任务）的条目不占用工作线程
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+# 队列结束标记
+_SENTINEL = object()
+
+
+class Stage:
+    """流水线阶段"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], concurrency: int = 1,
+                 max_pending: int = None):
+        """
+        初始化阶段
+
+        Args:
+            name: 阶段名称
+            func: 处理函数，接收条目字典并原地更新；返回 Future 时在其完成后才进入下一阶段
+            concurrency: 该阶段的并发工作线程数
+            max_pending: 异步阶段最多同时未完成的条目数（达到上限时工作线程等待），为空时不限制
+        """
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, int(concurrency or 1))
+        self.max_pending = int(max_pending) if max_pending else None
+
+
+class StagePipeline:
+    """多阶段流水线执行器"""
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_error: Optional[Callable[[Dict[str, Any], str, Exception], None]] = None):
+        """
+        初始化流水线
+
+        Args:
+            stages: 阶段列表（按执行顺序）
+            queue_size: 阶段之间队列的容量（满时上游阶段阻塞）
+            on_complete: 条目通过全部阶段后的回调
+            on_error: 条目在某阶段失败时的回调 (item, stage_name, error)
+        """
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+
+        self.stages = stages
+        self.on_complete = on_complete
+        self.on_error = on_error
+
+        # 每个阶段一个输入队列
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._threads: List[threading.Thread] = []
+        self._remaining = [stage.concurrency for stage in stages]
+        self._lock = threading.Lock()
+
+        # 异步阶段：未完成的条目数、并发上限，以及完成后交给分发线程的队列
+        self._pending = [0 for _ in stages]
+        self._idle = threading.Condition(self._lock)
+        self._pending_slots = [
+            threading.BoundedSemaphore(stage.max_pending) if stage.max_pending else None for stage in stages
+        ]
+        self._completions: queue.Queue = queue.Queue()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._started = False
+        self._closed = False
+
+    def start(self):
+        """启动所有阶段的工作线程"""
+        if self._started:
+            return
+        self._started = True
+
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.concurrency):
+                thread = threading.Thread(
+                    target=self._stage_loop,
+                    args=(index,),
+                    name=f"pipeline-{stage.name}-{i + 1}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="pipeline-dispatch", daemon=True)
+        self._dispatcher.start()
+
+        logger.info(
+            "流水线已启动: " + ", ".join(f"{s.name}×{s.concurrency}" for s in self.stages)
+        )
+
+    def submit(self, item: Dict[str, Any]):
+        """
+        提交条目（第一阶段队列满时阻塞）
+
+        Args:
+            item: 条目字典
+        """
+        if self._closed:
+            raise RuntimeError("流水线已关闭，不能再提交条目")
+        item.setdefault("timings", {})
+        self._queues[0].put(item)
+
+    def close(self):
+        """声明不再提交新条目"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in range(self.stages[0].concurrency):
+            self._queues[0].put(_SENTINEL)
+
+    def join(self):
+        """等待所有条目处理完毕"""
+        for thread in self._threads:
+            thread.join()
+
+        # 最后一个阶段是异步阶段时，工作线程退出后仍可能有未完成的条目
+        with self._idle:
+            self._idle.wait_for(lambda: not any(self._pending))
+        if self._dispatcher:
+            self._completions.put(_SENTINEL)
+            self._dispatcher.join()
+
+    def run(self, items):
+        """
+        便捷方法：启动、提交全部条目并等待完成
+
+        Args:
+            items: 条目字典的可迭代对象
+        """
+        self.start()
+        try:
+            for item in items:
+                self.submit(item)
+        finally:
+            self.close()
+            self.join()
+
+    def _stage_loop(self, index: int):
+        """阶段工作线程主循环"""
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        slots = self._pending_slots[index]
+
+        while True:
+            item = inbox.get()
+            if item is _SENTINEL:
+                break
+
+            start = time.time()
+            if slots:
+                slots.acquire()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                if slots:
+                    slots.release()
+                self._finish(index, item, start, e)
+                continue
+
+            if isinstance(result, Future):
+                with self._lock:
+                    self._pending[index] += 1
+                result.add_done_callback(
+                    lambda future, item=item, start=start: self._completions.put((index, item, start, future))
+                )
+            else:
+                if slots:
+                    slots.release()
+                self._finish(index, item, start)
+
+        # 本阶段最后一个退出的线程负责关闭下游（仍有异步条目未完成时由分发线程关闭）
+        with self._lock:
+            self._remaining[index] -= 1
+            drained = self._remaining[index] == 0 and self._pending[index] == 0
+
+        if drained:
+            self._close_downstream(index)
+
+    def _dispatch_loop(self):
+        """分发线程主循环：异步阶段的条目完成后交给下一阶段"""
+        while True:
+            entry = self._completions.get()
+            if entry is _SENTINEL:
+                break
+
+            index, item, start, future = entry
+            if self._pending_slots[index]:
+                self._pending_slots[index].release()
+            self._finish(index, item, start, future.exception())
+
+            with self._lock:
+                self._pending[index] -= 1
+                drained = self._remaining[index] == 0 and self._pending[index] == 0
+                self._idle.notify_all()
+
+            if drained:
+                self._close_downstream(index)
+
+    def _finish(self, index: int, item: Dict[str, Any], start: float, error: Exception = None):
+        """记录阶段耗时，失败时回调 on_error，成功时进入下一阶段或回调 on_complete"""
+        stage = self.stages[index]
+        item["timings"][stage.name] = round(time.time() - start, 3)
+
+        if error is not None:
+            item["failed_stage"] = stage.name
+            item["error"] = str(error)
+            logger.error(f"流水线阶段 {stage.name} 失败: {error}")
+            if self.on_error:
+                self._safe_callback(self.on_error, item, stage.name, error)
+            return
+
+        if index == len(self.stages) - 1:
+            if self.on_complete:
+                self._safe_callback(self.on_complete, item)
+        else:
+            self._queues[index + 1].put(item)
+
+    def _close_downstream(self, index: int):
+        """上游阶段全部完成后向下一阶段发送结束标记"""
+        if index < len(self.stages) - 1:
+            for _ in range(self.stages[index + 1].concurrency):
+                self._queues[index + 1].put(_SENTINEL)
+
+    @staticmethod
+    def _safe_callback(callback, *args):
+        """执行回调，回调自身的异常只记录日志"""
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"流水线回调执行失败: {e}")
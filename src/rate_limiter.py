@@ -0,0 +1,265 @@
+"""
+外部 API 限流模块
+按“提供商 + API Key”维护进程内共享的令牌桶和并发限制，
+ASR 与各大模型调用都经过这里，避免并发时触发 429 后集中重试
+"""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+
+class RateLimitExceeded(Exception):
+    """等待限流超时"""
+    pass
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量（允许的突发请求数）
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst or 1))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None):
+        """
+        获取一个令牌（不足时阻塞等待）
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Raises:
+            RateLimitExceeded: 等待超时
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise RateLimitExceeded("等待限流令牌超时")
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        """调整令牌补充速率"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（收到限流响应时使用），并清空已积累的令牌"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _refill(self, now: float):
+        """按流逝时间补充令牌"""
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+
+class ProviderLimiter:
+    """单个提供商（+ API Key）的限流器：令牌桶 + 并发上限 + 自适应速率"""
+
+    def __init__(self, name: str, rate: float = 1.0, burst: int = 1,
+                 max_concurrency: int = 4, min_rate: float = None):
+        """
+        初始化限流器
+
+        Args:
+            name: 限流器名称（用于日志）
+            rate: 每秒请求数上限
+            burst: 允许的突发请求数
+            max_concurrency: 同时进行的请求数上限
+            min_rate: 收到 429 后速率下调的下限（默认 rate 的 1/10）
+        """
+        self.name = name
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate or self.max_rate / 10)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+    @contextmanager
+    def limit(self, concurrent: bool = True, timeout: float = None):
+        """
+        在限流下执行一次调用
+
+        Args:
+            concurrent: 是否占用并发名额（长时间轮询等只消耗令牌的调用传 False）
+            timeout: 等待名额和令牌的超时（秒）
+        """
+        if concurrent and not self._semaphore.acquire(timeout=timeout):
+            raise RateLimitExceeded(f"{self.name} 并发名额等待超时")
+        try:
+            self.bucket.acquire(timeout)
+            yield self
+        finally:
+            if concurrent:
+                self._semaphore.release()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在限流下调用函数"""
+        with self.limit():
+            return func(*args, **kwargs)
+
+    def report_throttled(self, retry_after: float = None):
+        """
+        记录一次限流响应：速率减半并暂停发放令牌
+
+        所有共享该限流器的线程都会等待，而不是各自退避后同时重试
+        """
+        rate = max(self.min_rate, self.bucket.rate / 2)
+        self.bucket.set_rate(rate)
+        pause = retry_after if retry_after is not None else 1.0 / rate
+        self.bucket.pause(pause)
+        logger.warning(f"[{self.name}] 触发限流，速率降至 {rate:.2f}/s，暂停 {pause:.1f}s")
+
+    def report_success(self):
+        """记录一次成功调用：速率逐步恢复到配置上限"""
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate / 20))
+
+
+# 默认限流参数（未在配置中指定的提供商使用）
+DEFAULT_LIMITS = {
+    "rate": 2.0,
+    "burst": 2,
+    "max_concurrency": 4,
+}
+
+_settings: Dict[str, Dict[str, Any]] = {}
+_limiters: Dict[tuple, ProviderLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def configure(settings: Optional[Dict[str, Dict[str, Any]]]):
+    """
+    加载限流配置（config.yaml 的 rate_limits 部分），已创建的限流器会按新配置重建
+
+    Args:
+        settings: {提供商: {rate, burst, max_concurrency, min_rate}}，default 键为默认值
+    """
+    global _settings
+    with _registry_lock:
+        _settings = dict(settings or {})
+        _limiters.clear()
+
+
+def get_limiter(provider: str, api_key: str = None) -> ProviderLimiter:
+    """
+    获取提供商 + API Key 对应的共享限流器
+
+    Args:
+        provider: 提供商名称（qwen_asr, qwen, deepseek, openai, doubao 等）
+        api_key: API Key（不同 Key 的配额相互独立）
+
+    Returns:
+        限流器
+    """
+    key_id = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12] if api_key else ""
+    registry_key = (provider, key_id)
+
+    with _registry_lock:
+        limiter = _limiters.get(registry_key)
+        if limiter is None:
+            params = {**DEFAULT_LIMITS, **(_settings.get("default") or {}), **(_settings.get(provider) or {})}
+            limiter = ProviderLimiter(
+                f"{provider}:{key_id}" if key_id else provider,
+                rate=params["rate"],
+                burst=params["burst"],
+                max_concurrency=params["max_concurrency"],
+                min_rate=params.get("min_rate")
+            )
+            _limiters[registry_key] = limiter
+        return limiter
+
+
+def is_rate_limited(error_or_response: Any) -> bool:
+    """
+    判断异常或响应是否为限流（HTTP 429 / DashScope Throttling）
+
+    Args:
+        error_or_response: 异常对象或 API 响应对象
+
+    Returns:
+        是否为限流
+    """
+    status = getattr(error_or_response, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error_or_response, "response", None), "status_code", None)
+    code = str(getattr(error_or_response, "code", "") or "")
+    if status is not None:
+        return status == 429 or "Throttling" in code
+
+    # 没有状态码的异常只能根据错误信息判断
+    text = f"{code} {error_or_response}"
+    return "Throttling" in text or "429" in text or "rate limit" in text.lower()
+
+
+def retry_after_seconds(error_or_response: Any) -> Optional[float]:
+    """读取响应头中的 Retry-After（秒），没有时返回 None"""
+    response = getattr(error_or_response, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_limit(provider: str, api_key: str, func: Callable[[], Any], max_retries: int = 3) -> Any:
+    """
+    在限流下调用外部 API，收到限流响应时降速并经由限流器重试
+
+    func 可以抛出异常，也可以返回带 status_code 的响应对象（如 DashScope 响应）。
+
+    Args:
+        provider: 提供商名称
+        api_key: API Key
+        func: 无参调用
+        max_retries: 限流时的最大尝试次数
+
+    Returns:
+        func 的返回值（最后一次仍被限流时原样返回/抛出）
+    """
+    limiter = get_limiter(provider, api_key)
+
+    for attempt in range(max_retries):
+        last_attempt = attempt == max_retries - 1
+        with limiter.limit():
+            try:
+                result = func()
+            except Exception as e:
+                if not is_rate_limited(e) or last_attempt:
+                    raise
+                limiter.report_throttled(retry_after_seconds(e))
+                continue
+
+        if is_rate_limited(result) and not last_attempt:
+            limiter.report_throttled(retry_after_seconds(result))
+            continue
+
+        limiter.report_success()
+        return result
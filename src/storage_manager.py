@@ -22,6 +22,7 @@ class StorageManager:
         self.audio_dir = Path(config.get("storage.audio_dir", "data/audio"))
         self.transcript_dir = Path(config.get("storage.transcript_dir", "data/transcripts"))
         self.note_dir = Path(config.get("storage.note_dir", "data/notes"))
+        self.checkpoint_dir = Path(config.get("storage.checkpoint_dir", "data/checkpoints"))
 
         self.category_based = config.get("storage.category_based", True)
         self.default_category = config.get("storage.default_category", "未分类")
@@ -98,6 +99,19 @@ class StorageManager:
         else:
             return self.note_dir / filename
 
+    def get_checkpoint_path(self, podcast_id: str, name: str) -> Path:
+        """
+        获取检查点文件路径（不按栏目分类，栏目变更时无需迁移）
+
+        Args:
+            podcast_id: 播客 ID
+            name: 文件名（如 asr_raw.json）
+
+        Returns:
+            检查点文件路径
+        """
+        return self.checkpoint_dir / podcast_id / name
+
     def ensure_directory(self, file_path: Path) -> None:
         """
         确保文件所在目录存在
@@ -0,0 +1,131 @@
+"""
+任务进度事件模块
+为 SSE 推送提供订阅：一个后台线程按固定间隔批量查询所有被订阅的任务，
+只在任务状态/进度变化时通知订阅者，订阅者数量增加不会增加数据库查询次数。
+（任务可能由其他 worker 进程更新，因此以数据库为准而不是进程内通知）
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Set
+from loguru import logger
+
+
+# 任务结束状态
+TERMINAL_STATUSES = ('completed', 'failed')
+
+# 用于判断任务是否变化的字段
+_WATCHED_FIELDS = ('status', 'progress', 'stage', 'detail', 'error_message')
+
+
+def task_event(task: Dict[str, Any]) -> Dict[str, Any]:
+    """提取推送给前端的任务字段"""
+    return {
+        'id': task['id'],
+        'podcast_id': task['podcast_id'],
+        'task_type': task['task_type'],
+        'status': task['status'],
+        'progress': task.get('progress') or 0,
+        'stage': task.get('stage') or '',
+        'detail': task.get('detail') or {},
+        'error_message': task.get('error_message') or '',
+        'updated_at': task.get('updated_at'),
+    }
+
+
+def _snapshot(task: Dict[str, Any]) -> tuple:
+    """任务快照（用于比较是否变化）"""
+    return tuple(str(task.get(field)) for field in _WATCHED_FIELDS)
+
+
+class Subscription:
+    """单个订阅（对应一个 SSE 连接）"""
+
+    def __init__(self, task_ids: Iterable[str]):
+        self.task_ids: Set[str] = set(task_ids)
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+
+class TaskEventHub:
+    """任务进度事件中心"""
+
+    def __init__(self, db, interval: float = 0.5):
+        """
+        初始化事件中心
+
+        Args:
+            db: 数据库对象
+            interval: 查询间隔（秒）
+        """
+        self.db = db
+        self.interval = interval or 0.5
+
+        self._subscriptions: List[Subscription] = []
+        self._snapshots: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, task_ids: Iterable[str]) -> Subscription:
+        """
+        订阅任务进度（会先收到每个任务的当前状态）
+
+        Args:
+            task_ids: 任务 ID 列表
+
+        Returns:
+            订阅对象，从 subscription.events 读取事件
+        """
+        tasks = self.db.get_tasks(list(set(task_ids)))
+        # 只订阅存在的任务
+        subscription = Subscription(task['id'] for task in tasks)
+        for task in tasks:
+            subscription.events.put(task_event(task))
+
+        with self._lock:
+            for task in tasks:
+                self._snapshots.setdefault(task['id'], _snapshot(task))
+            self._subscriptions.append(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name="task-events", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅"""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            watched = set().union(*(s.task_ids for s in self._subscriptions)) if self._subscriptions else set()
+            for task_id in list(self._snapshots):
+                if task_id not in watched:
+                    del self._snapshots[task_id]
+
+    def _poll_loop(self):
+        """后台线程：批量查询被订阅的任务并分发变化"""
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            if not subscriptions:
+                continue
+
+            watched = set().union(*(s.task_ids for s in subscriptions))
+            try:
+                tasks = self.db.get_tasks(list(watched))
+            except Exception as e:
+                logger.error(f"查询任务进度失败: {e}")
+                continue
+
+            for task in tasks:
+                snapshot = _snapshot(task)
+                with self._lock:
+                    previous = self._snapshots.get(task['id'])
+                    self._snapshots[task['id']] = snapshot
+                if previous is None or previous == snapshot:
+                    continue
+
+                event = task_event(task)
+                for subscription in subscriptions:
+                    if task['id'] in subscription.task_ids:
+                        subscription.events.put(event)
@@ -4,20 +4,357 @@
 """
 
 import time
+import gzip
 import json
 import os
+import hashlib
+import itertools
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from loguru import logger
 import dashscope
+import requests
 from http import HTTPStatus
 
+import http_client
+import media_server
+from asr_poller import ASRPoller, ASRTaskGoneError
+from json_stream import iter_file_chunks, iter_sentence_groups
+from rate_limiter import call_with_limit, get_limiter
+
+
+# 限流器中 ASR 接口的提供商名称（与大模型接口的配额分开）
+ASR_PROVIDER = "qwen_asr"
+
 
 class TranscriptionError(Exception):
     """转录异常"""
     pass
 
 
+class ASRTaskFailedError(TranscriptionError):
+    """ASR 任务本身失败、不存在或已过期（只能重新提交；结果下载失败等其他错误可以对同一任务重试）"""
+    pass
+
+
+class BatchSubmitter:
+    """
+    批量提交器：把短时间内多个线程的提交合并为一次 async_call（file_urls 为多个文件）
+
+    没有其他批次正在提交时，第一个提交者立即提交（单个音频没有额外时延）；
+    否则等待 window 秒（或凑满 max_batch 个文件）后提交整批，期间到达的提交并入同一批。
+    同批的所有提交者得到同一个任务 ID，再按 file_url 从任务结果中取回各自的子任务。
+    """
+
+    def __init__(self, submit_many: Callable[[List[str]], str], max_batch: int = 20, window: float = 2.0):
+        """
+        初始化批量提交器
+
+        Args:
+            submit_many: 提交函数 (file_urls) -> task_id
+            max_batch: 每个任务最多包含的文件数
+            window: 等待同批其他文件的时间（秒）
+        """
+        self.submit_many = submit_many
+        self.max_batch = max(1, int(max_batch or 1))
+        self.window = float(window or 0)
+        self._lock = threading.Lock()
+        self._pending = None
+        self._submitting = 0  # 正在调用 submit_many 的批次数
+
+    def submit(self, file_url: str) -> str:
+        """
+        加入当前批次并等待整批提交
+
+        Args:
+            file_url: 音频文件 URL
+
+        Returns:
+            整批的任务 ID
+
+        Raises:
+            TranscriptionError: 整批提交失败
+        """
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                idle = self._submitting == 0
+                batch = self._pending = {"urls": [], "full": threading.Event(), "done": threading.Event(),
+                                         "task_id": None, "error": None}
+            if file_url not in batch["urls"]:
+                batch["urls"].append(file_url)
+            if len(batch["urls"]) >= self.max_batch:
+                # 批次已满，后续提交进入新批次
+                self._pending = None
+                batch["full"].set()
+
+        if not leader:
+            batch["done"].wait()
+        else:
+            if not idle:
+                batch["full"].wait(self.window)
+            with self._lock:
+                if self._pending is batch:
+                    self._pending = None
+                self._submitting += 1
+            try:
+                batch["task_id"] = self.submit_many(batch["urls"])
+            except Exception as e:
+                batch["error"] = e
+            finally:
+                with self._lock:
+                    self._submitting -= 1
+                batch["done"].set()
+
+        if batch["error"] is not None:
+            raise batch["error"]
+        return batch["task_id"]
+
+
+# 进程内共享的批量提交器（同一 API Key + 模型 + 语言的转录器合并提交）
+_batchers: Dict[tuple, BatchSubmitter] = {}
+_batchers_lock = threading.Lock()
+
+# 进程内共享的任务轮询器（按 API Key 区分），处理转录结果（下载、解析）的线程池，
+# 以及并发下载同一任务多个结果文件的线程池（与前者分开，避免结果线程等待自身线程池而死锁）
+_pollers: Dict[str, ASRPoller] = {}
+_result_executor: Optional[ThreadPoolExecutor] = None
+_download_executor: Optional[ThreadPoolExecutor] = None
+_pollers_lock = threading.Lock()
+
+
+def _get_result_executor(max_workers: int) -> ThreadPoolExecutor:
+    """获取处理转录结果的共享线程池（首次调用时按 max_workers 创建）"""
+    global _result_executor
+    with _pollers_lock:
+        if _result_executor is None:
+            _result_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asr-result")
+        return _result_executor
+
+
+def _get_download_executor(max_workers: int) -> ThreadPoolExecutor:
+    """获取下载转录结果文件的共享线程池（首次调用时按 max_workers 创建）"""
+    global _download_executor
+    with _pollers_lock:
+        if _download_executor is None:
+            _download_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asr-download")
+        return _download_executor
+
+
+def iter_paragraphs(sentences: Iterable[Dict], paragraph_gap: float = 2.0) -> Iterator[Dict[str, Any]]:
+    """
+    将句子合并为段落（说话人变化或间隔超过阈值时分段），每个段落结束时立即产出
+
+    Args:
+        sentences: 句子（begin_time/end_time 为毫秒），可以是逐句读取的迭代器
+        paragraph_gap: 段落间隔阈值（秒）
+
+    Yields:
+        段落 {start, end, text, speaker_id}
+    """
+    current_para = {
+        "start": 0,
+        "end": 0,
+        "text": "",
+        "speaker_id": None
+    }
+    # 段落文本先收集为片段，结束时一次拼接（避免长段落反复拼接字符串）
+    parts: List[str] = []
+
+    for sentence in sentences:
+        text = sentence.get('text', '').strip()
+        if not text:
+            continue
+
+        # 转换时间单位：毫秒 -> 秒
+        start = sentence.get('begin_time', 0) / 1000.0
+        end = sentence.get('end_time', 0) / 1000.0
+        speaker_id = sentence.get('speaker_id', None)
+
+        # 如果说话人变化（包括 None -> spk_x / spk_x -> None）或间隔超过阈值，开始新段落
+        current_speaker = current_para["speaker_id"]
+        speaker_changed = (
+            parts and
+            speaker_id != current_speaker and
+            (speaker_id is not None or current_speaker is not None)
+        )
+        time_gap_exceeded = start - current_para["end"] > paragraph_gap
+
+        if (speaker_changed or time_gap_exceeded) and parts:
+            current_para["text"] = "".join(parts)
+            yield current_para
+            current_para = {
+                "start": start,
+                "end": end,
+                "text": "",
+                "speaker_id": speaker_id
+            }
+            parts = [text]
+        else:
+            # 合并到当前段落
+            if not parts:
+                current_para["start"] = start
+                current_para["speaker_id"] = speaker_id
+            current_para["end"] = end
+            parts.append(text)
+
+    # 最后一个段落
+    if parts:
+        current_para["text"] = "".join(parts)
+        yield current_para
+
+
+def process_sentences(sentences: List[Dict], paragraph_gap: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    将句子列表合并为段落（见 iter_paragraphs）
+
+    Args:
+        sentences: 句子列表（begin_time/end_time 为毫秒）
+        paragraph_gap: 段落间隔阈值（秒）
+
+    Returns:
+        段落列表
+    """
+    return list(iter_paragraphs(sentences, paragraph_gap))
+
+
+def process_transcription_data(data: Dict, paragraph_gap: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    处理从 URL 下载的转录数据
+
+    Args:
+        data: 转录数据
+        paragraph_gap: 段落间隔阈值（秒）
+
+    Returns:
+        段落列表
+    """
+    return list(paragraphs_from_groups(iter_raw_sentence_groups([data]), paragraph_gap))
+
+
+def paragraphs_from_raw(raw_results: List[Dict[str, Any]], paragraph_gap: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    将原始转录数据列表转换为段落列表（纯本地计算，不需要 API Key）
+
+    Args:
+        raw_results: 原始转录数据列表
+        paragraph_gap: 段落间隔阈值（秒）
+
+    Returns:
+        段落列表
+    """
+    return list(paragraphs_from_groups(iter_raw_sentence_groups(raw_results), paragraph_gap))
+
+
+def iter_raw_sentence_groups(raw_results: List[Dict[str, Any]]) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    按声道分组逐句遍历内存中的原始转录数据（兼容 transcripts[*].sentences 和 sentences 两种格式）
+
+    Yields:
+        (分组, 句子)
+    """
+    for index, data in enumerate(raw_results):
+        transcripts = data["transcripts"] if "transcripts" in data else [data]
+        for channel, transcript in enumerate(transcripts):
+            for sentence in transcript.get("sentences") or []:
+                yield (index, channel), sentence
+
+
+def paragraphs_from_groups(grouped_sentences: Iterable[Tuple[Any, Dict[str, Any]]],
+                           paragraph_gap: float = 2.0) -> Iterator[Dict[str, Any]]:
+    """
+    将分组的句子流合并为段落流（不同分组即不同声道，段落不跨分组）
+
+    Args:
+        grouped_sentences: (分组, 句子) 迭代器，如 iter_sentences_file 的结果
+        paragraph_gap: 段落间隔阈值（秒）
+
+    Yields:
+        段落
+    """
+    for _, items in itertools.groupby(grouped_sentences, key=lambda item: item[0]):
+        yield from iter_paragraphs((sentence for _, sentence in items), paragraph_gap)
+
+
+# 句子文件中保留的字段（分段只需要时间、文本和说话人，词级时间保留给后续对齐使用）
+SENTENCE_FIELDS = ("begin_time", "end_time", "text", "speaker_id")
+WORD_FIELDS = ("begin_time", "end_time", "text", "punctuation")
+
+
+def compact_sentence(sentence: Dict[str, Any]) -> Dict[str, Any]:
+    """只保留句子的时间、文本、说话人和词级时间，去掉其他冗余字段"""
+    compact = {key: sentence[key] for key in SENTENCE_FIELDS if sentence.get(key) is not None}
+    if sentence.get("words"):
+        compact["words"] = [
+            {key: word[key] for key in WORD_FIELDS if word.get(key) not in (None, "")}
+            for word in sentence["words"]
+        ]
+    return compact
+
+
+def write_sentences(path: str, grouped_sentences: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+    """
+    逐句写入句子文件（精简后 gzip 压缩，先写临时文件再替换）
+
+    文件格式为 [{"transcripts": [{"sentences": [...]}, ...]}]（每个分组一个 transcripts 条目），
+    仍可作为原始转录数据读取。
+
+    Args:
+        path: 句子文件路径（.json.gz）
+        grouped_sentences: (分组, 句子) 迭代器
+
+    Returns:
+        写入的句子数
+    """
+    tmp_path = f"{path}.tmp"
+    count = 0
+    current_group = None
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write('[{"transcripts":[')
+        for group, sentence in grouped_sentences:
+            if count == 0 or group != current_group:
+                f.write('{"sentences":[' if count == 0 else ']},{"sentences":[')
+                current_group = group
+            else:
+                f.write(",")
+            f.write(json.dumps(compact_sentence(sentence), ensure_ascii=False, separators=(",", ":")))
+            count += 1
+        f.write("]}]}]" if count else "]}]")
+    os.replace(tmp_path, path)
+    return count
+
+
+def save_sentences(path: str, raw_results: List[Dict[str, Any]]) -> int:
+    """
+    保存内存中原始转录数据的句子文件（见 write_sentences）
+
+    Args:
+        path: 句子文件路径（.json.gz）
+        raw_results: 原始转录数据列表
+
+    Returns:
+        写入的句子数
+    """
+    return write_sentences(path, iter_raw_sentence_groups(raw_results))
+
+
+def iter_sentences_file(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    逐句读取句子文件或原始转录结果文件（.gz 自动解压，内存占用与文件大小无关）
+
+    Args:
+        path: 文件路径
+
+    Yields:
+        (分组, 句子)
+    """
+    return iter_sentence_groups(iter_file_chunks(path))
+
+
 class QwenTranscriber:
     """通义千问转录器"""
 
@@ -33,6 +370,24 @@ class QwenTranscriber:
         self.model = self.config.get("model", "paraformer-v2")
         self.language = self.config.get("language", "zh")
         self.paragraph_gap = self.config.get("paragraph_gap", 2.0)
+        # 说话人分离：开启后结果中的句子包含 speaker_id
+        self.diarization = bool(self.config.get("diarization", True))
+        # 查询转录任务状态的间隔（秒）：首次查询按音频时长估计，之后逐步退避到最长间隔
+        self.poll_interval = self.config.get("poll_interval") or 5.0
+        self.poll_max_interval = self.config.get("poll_max_interval") or 60.0
+        self.poll_duration_ratio = self.config.get("poll_duration_ratio", 0.05)
+        # 任务结束后下载、解析转录结果的线程数（进程内共享）
+        self.result_workers = self.config.get("result_workers") or 4
+        # 同一任务有多个结果文件时并发下载的线程数（进程内共享），以及每个文件的下载尝试次数
+        self.download_workers = self.config.get("download_workers") or 4
+        self.download_retries = max(1, int(self.config.get("download_retries") or 3))
+        # 下载转录结果用的 HTTP 会话（默认使用进程内共享的连接池会话）
+        self.session = self.config.get("session")
+        # 本地文件的签名 URL 发布器（默认使用进程内共享的发布器，未配置 media.public_base_url 时提交 file:// 路径）
+        self.publisher = self.config.get("publisher")
+        # 批量提交：每个任务最多包含的文件数（1 表示每个文件单独提交），以及凑批等待时间
+        self.batch_size = max(1, int(self.config.get("batch_size") or 1))
+        self.batch_window = self.config.get("batch_window", 2.0)
 
         if not self.api_key:
             raise TranscriptionError(
@@ -57,120 +412,501 @@ class QwenTranscriber:
         hints = [part.strip() for part in text.split(',') if part.strip()]
         return hints or ['zh', 'en']
 
-    def transcribe(self, audio_path: str, audio_url: str = None) -> List[Dict[str, Any]]:
+    def transcribe(self, audio_path: str, audio_url: str = None, task_id: str = None,
+                   on_submit=None, on_result=None, on_status=None,
+                   file_urls: List[str] = None, audio_duration: float = None,
+                   output_paths: Tuple[str, str] = None, audio_sha256: str = None) -> Optional[List[Dict[str, Any]]]:
         """
-        使用通义千问 API 转录音频文件
+        使用通义千问 API 转录音频文件（阻塞直到转录完成）
 
         Args:
             audio_path: 音频文件路径（本地）
             audio_url: 音频文件的 HTTP/HTTPS URL（优先使用）
+            task_id: 已提交的任务 ID（断点续传时传入，跳过提交直接轮询）
+            on_submit: 任务提交后的回调 (task_id, file_urls)，用于保存检查点
+            on_result: 下载到原始转录结果后的回调 (raw_results)，用于保存检查点；
+                       结果直接写入文件时参数为 None
+            on_status: 每次查询任务状态后的回调 (task_status)，用于上报进度
+            file_urls: 已提交任务中属于本音频的文件 URL（批量任务据此取回自己的结果）
+            audio_duration: 音频时长（秒），用于估计查询间隔
+            output_paths: (原始结果路径, 句子文件路径)，提供时结果边下载边解析、直接写入文件（见 download_results），
+                          不在内存中展开
+            audio_sha256: 音频内容的 SHA-256（发布本地文件时复用同一内容已签发的 URL）
 
         Returns:
-            段落列表，每个段落包含 start, end, text
+            段落列表，每个段落包含 start, end, text；提供 output_paths 时为 None
 
         Raises:
             TranscriptionError: 转录失败
         """
+        return self.transcribe_async(
+            audio_path, audio_url=audio_url, task_id=task_id, on_submit=on_submit, on_result=on_result,
+            on_status=on_status, file_urls=file_urls, audio_duration=audio_duration, output_paths=output_paths,
+            audio_sha256=audio_sha256
+        ).result()
+
+    def transcribe_async(self, audio_path: str, audio_url: str = None, task_id: str = None,
+                         on_submit=None, on_result=None, on_status=None,
+                         file_urls: List[str] = None, audio_duration: float = None,
+                         output_paths: Tuple[str, str] = None, audio_sha256: str = None) -> Future:
+        """
+        提交转录任务并交给共享轮询器等待，不占用调用线程
+
+        提交在调用线程中完成（失败时直接抛出）；任务结束后在结果线程池中下载并解析结果，
+        on_status 在轮询线程中、on_result 在结果线程池中调用。参数同 transcribe。
+
+        Returns:
+            以段落列表（提供 output_paths 时为 None）完成的 Future（任务本身失败、不存在或已过期时以 ASRTaskFailedError 结束，
+            查询或结果下载失败时以 TranscriptionError 结束）
+
+        Raises:
+            TranscriptionError: 提交失败
+        """
         logger.info(f"开始使用通义千问 API 转录音频: {audio_path}")
         start_time = time.time()
 
         try:
-            # 使用通义千问的语音识别 API
-            logger.info("正在调用通义千问语音识别 API...")
+            if task_id:
+                logger.info(f"复用已提交的转录任务: {task_id}")
+            else:
+                task_id, file_urls = self.submit(audio_path, audio_url, audio_sha256=audio_sha256)
+                if on_submit:
+                    on_submit(task_id, file_urls)
+        except Exception as e:
+            raise self._transcription_error(e)
+
+        future = Future()
+
+        def complete(output_future: Future):
+            try:
+                output = self._check_output(task_id, output_future.result(), partial_ok=bool(file_urls))
+                if output_paths:
+                    count = self.download_results(output, *output_paths, file_urls=file_urls)
+                    if on_result:
+                        on_result(None)
+                    logger.info(f"通义千问转录完成: {count} 句, 耗时 {time.time() - start_time:.1f}s")
+                    future.set_result(None)
+                    return
+
+                raw_results = self.fetch_results(output, file_urls=file_urls)
+                if on_result:
+                    on_result(raw_results)
+
+                paragraphs = self.paragraphs_from_raw(raw_results)
+
+                elapsed_time = time.time() - start_time
+                logger.info(
+                    f"通义千问转录完成: {len(paragraphs)} 个段落, "
+                    f"耗时 {elapsed_time:.1f}s"
+                )
+                future.set_result(paragraphs)
+            except Exception as e:
+                future.set_exception(self._transcription_error(e))
+
+        logger.info("等待转录完成...")
+        output_future = self._get_poller().track(task_id, audio_duration=audio_duration, on_status=on_status)
+        # 轮询线程只负责查询，结果下载和解析放到结果线程池中执行
+        output_future.add_done_callback(lambda f: _get_result_executor(self.result_workers).submit(complete, f))
+        return future
+
+    @staticmethod
+    def _transcription_error(error: Exception) -> "TranscriptionError":
+        """记录错误并统一转换为 TranscriptionError"""
+        logger.error(f"转录失败: {error}")
+        if isinstance(error, TranscriptionError):
+            return error
+        if isinstance(error, ASRTaskGoneError):
+            return ASRTaskFailedError(f"转录失败: {error}")
+        return TranscriptionError(f"转录失败: {error}")
+
+    def submit(self, audio_path: str, audio_url: str = None, audio_sha256: str = None):
+        """
+        提交异步转录任务（启用批量提交时与其他线程的文件合并为一个任务）
 
-            from dashscope.audio.asr import Transcription
+        没有 audio_url 时，可发布目录中的本地文件以本服务签发的 URL 提交（见 media_server），
+        否则提交 file:// 路径。
 
-            # 优先使用 HTTP URL，因为通义千问 API 需要可访问的 URL
-            if audio_url and audio_url.strip():
-                logger.info(f"使用音频 URL: {audio_url}")
-                file_urls = [audio_url]
-            else:
-                # 如果没有 URL，使用本地文件上传
-                logger.info(f"使用本地文件: {audio_path}")
-                if not Path(audio_path).exists():
-                    raise TranscriptionError(f"音频文件不存在: {audio_path}")
+        Args:
+            audio_path: 音频文件路径（本地）
+            audio_url: 音频文件的 HTTP/HTTPS URL（优先使用）
+            audio_sha256: 音频内容的 SHA-256（复用同一内容已签发的 URL）
 
-                # 通义千问 API 支持直接上传本地文件
+        Returns:
+            (task_id, file_urls)，file_urls 为本音频对应的文件 URL
+
+        Raises:
+            TranscriptionError: 提交失败
+        """
+        # 优先使用 HTTP URL，因为通义千问 API 需要可访问的 URL
+        if audio_url and audio_url.strip():
+            logger.info(f"使用音频 URL: {audio_url}")
+            file_urls = [audio_url]
+        else:
+            # 如果没有 URL，使用本地文件上传
+            logger.info(f"使用本地文件: {audio_path}")
+            if not Path(audio_path).exists():
+                raise TranscriptionError(f"音频文件不存在: {audio_path}")
+
+            publisher = self.publisher or media_server.get_publisher()
+            published_url = publisher.publish(audio_path, sha256=audio_sha256)
+            if published_url:
+                file_urls = [published_url]
+                logger.info(f"使用本地文件的签名 URL: {published_url.split('?')[0]}")
+            else:
                 # 使用标准 file URI（Windows 下自动处理空格与路径分隔符）
                 file_urls = [Path(audio_path).resolve().as_uri()]
                 logger.info(f"使用本地文件路径: {file_urls[0]}")
 
-            language_hints = self._parse_language_hints()
+        if self.batch_size > 1:
+            task_id = self._get_batcher().submit(file_urls[0])
+        else:
+            task_id = self.submit_many(file_urls)
+        return task_id, file_urls
+
+    def cache_options(self) -> Dict[str, Any]:
+        """影响识别结果的参数（与模型一起作为 ASR 结果缓存键的一部分）"""
+        return {
+            "language_hints": self._parse_language_hints(),
+            "diarization": self.diarization,
+        }
 
-            # 提交异步转录任务
-            task_response = Transcription.async_call(
-                model=self.model,  # 使用配置的模型
-                file_urls=file_urls,
-                language_hints=language_hints,
-                diarization_enabled=True  # 开启说话人分离功能，导出的结果会包含speaker_id字段,用于区分不同的说话人
-            )
+    def submit_many(self, file_urls: List[str]) -> str:
+        """
+        提交一个包含多个文件的异步转录任务
 
-            if task_response.status_code != HTTPStatus.OK:
-                error_msg = f"API 请求失败: {task_response.status_code} - {task_response.message}"
-                logger.error(error_msg)
-                raise TranscriptionError(error_msg)
-
-            # 获取任务 ID
-            task_id = task_response.output['task_id']
-            logger.info(f"转录任务已提交，任务 ID: {task_id}")
-
-            # 轮询任务状态
-            logger.info("等待转录完成...")
-            transcription_response = Transcription.wait(task=task_id)
-
-            if transcription_response.status_code != HTTPStatus.OK:
-                error_msg = f"转录失败: {transcription_response.status_code} - {transcription_response.message}"
-                logger.error(error_msg)
-                raise TranscriptionError(error_msg)
-
-            # 解析结果
-            logger.info(f"API 响应: {transcription_response.output}")
-
-            if not transcription_response.output:
-                raise TranscriptionError("API 返回结果为空")
-
-            # 检查是否有转录结果 URL
-            paragraphs = []
-            if 'results' in transcription_response.output:
-                results = transcription_response.output['results']
-                if results and len(results) > 0:
-                    import requests
-
-                    for result in results:
-                        if result.get('subtask_status') != 'SUCCEEDED':
-                            logger.warning(f"子任务失败，已跳过: {result}")
-                            continue
-
-                        # 如果有 transcription_url，需要下载
-                        if 'transcription_url' in result:
-                            transcription_url = result['transcription_url']
-                            logger.info(f"下载转录结果: {transcription_url}")
-
-                            response = requests.get(transcription_url)
-                            response.raise_for_status()
-                            transcription_data = response.json()
-
-                            # 处理转录数据
-                            paragraphs.extend(self._process_transcription_data(transcription_data))
-                        elif 'sentences' in result:
-                            # 直接包含句子数据
-                            paragraphs.extend(self._process_sentences(result['sentences']))
-                        else:
-                            logger.warning(f"未知的结果格式: {result}")
-
-            elapsed_time = time.time() - start_time
-            logger.info(
-                f"通义千问转录完成: {len(paragraphs)} 个段落, "
-                f"耗时 {elapsed_time:.1f}s"
-            )
+        Args:
+            file_urls: 音频文件 URL 列表（结果按 file_url 区分）
+
+        Returns:
+            任务 ID
+
+        Raises:
+            TranscriptionError: 提交失败
+        """
+        logger.info(f"正在调用通义千问语音识别 API（{len(file_urls)} 个文件）...")
+
+        from dashscope.audio.asr import Transcription
+
+        language_hints = self._parse_language_hints()
+
+        # 提交异步转录任务（经过共享限流器，被限流时降速重试）
+        task_response = call_with_limit(ASR_PROVIDER, self.api_key, lambda: Transcription.async_call(
+            model=self.model,  # 使用配置的模型
+            file_urls=file_urls,
+            language_hints=language_hints,
+            diarization_enabled=self.diarization  # 开启说话人分离功能，导出的结果会包含speaker_id字段,用于区分不同的说话人
+        ))
+
+        if task_response.status_code != HTTPStatus.OK:
+            error_msg = f"API 请求失败: {task_response.status_code} - {task_response.message}"
+            logger.error(error_msg)
+            raise TranscriptionError(error_msg)
+
+        # 获取任务 ID
+        task_id = task_response.output['task_id']
+        logger.info(f"转录任务已提交，任务 ID: {task_id}")
+        return task_id
+
+    def _get_batcher(self) -> BatchSubmitter:
+        """获取进程内共享的批量提交器（API Key、模型和语言相同的转录器共用）"""
+        key_id = hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()[:12]
+        registry_key = (key_id, self.model, tuple(self._parse_language_hints()), self.diarization)
+        with _batchers_lock:
+            batcher = _batchers.get(registry_key)
+            if batcher is None:
+                batcher = BatchSubmitter(self.submit_many, max_batch=self.batch_size, window=self.batch_window)
+                _batchers[registry_key] = batcher
+            return batcher
+
+    def _get_poller(self) -> ASRPoller:
+        """获取进程内共享的任务轮询器（同一 API Key 的所有任务由一个线程轮询）"""
+        key_id = hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()[:12]
+        with _pollers_lock:
+            poller = _pollers.get(key_id)
+            if poller is None:
+                poller = ASRPoller(
+                    self._query_status,
+                    min_interval=self.poll_interval,
+                    max_interval=self.poll_max_interval,
+                    duration_ratio=self.poll_duration_ratio,
+                    limiter=get_limiter(ASR_PROVIDER, self.api_key)
+                )
+                _pollers[key_id] = poller
+            return poller
+
+    def _query_status(self, task_id: str):
+        """查询一次任务状态（每次查询消耗一个令牌，不占用并发名额）"""
+        from dashscope.audio.asr import Transcription
+
+        with get_limiter(ASR_PROVIDER, self.api_key).limit(concurrent=False):
+            return Transcription.fetch(task=task_id)
+
+    def wait(self, task_id: str, on_status=None, partial_ok: bool = False,
+             audio_duration: float = None) -> Dict[str, Any]:
+        """
+        等待转录任务完成（由共享轮询器查询状态）
 
-            return paragraphs
+        Args:
+            task_id: 任务 ID
+            on_status: 每次查询后的回调 (task_status)
+            partial_ok: 任务整体未成功但有子任务结果时仍返回（批量任务由调用方检查自己的子任务）
+            audio_duration: 音频时长（秒），用于估计查询间隔
+
+        Returns:
+            任务输出（包含 results）
 
+        Raises:
+            ASRTaskFailedError: 任务失败、不存在或已过期
+            TranscriptionError: 查询失败
+        """
+        logger.info("等待转录完成...")
+        try:
+            output = self._get_poller().track(task_id, audio_duration=audio_duration, on_status=on_status).result()
+        except ASRTaskGoneError as e:
+            raise ASRTaskFailedError(str(e))
         except Exception as e:
-            logger.error(f"转录失败: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            raise TranscriptionError(f"转录失败: {e}")
+            raise TranscriptionError(str(e))
+        return self._check_output(task_id, output, partial_ok=partial_ok)
+
+    def _check_output(self, task_id: str, output: Dict[str, Any], partial_ok: bool = False) -> Dict[str, Any]:
+        """检查已结束任务的状态（未成功时抛出 ASRTaskFailedError）"""
+        logger.info(f"API 响应: {output}")
+
+        task_status = output.get('task_status')
+        if task_status and task_status not in ('SUCCEEDED',):
+            if not (partial_ok and output.get('results')):
+                raise ASRTaskFailedError(f"转录任务未成功: {task_id} ({task_status})")
+
+        return output
+
+    def _select_results(self, output: Dict[str, Any], file_urls: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        取出任务输出中成功的子任务
+
+        Args:
+            output: 任务输出
+            file_urls: 只取这些文件的子任务（批量任务中属于本音频的文件），为空时取全部
+
+        Returns:
+            成功的子任务列表
+
+        Raises:
+            ASRTaskFailedError: 指定文件的子任务全部失败或不在任务结果中
+        """
+        results = output.get('results') or []
+        if file_urls:
+            results = [result for result in results if result.get('file_url') in file_urls]
+            failed = [result for result in results if result.get('subtask_status') != 'SUCCEEDED']
+            if not results or len(failed) == len(results):
+                detail = failed[0].get('message') or failed[0].get('code') if failed else "任务结果中没有该文件"
+                raise ASRTaskFailedError(f"子任务失败: {detail}")
+
+        succeeded = []
+        for result in results:
+            if result.get('subtask_status') != 'SUCCEEDED':
+                logger.warning(f"子任务失败，已跳过: {result}")
+            elif 'transcription_url' in result or 'sentences' in result:
+                succeeded.append(result)
+            else:
+                logger.warning(f"未知的结果格式: {result}")
+        return succeeded
+
+    def _with_retries(self, download: Callable[[], Any], url: str) -> Any:
+        """
+        下载转录结果，失败时指数退避重试
+
+        Args:
+            download: 下载函数（每次重试重新调用，需自行从头写入）
+            url: 结果地址（日志用）
+
+        Returns:
+            下载函数的返回值
+
+        Raises:
+            TranscriptionError: 重试次数用尽
+        """
+        for attempt in range(self.download_retries):
+            try:
+                return download()
+            except (requests.RequestException, OSError, ValueError) as e:
+                if attempt == self.download_retries - 1:
+                    raise TranscriptionError(f"下载转录结果失败（已重试 {self.download_retries} 次）: {e}")
+                logger.warning(f"下载转录结果失败（尝试 {attempt + 1}/{self.download_retries}）: {url}: {e}")
+                time.sleep(2 ** attempt)
+
+    def _map_results(self, fetch: Callable[[int, Dict[str, Any]], Any], results: List[Dict[str, Any]]) -> List[Any]:
+        """
+        并发处理各子任务的结果（有界的共享线程池；只有一个结果时在当前线程执行）
+
+        全部结束后才抛出第一个异常，不会留下仍在写文件的下载。
+
+        Args:
+            fetch: 处理函数 (序号, 子任务) -> 结果
+            results: 子任务列表
+
+        Returns:
+            与 results 顺序一致的结果列表
+        """
+        if len(results) <= 1:
+            return [fetch(index, result) for index, result in enumerate(results)]
+
+        executor = _get_download_executor(self.download_workers)
+        futures = [executor.submit(fetch, index, result) for index, result in enumerate(results)]
+        wait_futures(futures)
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _result_order(results: List[Dict[str, Any]], first_begin_times: List[float],
+                      file_urls: List[str] = None) -> List[int]:
+        """
+        结果的确定顺序：先按文件（提交时的 file_urls 顺序，未指定时按在任务结果中首次出现的顺序），
+        同一文件的多个子任务再按首句开始时间
+
+        Returns:
+            排序后的结果序号列表
+        """
+        file_rank = {url: rank for rank, url in enumerate(file_urls or [])}
+        for result in results:
+            file_rank.setdefault(result.get('file_url'), len(file_rank))
+        return sorted(
+            range(len(results)),
+            key=lambda index: (file_rank[results[index].get('file_url')], first_begin_times[index], index)
+        )
+
+    def fetch_results(self, output: Dict[str, Any], file_urls: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        下载任务输出中各子任务的原始转录结果（整体读入内存，适合分段等较短的音频）
+
+        多个结果文件并发下载（失败时重试），按文件和首句开始时间排序。
+
+        Args:
+            output: 任务输出
+            file_urls: 只取这些文件的子任务（批量任务中属于本音频的文件），为空时取全部
+
+        Returns:
+            原始转录数据列表（每项为 transcription_url 下载的 JSON，
+            或 {"sentences": [...]}）
+
+        Raises:
+            TranscriptionError: 指定文件的子任务全部失败或不在任务结果中，或下载失败
+        """
+        results = self._select_results(output, file_urls)
+        session = self.session or http_client.get_session()
+
+        def fetch(index: int, result: Dict[str, Any]) -> Dict[str, Any]:
+            if 'transcription_url' not in result:
+                # 直接包含句子数据
+                return {"sentences": result['sentences']}
+
+            transcription_url = result['transcription_url']
+            logger.info(f"下载转录结果: {transcription_url}")
+
+            def download():
+                response = session.get(transcription_url)
+                response.raise_for_status()
+                return response.json()
+
+            return self._with_retries(download, transcription_url)
+
+        raw_results = self._map_results(fetch, results)
+        first_begin_times = [
+            next((sentence.get('begin_time', 0) for _, sentence in iter_raw_sentence_groups([data])), 0)
+            for data in raw_results
+        ]
+        return [raw_results[index] for index in self._result_order(results, first_begin_times, file_urls)]
+
+    def download_results(self, output: Dict[str, Any], raw_path: str, sentences_path: str,
+                         file_urls: List[str] = None, chunk_size: int = 64 * 1024) -> int:
+        """
+        流式下载各子任务的转录结果，内存占用与节目时长无关
+
+        多个结果文件并发下载到临时文件（失败时重试），全部完成后按文件和首句开始时间排序，
+        原样拼接为原始结果文件（JSON 数组），同时增量解析出句子逐句写入句子文件。
+
+        Args:
+            output: 任务输出
+            raw_path: 原始结果文件路径（内容与 fetch_results 的返回值相同）
+            sentences_path: 句子文件路径（见 write_sentences）
+            file_urls: 只取这些文件的子任务，为空时取全部
+            chunk_size: 每次读写的字节数
+
+        Returns:
+            句子数
+
+        Raises:
+            TranscriptionError: 指定文件的子任务全部失败或不在任务结果中，或下载失败
+        """
+        results = self._select_results(output, file_urls)
+        session = self.session or http_client.get_session()
+        parts_dir = Path(f"{raw_path}.parts")
+        parts_dir.mkdir(parents=True, exist_ok=True)
+
+        def fetch(index: int, result: Dict[str, Any]) -> str:
+            part_path = str(parts_dir / f"{index}.json")
+            if 'transcription_url' not in result:
+                with open(part_path, "w", encoding="utf-8") as f:
+                    json.dump({"sentences": result['sentences']}, f, ensure_ascii=False)
+                return part_path
+
+            transcription_url = result['transcription_url']
+            logger.info(f"下载转录结果: {transcription_url}")
+
+            def download():
+                with session.get(transcription_url, stream=True) as response:
+                    response.raise_for_status()
+                    with open(part_path, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                return part_path
+
+            return self._with_retries(download, transcription_url)
+
+        def grouped_sentences(raw_file, part_paths):
+            raw_file.write(b"[")
+            for position, part_path in enumerate(part_paths):
+                if position:
+                    raw_file.write(b",")
+
+                def tee():
+                    for chunk in iter_file_chunks(part_path, chunk_size):
+                        raw_file.write(chunk)
+                        yield chunk
+
+                stream = tee()
+                for group, sentence in iter_sentence_groups(stream):
+                    yield (position, group), sentence
+                # JSON 之后剩余的空白也原样写入
+                for _ in stream:
+                    pass
+            raw_file.write(b"]")
+
+        try:
+            part_paths = self._map_results(fetch, results)
+            first_begin_times = [
+                next((sentence.get('begin_time', 0) for _, sentence in iter_sentences_file(path)), 0)
+                for path in part_paths
+            ]
+            ordered = [part_paths[index] for index in self._result_order(results, first_begin_times, file_urls)]
+
+            tmp_raw_path = f"{raw_path}.tmp"
+            with open(tmp_raw_path, "wb") as raw_file:
+                count = write_sentences(sentences_path, grouped_sentences(raw_file, ordered))
+            os.replace(tmp_raw_path, raw_path)
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+        return count
+
+    def paragraphs_from_raw(self, raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将原始转录数据转换为段落列表
+
+        Args:
+            raw_results: fetch_results 返回的原始数据列表
+
+        Returns:
+            段落列表
+        """
+        return paragraphs_from_raw(raw_results, self.paragraph_gap)
 
     def _process_transcription_data(self, data: Dict) -> List[Dict[str, Any]]:
         """
@@ -182,17 +918,7 @@ class QwenTranscriber:
         Returns:
             段落列表
         """
-        paragraphs = []
-
-        # 尝试不同的数据格式
-        if 'transcripts' in data:
-            for transcript in data['transcripts']:
-                if 'sentences' in transcript:
-                    paragraphs.extend(self._process_sentences(transcript['sentences']))
-        elif 'sentences' in data:
-            paragraphs = self._process_sentences(data['sentences'])
-
-        return paragraphs
+        return process_transcription_data(data, self.paragraph_gap)
 
     def _process_sentences(self, sentences: List[Dict]) -> List[Dict[str, Any]]:
         """
@@ -204,54 +930,7 @@ class QwenTranscriber:
         Returns:
             段落列表
         """
-        paragraphs = []
-        current_para = {
-            "start": 0,
-            "end": 0,
-            "text": "",
-            "speaker_id": None
-        }
-
-        for sentence in sentences:
-            text = sentence.get('text', '').strip()
-            if not text:
-                continue
-
-            # 转换时间单位：毫秒 -> 秒
-            start = sentence.get('begin_time', 0) / 1000.0
-            end = sentence.get('end_time', 0) / 1000.0
-            speaker_id = sentence.get('speaker_id', None)
-
-            # 如果说话人变化（包括 None -> spk_x / spk_x -> None）或间隔超过阈值，开始新段落
-            current_speaker = current_para["speaker_id"]
-            speaker_changed = (
-                current_para["text"] and
-                speaker_id != current_speaker and
-                (speaker_id is not None or current_speaker is not None)
-            )
-            time_gap_exceeded = start - current_para["end"] > self.paragraph_gap
-
-            if (speaker_changed or time_gap_exceeded) and current_para["text"]:
-                paragraphs.append(current_para)
-                current_para = {
-                    "start": start,
-                    "end": end,
-                    "text": text,
-                    "speaker_id": speaker_id
-                }
-            else:
-                # 合并到当前段落
-                if not current_para["text"]:
-                    current_para["start"] = start
-                    current_para["speaker_id"] = speaker_id
-                current_para["end"] = end
-                current_para["text"] += text
-
-        # 添加最后一个段落
-        if current_para["text"]:
-            paragraphs.append(current_para)
-
-        return paragraphs
+        return process_sentences(sentences, self.paragraph_gap)
 
     def save_transcript(self, paragraphs: List[Dict[str, Any]],
                        save_path: str, metadata: dict = None) -> str:
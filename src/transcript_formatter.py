@@ -9,9 +9,42 @@ from typing import List, Dict, Any
 from loguru import logger
 
 
+# 已注册的 PDF 字体名称（None 表示尚未注册）
+_pdf_font_name = None
+
+
+def _register_chinese_font() -> str:
+    """
+    注册 PDF 中文字体（解析 TTF 较慢，结果在进程内缓存）
+
+    Returns:
+        可用的字体名称
+    """
+    global _pdf_font_name
+    if _pdf_font_name:
+        return _pdf_font_name
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    try:
+        # Windows 系统字体路径
+        font_path = "C:/Windows/Fonts/msyh.ttc"  # 微软雅黑
+        pdfmetrics.registerFont(TTFont('Chinese', font_path))
+        _pdf_font_name = 'Chinese'
+    except:
+        logger.warning("无法加载中文字体，PDF 可能无法正确显示中文")
+        _pdf_font_name = 'Helvetica'
+
+    return _pdf_font_name
+
+
 class TranscriptFormatter:
     """转录结果格式化器"""
 
+    # 模板版本：修改 Markdown/PDF 输出格式时递增，已生成的文件会在重建时更新
+    VERSION = "1"
+
     def __init__(self):
         """初始化格式化器"""
         pass
@@ -154,8 +187,6 @@ class TranscriptFormatter:
             from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
             from reportlab.lib.units import cm
             from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
             from reportlab.lib.enums import TA_LEFT
         except ImportError:
             logger.error("需要安装 reportlab 库: pip install reportlab")
@@ -167,15 +198,8 @@ class TranscriptFormatter:
         # 确保输出目录存在
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-        # 注册中文字体（使用系统字体）
-        try:
-            # Windows 系统字体路径
-            font_path = "C:/Windows/Fonts/msyh.ttc"  # 微软雅黑
-            pdfmetrics.registerFont(TTFont('Chinese', font_path))
-            font_name = 'Chinese'
-        except:
-            logger.warning("无法加载中文字体，PDF 可能无法正确显示中文")
-            font_name = 'Helvetica'
+        # 注册中文字体（使用系统字体，每个进程只注册一次）
+        font_name = _register_chinese_font()
 
         # 创建 PDF 文档
         doc = SimpleDocTemplate(
@@ -121,12 +121,7 @@ def _move_transcript_files(podcast_id: str, old_category: str, new_category: str
             shutil.move(str(old_path), str(new_path))
 
             # 更新数据库中的文件路径
-            cursor = db.conn.cursor()
-            cursor.execute(
-                "UPDATE transcripts SET file_path = ? WHERE id = ?",
-                (str(new_path), transcript['id'])
-            )
-            db.conn.commit()
+            db.update_transcript_path(transcript['id'], str(new_path))
 
             result['moved'].append({
                 'old': str(old_path),
@@ -182,12 +177,7 @@ def _move_note_files(podcast_id: str, old_category: str, new_category: str, base
             shutil.move(str(old_path), str(new_path))
 
             # 更新数据库中的文件路径
-            cursor = db.conn.cursor()
-            cursor.execute(
-                "UPDATE notes SET file_path = ? WHERE id = ?",
-                (str(new_path), note['id'])
-            )
-            db.conn.commit()
+            db.update_note_path(note['id'], str(new_path))
 
             result['moved'].append({
                 'old': str(old_path),
@@ -282,4 +282,22 @@ def delete_podcast_files(podcast_id: str, base_dirs: dict, db=None) -> dict:
                 result['failed'].append(str(file_path))
                 result['success'] = False
 
+    # 删除检查点目录（原始 ASR 结果等）
+    checkpoint_dir = base_dirs.get('checkpoint')
+    if checkpoint_dir:
+        podcast_checkpoint_dir = Path(checkpoint_dir) / podcast_id
+        if podcast_checkpoint_dir.is_dir():
+            for file_path in podcast_checkpoint_dir.iterdir():
+                try:
+                    file_path.unlink()
+                    result['deleted'].append(str(file_path))
+                except Exception as e:
+                    logger.error(f"删除文件失败 {file_path}: {e}")
+                    result['failed'].append(str(file_path))
+                    result['success'] = False
+            try:
+                podcast_checkpoint_dir.rmdir()
+            except OSError:
+                pass
+
     return result
@@ -9,6 +9,8 @@ from pathlib import Path
 import sys
 import markdown
 import os
+import json
+import queue
 import sqlite3
 
 # 添加 src 目录到路径
@@ -22,6 +24,15 @@ from utils.file_migration import move_podcast_files_to_category
 from storage_manager import StorageManager
 from file_uploader import FileUploader
 from ai_chat import create_ai_chat, AIChatError
+from worker import build_job_queue
+from pdf_renderer import PdfRenderer
+from task_events import TaskEventHub, TERMINAL_STATUSES
+from feeds import FeedError
+import rate_limiter
+import http_client
+import admission
+import media_server
+from admission import InsufficientSpaceError
 
 # 创建 Flask 应用
 app = Flask(__name__)
@@ -32,9 +43,23 @@ config_path = Path(__file__).parent.parent.parent / "config" / "config.yaml"
 config = get_config(str(config_path))
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # 生产环境应使用环境变量
 
+# 外部 API 限流（ASR 和大模型调用共享，进程内生效）
+rate_limiter.configure(config.get('rate_limits'))
+
+# 共享 HTTP 连接池（页面解析、音频和转录结果下载复用 keep-alive 连接）
+http_client.configure(config.get('http'))
+
+# 磁盘空间预留和下载总带宽限制（音频下载与纪录片上传共享）
+admission.configure(config.get('admission'))
+
 # 基础目录配置
 project_root = Path(__file__).parent.parent.parent
 
+# 本地文件签名 URL（远程 ASR 服务通过 /media 路由读取上传的文件）
+media_server.configure(config.get('media'), base_dir=str(project_root))
+# 由前端 Web 服务器（Apache/lighttpd 等）直接发送文件，应用只返回 X-Sendfile 头
+app.use_x_sendfile = bool(config.get('media.x_sendfile', False))
+
 # 初始化数据库
 db_path = project_root / config.get("database.path")
 db = get_db(str(db_path))
@@ -48,10 +73,43 @@ uploader = FileUploader(str(project_root / "data" / "uploads"))
 # AI 对话会话存储（使用内存存储，生产环境应使用 Redis）
 chat_sessions = {}
 
+
+# 初始化后台任务队列（下载和转录在工作线程中执行，不占用请求线程）
+# jobs.run_in_web 为 false 时 Web 进程只负责入队，由独立 worker 进程执行（python -m src.worker）
+job_queue = build_job_queue(config, db)
+
+# 订阅源轮询（新节目直接入队，随任务队列一起在 Web 进程或 worker 进程中运行）
+from main import build_feed_poller, build_asr_cache, build_audio_cache
+feed_poller = build_feed_poller(config, db, enqueue=job_queue.enqueue)
+
+
+def start():
+    """
+    启动 Web 进程内的后台线程（任务队列和订阅源轮询，jobs.run_in_web 为 false 时不启动）
+
+    只由服务器入口（run_web.py 或直接运行本模块）调用：导入本模块不会启动任何线程，
+    spawn 方式创建的子进程（重新分段、PDF 生成的进程池）重新导入入口模块时不会认领任务。
+    """
+    if config.get('jobs.run_in_web', True):
+        job_queue.start()
+        feed_poller.start(poll_interval=config.get('feeds.poll_interval', 60))
+
+
+# 任务进度推送（所有 SSE 连接共享一个查询线程）
+task_events = TaskEventHub(db, interval=config.get('jobs.events_interval', 0.5))
+
+# PDF 按需生成（下载时在进程池中生成并缓存）
+pdf_renderer = PdfRenderer(
+    str(project_root / config.get('pdf.cache_dir', 'data/cache/pdf')),
+    max_workers=config.get('pdf.workers', 1),
+    max_files=config.get('pdf.max_cached_files', 200)
+)
+
 base_dirs = {
     'audio': project_root / config.get('storage.audio_dir'),
     'transcript': project_root / config.get('storage.transcript_dir'),
-    'note': project_root / config.get('storage.note_dir')
+    'note': project_root / config.get('storage.note_dir'),
+    'checkpoint': project_root / config.get('storage.checkpoint_dir', 'data/checkpoints')
 }
 
 
@@ -135,6 +193,12 @@ def get_podcasts():
     """获取播客列表"""
     try:
         podcasts = db.get_all_podcasts()
+
+        # 附带未结束任务的 ID，前端据此订阅进度推送
+        active_tasks = {task['podcast_id']: task['id'] for task in db.get_active_tasks()}
+        for podcast in podcasts:
+            podcast['active_task_id'] = active_tasks.get(podcast['id'])
+
         return jsonify({
             'success': True,
             'data': podcasts
@@ -193,26 +257,18 @@ def create_podcast():
                 'error': '缺少 URL 参数'
             }), 400
 
-        # TODO: 提交到 Celery 任务队列
-        # 目前先同步处理
-        from main import process_podcast
-        try:
-            # process_podcast 会自己创建播客记录，不需要在这里创建
-            podcast_id = process_podcast(url, config, db)
+        # 创建播客记录并提交到后台任务队列，立即返回
+        podcast_id = db.create_podcast(url)
+        task_id = job_queue.enqueue(podcast_id, 'podcast', {'url': url})
 
-            return jsonify({
-                'success': True,
-                'data': {
-                    'podcast_id': podcast_id,
-                    'message': '播客处理完成'
-                }
-            })
-        except Exception as e:
-            logger.error(f"处理播客失败: {e}")
-            return jsonify({
-                'success': False,
-                'error': str(e)
-            }), 500
+        return jsonify({
+            'success': True,
+            'data': {
+                'podcast_id': podcast_id,
+                'task_id': task_id,
+                'message': '播客任务已提交，正在排队处理'
+            }
+        }), 202
 
     except Exception as e:
         logger.error(f"创建播客任务失败: {e}")
@@ -226,6 +282,13 @@ def create_podcast():
 def upload_documentary():
     """上传纪录片文件"""
     try:
+        # 读取请求体之前按 Content-Length 检查磁盘空间，空间不足时直接拒绝（不等待）
+        if request.content_length and admission.get_controller().available_bytes(uploader.upload_dir) < request.content_length:
+            return jsonify({
+                'success': False,
+                'error': '服务器磁盘空间不足，请稍后再试'
+            }), 507
+
         # 检查是否有文件
         if 'file' not in request.files:
             return jsonify({
@@ -255,24 +318,26 @@ def upload_documentary():
                 'error': error_msg
             }), 400
 
-        # 创建纪录片记录
-        if not title:
-            title = Path(file.filename).stem  # 使用文件名（不含扩展名）作为标题
+        # 保存前按文件大小预留磁盘空间（与并发下载/上传共享预留，空间不足时直接拒绝）
+        with admission.get_controller().admit(uploader.upload_dir, file_size, timeout=0, label=file.filename):
+            # 创建纪录片记录
+            if not title:
+                title = Path(file.filename).stem  # 使用文件名（不含扩展名）作为标题
 
-        documentary_id = db.create_podcast(
-            url='',  # 纪录片没有 URL
-            title=title
-        )
+            documentary_id = db.create_podcast(
+                url='',  # 纪录片没有 URL
+                title=title
+            )
 
-        # 更新内容类型和原始文件名
-        db.update_podcast(
-            documentary_id,
-            content_type='documentary',
-            original_filename=file.filename
-        )
+            # 更新内容类型和原始文件名
+            db.update_podcast(
+                documentary_id,
+                content_type='documentary',
+                original_filename=file.filename
+            )
 
-        # 保存文件
-        file_path = uploader.save_file(file, file.filename, documentary_id)
+            # 保存文件
+            file_path = uploader.save_file(file, file.filename, documentary_id)
 
         # 获取文件信息
         file_type = uploader.get_file_type(file.filename)
@@ -286,29 +351,27 @@ def upload_documentary():
 
         logger.info(f"纪录片文件上传成功: {documentary_id}, 文件: {file_path}")
 
-        # 提交转录任务
-        try:
-            from main import process_documentary
-            # 异步处理（这里暂时同步处理，后续可以改为 Celery）
-            process_documentary(str(file_path), documentary_id, config, db)
+        # 提交转录任务到后台任务队列
+        task_id = job_queue.enqueue(documentary_id, 'documentary', {'file_path': str(file_path)})
 
-            return jsonify({
-                'success': True,
-                'data': {
-                    'documentary_id': documentary_id,
-                    'title': title,
-                    'file_type': file_type,
-                    'file_size': file_size,
-                    'message': '纪录片上传成功，正在处理中...'
-                }
-            })
-        except Exception as e:
-            logger.error(f"处理纪录片失败: {e}")
-            db.update_podcast(documentary_id, status='failed', error_message=str(e))
-            return jsonify({
-                'success': False,
-                'error': f'处理失败: {str(e)}'
-            }), 500
+        return jsonify({
+            'success': True,
+            'data': {
+                'documentary_id': documentary_id,
+                'task_id': task_id,
+                'title': title,
+                'file_type': file_type,
+                'file_size': file_size,
+                'message': '纪录片上传成功，正在处理中...'
+            }
+        }), 202
+
+    except InsufficientSpaceError as e:
+        logger.warning(f"上传纪录片被拒绝: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 507
 
     except Exception as e:
         logger.error(f"上传纪录片失败: {e}")
@@ -320,6 +383,134 @@ def upload_documentary():
         }), 500
 
 
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    """获取后台任务状态"""
+    try:
+        task = db.get_task(task_id)
+        if not task:
+            return jsonify({
+                'success': False,
+                'error': '任务不存在'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'data': task
+        })
+    except Exception as e:
+        logger.error(f"获取任务状态失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _task_event_stream(task_ids):
+    """
+    生成任务进度的 SSE 数据流，所有任务结束后发送 done 事件并关闭
+
+    Args:
+        task_ids: 任务 ID 列表
+    """
+    subscription = task_events.subscribe(task_ids)
+    pending = set(subscription.task_ids)
+    try:
+        while pending:
+            try:
+                event = subscription.events.get(timeout=15)
+            except queue.Empty:
+                # 保持连接（避免代理超时断开）
+                yield ": keepalive\n\n"
+                continue
+
+            yield f"event: progress\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if event['status'] in TERMINAL_STATUSES:
+                pending.discard(event['id'])
+
+        yield "event: done\ndata: {}\n\n"
+    finally:
+        task_events.unsubscribe(subscription)
+
+
+def _sse_response(task_ids):
+    """构造 SSE 响应"""
+    return Response(
+        _task_event_stream(task_ids),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@app.route('/api/tasks/<task_id>/events', methods=['GET'])
+def task_events_stream(task_id):
+    """推送单个任务的进度（Server-Sent Events）"""
+    if not db.get_task(task_id):
+        return jsonify({
+            'success': False,
+            'error': '任务不存在'
+        }), 404
+    return _sse_response([task_id])
+
+
+@app.route('/api/tasks/events', methods=['GET'])
+def tasks_events_stream():
+    """推送多个任务的进度（Server-Sent Events），参数 ids 为逗号分隔的任务 ID"""
+    task_ids = [task_id for task_id in request.args.get('ids', '').split(',') if task_id]
+    if not task_ids:
+        return jsonify({
+            'success': False,
+            'error': '缺少 ids 参数'
+        }), 400
+    return _sse_response(task_ids)
+
+
+def _resolve_transcript_json(transcript_path):
+    """
+    查找转录文件对应的 JSON 版本
+
+    兼容目录结构: .../md/xxx.md 或 .../pdf/xxx.pdf -> .../json/xxx.json
+
+    Returns:
+        JSON 路径，不存在时返回 None
+    """
+    candidates = [transcript_path]
+
+    if transcript_path.suffix.lower() != '.json':
+        candidates.append(transcript_path.with_suffix('.json'))
+
+        parts = list(transcript_path.parts)
+        for format_dir in ('md', 'pdf'):
+            if format_dir in parts:
+                index = parts.index(format_dir)
+                candidates.append(Path(*parts[:index], 'json', *parts[index + 1:]).with_suffix('.json'))
+
+    for candidate in candidates:
+        if candidate.exists() and candidate.suffix.lower() == '.json':
+            return candidate
+    return None
+
+
+def _read_text(file_path):
+    """读取文本文件内容"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _ensure_note_record(podcast_id, note_type, file_path, model_name='', created=True):
+    """
+    确保笔记记录存在
+
+    新生成的笔记总是创建记录；复用已有笔记时仅在记录缺失（例如已被删除）时补建
+    """
+    if not created and any(n['file_path'] == file_path for n in db.get_notes(podcast_id)):
+        return
+    db.create_note(podcast_id, note_type, file_path, model_name=model_name)
+
+
 @app.route('/api/notes/generate', methods=['POST'])
 def generate_note():
     """生成笔记"""
@@ -328,6 +519,7 @@ def generate_note():
         podcast_id = data.get('podcast_id')
         note_type = data.get('note_type', 'auto')  # auto 或 ai
         ai_provider = data.get('ai_provider', 'qwen')  # AI 提供商
+        force = bool(data.get('force', False))  # 忽略已生成的笔记强制重新生成
 
         if not podcast_id:
             return jsonify({
@@ -346,24 +538,7 @@ def generate_note():
         transcript_path = transcripts[0]['file_path']
 
         # 优先使用 JSON 转录作为结构化数据源，避免 Markdown 解析造成信息损失
-        transcript_path_obj = Path(transcript_path)
-        transcript_candidates = [transcript_path_obj]
-
-        if transcript_path_obj.suffix.lower() != '.json':
-            transcript_candidates.append(transcript_path_obj.with_suffix('.json'))
-
-            # 兼容目录结构: .../md/xxx.md -> .../json/xxx.json
-            parts = list(transcript_path_obj.parts)
-            if 'md' in parts:
-                md_index = parts.index('md')
-                json_path_obj = Path(*parts[:md_index], 'json', *parts[md_index + 1:]).with_suffix('.json')
-                transcript_candidates.append(json_path_obj)
-
-        resolved_transcript_path = transcript_path_obj
-        for candidate in transcript_candidates:
-            if candidate.exists() and candidate.suffix.lower() == '.json':
-                resolved_transcript_path = candidate
-                break
+        resolved_transcript_path = _resolve_transcript_json(Path(transcript_path)) or Path(transcript_path)
 
         # 加载转录段落
         from utils.transcript_loader import load_transcript
@@ -387,43 +562,53 @@ def generate_note():
         podcast = db.get_podcast(podcast_id)
         category = podcast.get('category', '') if podcast else ''
 
+        # 笔记产物依赖转录 JSON 的内容哈希，转录和参数未变化时直接返回已生成的笔记
+        from artifacts import ArtifactGraph
+        graph = ArtifactGraph(db, podcast_id)
+        graph.add_source('transcript', str(resolved_transcript_path))
+
         if note_type == 'auto':
             # 规则引擎笔记
             from analyzer import TextAnalyzer
             from note_generator import NoteGenerator
 
-            analyzer = TextAnalyzer({
+            analyzer_config = {
                 'top_keywords': config.get('analyzer.top_keywords'),
                 'top_sentences': config.get('analyzer.top_sentences'),
                 'min_sentence_length': config.get('analyzer.min_sentence_length')
-            })
-
-            analysis_result = analyzer.analyze(paragraphs)
+            }
 
-            generator = NoteGenerator()
-            note = generator.generate_from_analysis(
-                analysis_result,
-                podcast_info={
-                    'podcast_id': podcast_id,
-                    'generated_at': '2026-02-24',
-                    'duration': paragraphs[-1]['end'] if paragraphs else 0
-                }
-            )
+            def build_auto_note(target):
+                analyzer = TextAnalyzer(analyzer_config)
+                analysis_result = analyzer.analyze(paragraphs)
+
+                generator = NoteGenerator()
+                note = generator.generate_from_analysis(
+                    analysis_result,
+                    podcast_info={
+                        'podcast_id': podcast_id,
+                        'generated_at': '2026-02-24',
+                        'duration': paragraphs[-1]['end'] if paragraphs else 0
+                    }
+                )
+                generator.save_note(note, target)
 
             # 保存笔记（使用分类存储）
             output_path = storage.get_note_path(podcast_id, 'auto', category, 'md')
-            storage.ensure_directory(output_path)
-            generator.save_note(note, str(output_path))
+            graph.add('note_auto', str(output_path), build_auto_note,
+                      inputs=['transcript'], params=analyzer_config)
+            rebuilt = graph.build(['note_auto'], force=force)
 
             # 创建笔记记录
-            db.create_note(podcast_id, 'auto', str(output_path))
+            _ensure_note_record(podcast_id, 'auto', str(output_path), created=bool(rebuilt))
 
             return jsonify({
                 'success': True,
                 'data': {
                     'note_type': 'auto',
                     'file_path': str(output_path),
-                    'content': note
+                    'content': _read_text(output_path),
+                    'cached': not rebuilt
                 }
             })
 
@@ -441,30 +626,39 @@ def generate_note():
                     'error': f'未配置 {ai_provider} API Key'
                 }), 400
 
-            generator = create_ai_generator(ai_provider, {
-                f'{ai_provider}_api_key': api_key,
+            generator_config = {
                 f'{ai_provider}_model': config.get(f'ai.{ai_provider}_model'),
                 'max_tokens': config.get('ai.max_tokens'),
                 'temperature': config.get('ai.temperature'),
-                'timeout': config.get('ai.timeout')
-            })
+            }
 
-            note = generator.generate(
-                paragraphs,
-                podcast_info={
-                    'podcast_id': podcast_id,
-                    'duration': paragraphs[-1]['end'] if paragraphs else 0
-                }
-            )
+            def build_ai_note(target):
+                generator = create_ai_generator(ai_provider, {
+                    f'{ai_provider}_api_key': api_key,
+                    **generator_config,
+                    'timeout': config.get('ai.timeout')
+                })
+
+                note = generator.generate(
+                    paragraphs,
+                    podcast_info={
+                        'podcast_id': podcast_id,
+                        'duration': paragraphs[-1]['end'] if paragraphs else 0
+                    }
+                )
+                with open(target, 'w', encoding='utf-8') as f:
+                    f.write(note)
 
             # 保存笔记（使用分类存储）
             output_path = storage.get_note_path(podcast_id, f'{ai_provider}_ai', category, 'md')
-            storage.ensure_directory(output_path)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(note)
+            artifact_name = f'note_{ai_provider}_ai'
+            graph.add(artifact_name, str(output_path), build_ai_note,
+                      inputs=['transcript'], params={'provider': ai_provider, **generator_config})
+            rebuilt = graph.build([artifact_name], force=force)
 
             # 创建笔记记录
-            db.create_note(podcast_id, 'ai', str(output_path), model_name=f'{ai_provider}-ai')
+            _ensure_note_record(podcast_id, 'ai', str(output_path),
+                                model_name=f'{ai_provider}-ai', created=bool(rebuilt))
 
             return jsonify({
                 'success': True,
@@ -472,7 +666,8 @@ def generate_note():
                     'note_type': 'ai',
                     'ai_provider': ai_provider,
                     'file_path': str(output_path),
-                    'content': note
+                    'content': _read_text(output_path),
+                    'cached': not rebuilt
                 }
             })
         else:
@@ -519,10 +714,15 @@ def delete_note_record(note_id):
 
 @app.route('/api/files/download', methods=['POST'])
 def download_file_post():
-    """下载文件（POST方式，避免URL编码问题）"""
+    """下载文件（POST方式，避免URL编码问题）
+
+    format 为 pdf 时（或请求的 PDF 文件不存在时）根据转录 JSON 按需生成 PDF：
+    缓存中没有时在后台开始生成并返回 202（status=generating），前端稍后重试。
+    """
     try:
         data = request.get_json()
         file_path = data.get('file_path')
+        export_format = data.get('format')
 
         if not file_path:
             return jsonify({
@@ -541,6 +741,32 @@ def download_file_post():
 
         logger.info(f"下载请求 - 完整路径: {full_path}")
 
+        if export_format == 'pdf' or (full_path.suffix.lower() == '.pdf' and not full_path.exists()):
+            transcript_json_path = _resolve_transcript_json(full_path)
+            if not transcript_json_path:
+                return jsonify({
+                    'success': False,
+                    'error': '转录文件不存在'
+                }), 404
+
+            pdf_path = pdf_renderer.request_pdf(str(transcript_json_path))
+            if pdf_path is None:
+                # 在后台进程池中生成，不占用请求线程；前端按 Retry-After 重新请求
+                retry_after = config.get('pdf.retry_after', 2)
+                return jsonify({
+                    'success': True,
+                    'data': {
+                        'status': 'generating',
+                        'retry_after': retry_after,
+                        'message': 'PDF 正在生成，请稍候'
+                    }
+                }), 202, {'Retry-After': str(retry_after)}
+            return send_file(
+                pdf_path,
+                as_attachment=True,
+                download_name=transcript_json_path.with_suffix('.pdf').name
+            )
+
         if not full_path.exists():
             return jsonify({
                 'success': False,
@@ -596,6 +822,20 @@ def download_file(file_path):
         }), 500
 
 
+@app.route('/media/<root>/<path:name>', methods=['GET'])
+def serve_media(root, name):
+    """提供签名 URL 对应的本地文件（供远程 ASR 服务读取，支持 Range/HEAD 请求）"""
+    path = media_server.get_publisher().verify(root, name, request.args.get('expires'), request.args.get('sig'))
+    if path is None:
+        return jsonify({
+            'success': False,
+            'error': '链接无效或已过期'
+        }), 403
+
+    # conditional=True 处理 Range 与缓存验证请求；文件内容由 WSGI 服务器的 file_wrapper（sendfile）发送
+    return send_file(path, conditional=True)
+
+
 @app.route('/api/files/preview', methods=['POST'])
 def preview_file():
     """预览文件（使用POST避免URL编码问题）"""
@@ -742,10 +982,126 @@ def get_settings():
         }), 500
 
 
+@app.route('/api/feeds', methods=['GET'])
+def list_feeds():
+    """获取订阅源列表"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': db.list_feeds()
+        })
+    except Exception as e:
+        logger.error(f"获取订阅源列表失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/feeds', methods=['POST'])
+def create_feed():
+    """添加订阅源（立即检查一次，最新节目入队）"""
+    try:
+        data = request.get_json() or {}
+        url = (data.get('url') or '').strip()
+
+        if not url:
+            return jsonify({
+                'success': False,
+                'error': '缺少 URL 参数'
+            }), 400
+
+        feed = feed_poller.subscribe(url, category=data.get('category', ''))
+        return jsonify({
+            'success': True,
+            'data': feed
+        }), 201
+
+    except FeedError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"添加订阅源失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/feeds/<feed_id>', methods=['DELETE'])
+def delete_feed(feed_id):
+    """取消订阅（已入队的节目不受影响）"""
+    if not db.get_feed(feed_id):
+        return jsonify({
+            'success': False,
+            'error': '订阅源不存在'
+        }), 404
+
+    db.delete_feed(feed_id)
+    return jsonify({
+        'success': True,
+        'data': {'feed_id': feed_id}
+    })
+
+
+@app.route('/api/feeds/<feed_id>/check', methods=['POST'])
+def check_feed(feed_id):
+    """立即检查订阅源"""
+    feed = db.get_feed(feed_id)
+    if not feed:
+        return jsonify({
+            'success': False,
+            'error': '订阅源不存在'
+        }), 404
+
+    try:
+        podcast_ids = feed_poller.check_feed(feed)
+        return jsonify({
+            'success': True,
+            'data': {'feed_id': feed_id, 'new_podcast_ids': podcast_ids}
+        })
+    except FeedError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 502
+
+
+@app.route('/api/stats/http', methods=['GET'])
+def get_http_stats():
+    """获取 HTTP 连接池按主机的统计（请求数、流量、延迟）"""
+    return jsonify({
+        'success': True,
+        'data': http_client.get_stats()
+    })
+
+
+@app.route('/api/stats/admission', methods=['GET'])
+def get_admission_stats():
+    """获取磁盘空间预留情况（进行中的下载/上传及预留字节数）"""
+    return jsonify({
+        'success': True,
+        'data': admission.get_controller().stats()
+    })
+
+
+@app.route('/api/stats/asr-cache', methods=['GET'])
+def get_asr_cache_stats():
+    """获取 ASR 结果缓存统计（条目数、占用空间，以及本进程的命中/未命中次数）"""
+    return jsonify({
+        'success': True,
+        'data': build_asr_cache(config, db).stats()
+    })
+
+
 @app.route('/api/podcasts/<podcast_id>', methods=['DELETE'])
 def delete_podcast(podcast_id):
     """删除播客"""
     try:
+        podcast = db.get_podcast(podcast_id)
+
         # 先删除文件（在删除数据库记录之前，这样可以通过数据库找到文件）
         file_result = delete_podcast_files(podcast_id, base_dirs, db)
 
@@ -758,6 +1114,10 @@ def delete_podcast(podcast_id):
                 'error': '删除数据库记录失败'
             }), 500
 
+        # 没有其他播客使用同一音频时删除音频缓存
+        if podcast:
+            build_audio_cache(config, db).release(podcast.get('audio_sha256'))
+
         return jsonify({
             'success': True,
             'data': {
@@ -787,6 +1147,8 @@ def batch_delete_podcasts():
                 'error': '缺少 podcast_ids 参数'
             }), 400
 
+        audio_hashes = {(db.get_podcast(podcast_id) or {}).get('audio_sha256') for podcast_id in podcast_ids}
+
         # 先批量删除文件
         total_files_deleted = 0
         total_files_failed = 0
@@ -799,6 +1161,11 @@ def batch_delete_podcasts():
         # 再批量删除数据库记录
         deleted_count = db.delete_podcasts_batch(podcast_ids)
 
+        # 没有其他播客使用同一音频时删除音频缓存
+        audio_cache = build_audio_cache(config, db)
+        for audio_sha256 in audio_hashes:
+            audio_cache.release(audio_sha256)
+
         return jsonify({
             'success': True,
             'data': {
@@ -835,6 +1202,11 @@ def clear_all_podcasts():
         # 再清空数据库
         deleted_count = db.clear_all_podcasts()
 
+        # 播客已全部删除，其音频缓存也不再需要
+        audio_cache = build_audio_cache(config, db)
+        for audio_sha256 in {p.get('audio_sha256') for p in podcasts}:
+            audio_cache.release(audio_sha256)
+
         return jsonify({
             'success': True,
             'data': {
@@ -888,24 +1260,14 @@ def rename_podcast(podcast_id):
                     transcripts = db.get_transcripts_by_podcast(podcast_id)
                     for transcript in transcripts:
                         if transcript['file_path'] in old_path:
-                            cursor = db.conn.cursor()
-                            cursor.execute(
-                                "UPDATE transcripts SET file_path = ? WHERE id = ?",
-                                (new_path, transcript['id'])
-                            )
-                            db.conn.commit()
+                            db.update_transcript_path(transcript['id'], new_path)
 
                 # 更新笔记记录
                 if 'notes' in old_path:
                     notes = db.get_notes_by_podcast(podcast_id)
                     for note in notes:
                         if note['file_path'] in old_path:
-                            cursor = db.conn.cursor()
-                            cursor.execute(
-                                "UPDATE notes SET file_path = ? WHERE id = ?",
-                                (new_path, note['id'])
-                            )
-                            db.conn.commit()
+                            db.update_note_path(note['id'], new_path)
 
         return jsonify({
             'success': True,
@@ -990,8 +1352,11 @@ def update_podcast_category(podcast_id):
 
 @app.route('/api/podcasts/<podcast_id>/retry-transcription', methods=['POST'])
 def retry_transcription(podcast_id):
-    """重新转录播客/纪录片"""
+    """重新转录播客/纪录片（从检查点继续，已提交的 ASR 任务会被重新轮询而不是重复提交）"""
     try:
+        data = request.get_json(silent=True) or {}
+        force = bool(data.get('force'))  # 丢弃已有 ASR 结果（含相同音频的缓存结果），强制重新提交
+
         # 获取播客信息
         podcast = db.get_podcast(podcast_id)
         if not podcast:
@@ -1005,9 +1370,14 @@ def retry_transcription(podcast_id):
 
         # 获取音频文件路径
         audio_path = None
-        audio_url = podcast.get('audio_url', '')
+        checkpoint_audio = db.get_checkpoints(podcast_id).get('audio') or {}
 
-        if content_type == 'documentary':
+        for candidate in (podcast.get('audio_file_path'), checkpoint_audio.get('audio_path')):
+            if candidate and Path(candidate).exists():
+                audio_path = Path(candidate)
+                break
+
+        if not audio_path and content_type == 'documentary':
             # 纪录片：从 uploads 目录查找文件
             original_filename = podcast.get('original_filename', '')
             if original_filename:
@@ -1022,7 +1392,7 @@ def retry_transcription(podcast_id):
                         'success': False,
                         'error': f'上传的文件不存在: {audio_path}'
                     }), 404
-        else:
+        elif not audio_path:
             # 播客：从 audio 目录查找文件
             category = podcast.get('category', '')
             audio_dir = project_root / config.get('storage.audio_dir')
@@ -1042,155 +1412,85 @@ def retry_transcription(podcast_id):
                     audio_path = test_path
                     break
 
-            if not audio_path:
-                return jsonify({
-                    'success': False,
-                    'error': '未找到音频文件，请确保文件已下载'
-                }), 404
+        if not audio_path:
+            return jsonify({
+                'success': False,
+                'error': '未找到音频文件，请确保文件已下载'
+            }), 404
 
         logger.info(f"开始重新转录: {podcast_id}, 文件: {audio_path}")
 
+        # 记录音频检查点，流水线据此跳过下载
+        if checkpoint_audio.get('audio_path') != str(audio_path):
+            checkpoint_audio.update({'audio_path': str(audio_path)})
+            checkpoint_audio.setdefault('audio_url', podcast.get('audio_url', ''))
+            db.save_checkpoint(podcast_id, 'audio', checkpoint_audio)
+
+        if force:
+            db.clear_checkpoints(podcast_id, ['asr_task', 'asr_chunks', 'asr_result'])
+            build_asr_cache(config, db).invalidate_audio(
+                checkpoint_audio.get('sha256') or podcast.get('audio_sha256')
+            )
+
         # 更新状态为转录中
         db.update_podcast(podcast_id, status='transcribing', error_message='')
 
-        # 调用转录函数
-        try:
-            if content_type == 'documentary':
-                from main import process_documentary
-                process_documentary(str(audio_path), podcast_id, config, db)
-            else:
-                from main import process_podcast_transcription
-                # 创建一个简化的转录函数
-                from transcriber_qwen import QwenTranscriber
-                from storage_manager import StorageManager
-                from transcript_formatter import format_transcript
-                import json
-
-                # 转录配置
-                transcriber_config = {
-                    "api_key": config.get("whisper.qwen_api_key"),
-                    "language": config.get("whisper.language"),
-                    "model": config.get("whisper.qwen_model", "paraformer-v2"),
-                    "paragraph_gap": config.get("analyzer.paragraph_gap")
-                }
-                transcriber = QwenTranscriber(transcriber_config)
-
-                # 执行转录
-                paragraphs = transcriber.transcribe(str(audio_path), audio_url=audio_url)
-                model_name = f"qwen-{transcriber_config['model']}"
-
-                # 获取栏目信息
-                category = podcast.get('category', '')
-                title = podcast.get('title', '未命名播客')
-
-                # 初始化存储管理器
-                storage = StorageManager(config)
-
-                # 保存 JSON 文件（作为标准转录数据源）
-                transcript_json_path = storage.get_transcript_path(podcast_id, category, "json")
-                storage.ensure_directory(transcript_json_path)
-
-                json_data = {
-                    "segments": paragraphs,
-                    "metadata": {
-                        "podcast_id": podcast_id,
-                        "title": title,
-                        "model": model_name,
-                        "category": category or "未分类",
-                        "speaker_names": {}
-                    },
-                    "word_count": sum(len(p["text"]) for p in paragraphs),
-                    "paragraph_count": len(paragraphs)
-                }
-
-                with open(transcript_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(json_data, f, ensure_ascii=False, indent=2)
+        # 提交到后台任务队列
+        if content_type == 'documentary':
+            task_id = job_queue.enqueue(podcast_id, 'documentary', {'file_path': str(audio_path)})
+        else:
+            task_id = job_queue.enqueue(podcast_id, 'podcast', {'url': podcast.get('url', '')})
 
-                # 生成 Markdown 文件
-                transcript_md_path = storage.get_transcript_path(podcast_id, category, "md")
-                storage.ensure_directory(transcript_md_path)
+        return jsonify({
+            'success': True,
+            'data': {
+                'podcast_id': podcast_id,
+                'task_id': task_id,
+                'message': '重新转录任务已提交'
+            }
+        }), 202
 
-                format_transcript(
-                    paragraphs,
-                    metadata={
-                        "podcast_id": podcast_id,
-                        "title": title,
-                        "model": model_name,
-                        "category": category or "未分类"
-                    },
-                    output_format='markdown',
-                    output_path=str(transcript_md_path)
-                )
+    except Exception as e:
+        logger.error(f"重新转录请求失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-                # 生成 PDF 文件（可选）
-                try:
-                    transcript_pdf_path = storage.get_transcript_path(podcast_id, category, "pdf")
-                    storage.ensure_directory(transcript_pdf_path)
-
-                    format_transcript(
-                        paragraphs,
-                        metadata={
-                            "podcast_id": podcast_id,
-                            "title": title,
-                            "model": model_name,
-                            "category": category or "未分类"
-                        },
-                        output_format='pdf',
-                        output_path=str(transcript_pdf_path)
-                    )
-                except Exception as e:
-                    logger.warning(f"PDF 生成失败: {e}")
-
-                # 创建或更新转录记录
-                word_count = sum(len(p["text"]) for p in paragraphs)
-
-                # 检查是否已有转录记录
-                existing_transcripts = db.get_transcripts_by_podcast(podcast_id)
-                if existing_transcripts:
-                    # 更新现有记录
-                    cursor = db.conn.cursor()
-                    cursor.execute("""
-                        UPDATE transcripts
-                        SET file_path = ?, word_count = ?, model_version = ?
-                        WHERE id = ?
-                    """, (str(transcript_json_path), word_count, model_name, existing_transcripts[0]['id']))
-                    db.conn.commit()
-                else:
-                    # 创建新记录
-                    db.create_transcript(
-                        podcast_id,
-                        str(transcript_json_path),
-                        word_count=word_count,
-                        model_version=model_name
-                    )
-
-                # 更新播客状态
-                db.update_podcast(podcast_id, status='completed')
-
-                logger.info(f"重新转录成功: {podcast_id}")
 
-            return jsonify({
-                'success': True,
-                'data': {
-                    'podcast_id': podcast_id,
-                    'message': '重新转录成功'
-                }
-            })
+@app.route('/api/transcripts/resegment', methods=['POST'])
+def resegment_transcripts():
+    """用保存的句子级 ASR 结果重新分段（不会重新转录，在后台任务中用进程池并行处理多个播客）"""
+    try:
+        data = request.get_json(silent=True) or {}
+        paragraph_gap = data.get('paragraph_gap')
+        if paragraph_gap is not None:
+            try:
+                paragraph_gap = float(paragraph_gap)
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'error': 'paragraph_gap 必须是数字'
+                }), 400
 
-        except Exception as e:
-            logger.error(f"重新转录失败: {e}")
-            import traceback
-            traceback.print_exc()
-            db.update_podcast(podcast_id, status='failed', error_message=str(e))
-            return jsonify({
-                'success': False,
-                'error': f'转录失败: {str(e)}'
-            }), 500
+        # 整个库的重新分段可能持续数分钟，提交到后台任务队列后立即返回（进度见任务 SSE 事件）
+        task_id = job_queue.enqueue('', 'resegment', {
+            'podcast_ids': data.get('podcast_ids') or None,
+            'paragraph_gap': paragraph_gap,
+            'force': bool(data.get('force'))
+        })
+        return jsonify({
+            'success': True,
+            'data': {
+                'task_id': task_id,
+                'message': '重新分段任务已提交，正在排队处理'
+            }
+        }), 202
 
     except Exception as e:
-        logger.error(f"重新转录请求失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"重新分段失败: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -1658,4 +1958,5 @@ if __name__ == '__main__':
     debug = config.get('app.debug', False)
 
     logger.info(f"启动 Flask 应用: http://{host}:{port}")
+    start()
     app.run(host=host, port=port, debug=debug)
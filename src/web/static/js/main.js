@@ -5,6 +5,10 @@ const HIDDEN_NOTES_STORAGE_KEY = 'podcast_hidden_note_records';
 // 全局变量：存储所有播客数据
 let allPodcasts = [];
 
+// 任务进度推送（SSE）连接及其订阅的任务 ID
+let taskEventSource = null;
+let watchedTaskIds = '';
+
 // 页面加载完成后初始化
 document.addEventListener('DOMContentLoaded', function() {
     initModalGuards();
@@ -72,8 +76,8 @@ function initSubmitForm() {
             if (result.success) {
                 showAlert(submitAlert, 'success', '任务提交成功！正在处理...');
                 form.reset();
-                // 刷新列表
-                setTimeout(() => loadPodcasts(), 1000);
+                // 刷新列表（会订阅新任务的进度推送）
+                loadPodcasts();
             } else {
                 showAlert(submitAlert, 'danger', `错误: ${result.error}`);
             }
@@ -136,14 +140,14 @@ function initUploadForm() {
 
             // 监听完成
             xhr.addEventListener('load', function() {
-                if (xhr.status === 200) {
+                if (xhr.status >= 200 && xhr.status < 300) {
                     const result = JSON.parse(xhr.responseText);
                     if (result.success) {
                         showAlert(submitAlert, 'success', '文件上传成功！正在处理...');
                         form.reset();
                         progressBar.classList.add('d-none');
-                        // 刷新列表
-                        setTimeout(() => loadPodcasts(), 1000);
+                        // 刷新列表（会订阅新任务的进度推送）
+                        loadPodcasts();
                     } else {
                         showAlert(submitAlert, 'danger', `错误: ${result.error}`);
                         progressBar.classList.add('d-none');
@@ -193,11 +197,72 @@ async function loadPodcasts() {
             allPodcasts = [];
             listContainer.innerHTML = '<p class="text-muted text-center">暂无播客记录</p>';
         }
+        watchTasks(allPodcasts);
     } catch (error) {
         listContainer.innerHTML = `<div class="alert alert-danger">加载失败: ${error.message}</div>`;
     }
 }
 
+// 订阅未结束任务的进度推送（所有任务共用一个 SSE 连接）
+function watchTasks(podcasts) {
+    const taskIds = podcasts
+        .filter(p => p.active_task_id)
+        .map(p => p.active_task_id)
+        .sort()
+        .join(',');
+
+    if (taskIds === watchedTaskIds && taskEventSource) return;
+
+    if (taskEventSource) {
+        taskEventSource.close();
+        taskEventSource = null;
+    }
+    watchedTaskIds = taskIds;
+    if (!taskIds) return;
+
+    taskEventSource = new EventSource(`${API_BASE}/tasks/events?ids=${encodeURIComponent(taskIds)}`);
+
+    taskEventSource.addEventListener('progress', function(e) {
+        const task = JSON.parse(e.data);
+        updateTaskProgress(task);
+        if (task.status === 'completed' || task.status === 'failed') {
+            // 任务结束后刷新一次列表以显示最终状态
+            loadPodcasts();
+        }
+    });
+
+    taskEventSource.addEventListener('done', function() {
+        taskEventSource.close();
+        taskEventSource = null;
+        watchedTaskIds = '';
+    });
+}
+
+// 更新播客卡片上的任务进度
+function updateTaskProgress(task) {
+    const bar = document.getElementById(`task-progress-${task.podcast_id}`);
+    const label = document.getElementById(`task-stage-${task.podcast_id}`);
+    if (!bar || !label) return;
+
+    const stageLabels = {
+        'fetch': '解析音频地址',
+        'download': '下载音频',
+        'transcribe': '语音转录',
+        'render': '生成文件'
+    };
+    const detail = task.detail || {};
+    let text = stageLabels[task.stage] || (task.status === 'pending' ? '排队中' : '');
+
+    if (task.stage === 'download' && detail.total) {
+        text += ` ${(detail.downloaded / 1048576).toFixed(1)} / ${(detail.total / 1048576).toFixed(1)} MB`;
+    } else if (task.stage === 'transcribe' && detail.state) {
+        text += ` (${detail.state}${detail.elapsed ? `, ${detail.elapsed}s` : ''})`;
+    }
+
+    bar.style.width = `${task.progress || 0}%`;
+    label.textContent = `${text} ${task.progress || 0}%`;
+}
+
 // 渲染播客列表
 function renderPodcasts(podcasts) {
     const listContainer = document.getElementById('podcastList');
@@ -275,6 +340,12 @@ function createPodcastCard(podcast) {
                             ${podcast.original_filename ? `<br><strong>文件名:</strong> ${podcast.original_filename}` : ''}
                         </p>
                         ${podcast.error_message ? `<p class="text-danger small mb-0">错误: ${podcast.error_message}</p>` : ''}
+                        ${podcast.active_task_id ? `
+                            <div class="progress mt-2" style="height: 6px;">
+                                <div class="progress-bar" id="task-progress-${podcast.id}" style="width: 0%"></div>
+                            </div>
+                            <small class="text-muted" id="task-stage-${podcast.id}">排队中</small>
+                        ` : ''}
                     </div>
                     <div class="btn-group" role="group">
                         ${retryButton}
@@ -383,6 +454,9 @@ function createDetailView(data) {
                                     <button class="btn btn-sm btn-outline-primary" data-file-path="${t.file_path}" onclick="downloadFile(this.getAttribute('data-file-path'))">
                                         下载
                                     </button>
+                                    <button class="btn btn-sm btn-outline-secondary" data-file-path="${t.file_path}" onclick="downloadFile(this.getAttribute('data-file-path'), 'pdf')">
+                                        PDF
+                                    </button>
                                 </div>
                             </div>
                         </div>
@@ -496,7 +570,7 @@ async function previewFile(filePath, transcriptId = null) {
 }
 
 // 下载文件
-async function downloadFile(filePath) {
+async function downloadFile(filePath, format = null) {
     try {
         // 使用POST请求获取文件
         const response = await fetch(`${API_BASE}/files/download`, {
@@ -505,10 +579,19 @@ async function downloadFile(filePath) {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                file_path: filePath
+                file_path: filePath,
+                format: format
             })
         });
 
+        // PDF 正在后台生成：稍后重新请求
+        if (response.status === 202) {
+            const result = await response.json();
+            const retryAfter = (result.data && result.data.retry_after) || 2;
+            setTimeout(() => downloadFile(filePath, format), retryAfter * 1000);
+            return;
+        }
+
         if (response.ok) {
             // 获取文件名
             const contentDisposition = response.headers.get('Content-Disposition');
@@ -591,7 +674,7 @@ async function retryTranscription(podcastId) {
         const result = await response.json();
 
         if (result.success) {
-            alert('重新转录成功！');
+            alert('重新转录任务已提交，正在后台处理');
             loadPodcasts(); // 刷新列表
         } else {
             alert(`重新转录失败: ${result.error}`);
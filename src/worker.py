@@ -0,0 +1,122 @@
+"""
+独立后台 worker 入口
+从数据库 tasks 表认领并执行播客/纪录片任务，与 Web 进程分离运行。
+可以启动多个进程，或在多台共享数据库的主机上运行（见 job_queue 的租约机制）。
+
+用法（在项目根目录执行）:
+    python -m src.worker [--workers N] [--config config/config.yaml]
+"""
+
+import sys
+import signal
+import argparse
+import threading
+from pathlib import Path
+from loguru import logger
+
+# 添加 src 目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_config
+from database import get_db
+from job_queue import JobQueue
+import rate_limiter
+import http_client
+import admission
+import media_server
+
+project_root = Path(__file__).parent.parent
+
+
+def build_job_queue(config, db, num_workers: int = None) -> JobQueue:
+    """
+    创建任务队列并注册播客/纪录片/重新分段处理函数
+
+    Args:
+        config: 配置对象
+        db: 数据库对象
+        num_workers: 工作线程数量（默认读取 jobs.workers）
+
+    Returns:
+        任务队列（尚未启动）
+    """
+    def run_podcast_task(task):
+        """任务队列处理函数：播客下载 + 转录"""
+        from main import process_podcast
+        process_podcast(task['payload']['url'], config, db, podcast_id=task['podcast_id'],
+                        on_progress=task.get('report_progress'),
+                        audio_url=task['payload'].get('audio_url'))
+
+    def run_documentary_task(task):
+        """任务队列处理函数：纪录片转录"""
+        from main import process_documentary
+        process_documentary(task['payload']['file_path'], task['podcast_id'], config, db,
+                            on_progress=task.get('report_progress'))
+
+    def run_resegment_task(task):
+        """任务队列处理函数：用保存的句子文件重新分段（整个库或指定播客，不关联单个播客）"""
+        from main import resegment_library
+        payload = task['payload']
+        resegment_library(config, db, podcast_ids=payload.get('podcast_ids') or None,
+                          paragraph_gap=payload.get('paragraph_gap'), force=bool(payload.get('force')),
+                          on_progress=task.get('report_progress'))
+
+    job_queue = JobQueue(
+        db,
+        num_workers=num_workers or config.get('jobs.workers', 2),
+        poll_interval=config.get('jobs.poll_interval', 1.0),
+        lease_seconds=config.get('jobs.lease_seconds', 60),
+        max_attempts=config.get('jobs.max_attempts', 3)
+    )
+    job_queue.register('podcast', run_podcast_task)
+    job_queue.register('documentary', run_documentary_task)
+    job_queue.register('resegment', run_resegment_task)
+    return job_queue
+
+
+def main(argv=None):
+    """worker 主函数"""
+    parser = argparse.ArgumentParser(description="播客分析后台 worker（从任务表认领并执行任务）")
+    parser.add_argument("--config", default=str(project_root / "config" / "config.yaml"), help="配置文件路径")
+    parser.add_argument("--workers", type=int, default=None, help="工作线程数量（默认读取 jobs.workers）")
+    args = parser.parse_args(argv)
+
+    config = get_config(args.config)
+
+    from main import setup_logging
+    setup_logging(config)
+    rate_limiter.configure(config.get("rate_limits"))
+    http_client.configure(config.get("http"))
+    admission.configure(config.get("admission"))
+    media_server.configure(config.get("media"), base_dir=str(project_root))
+
+    db = get_db(str(project_root / config.get("database.path")))
+    job_queue = build_job_queue(config, db, num_workers=args.workers)
+
+    stopping = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，等待当前任务完成后退出")
+        stopping.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    from main import build_feed_poller
+    feed_poller = build_feed_poller(config, db, enqueue=job_queue.enqueue)
+
+    job_queue.start()
+    feed_poller.start(poll_interval=config.get("feeds.poll_interval", 60))
+    try:
+        while not stopping.wait(1.0):
+            pass
+    finally:
+        feed_poller.stop()
+        job_queue.stop()
+        db.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())